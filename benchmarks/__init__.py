@@ -0,0 +1,4 @@
+"""Benchmarks for cpplint-fix, run on a synthetic C++ corpus.
+
+Run with `python -m benchmarks --output results.json` from the repository root.
+"""
@@ -0,0 +1,63 @@
+import sys
+import json
+import platform
+import tempfile
+import argparse as ap
+from pathlib import Path
+from dataclasses import asdict
+import cpplint
+from benchmarks.corpus import CorpusSpec, generate_corpus
+from benchmarks.phases import run_phases
+
+
+def main():
+    defaults = CorpusSpec()
+    parser = ap.ArgumentParser(prog="python -m benchmarks",
+                               description="Benchmark cpplint-fix on a synthetic C++ corpus.")
+    parser.add_argument("--files", type=int, default=defaults.files, help="Number of source files")
+    parser.add_argument("--lines", type=int, default=defaults.lines,
+                        help="Approximate number of lines per file")
+    parser.add_argument("--depth", type=int, default=defaults.depth,
+                        help="Maximum nesting depth of blocks in functions")
+    parser.add_argument("--density", type=float, default=defaults.density,
+                        help="Fraction of lines with a fixable violation")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Seed of the corpus generator")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs per phase")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Jobs for the fix_files benchmark")
+    parser.add_argument("--corpus", type=Path, default=None,
+                        help="Keep the generated corpus in this directory")
+    parser.add_argument("--output", "-o", type=Path, default=None,
+                        help="Write the results as JSON to this file (default: stdout)")
+    args = parser.parse_args()
+
+    spec = CorpusSpec(files=args.files, lines=args.lines, depth=args.depth,
+                      density=args.density, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus if args.corpus is not None else Path(tmp) / "corpus"
+        paths = generate_corpus(corpus, spec)
+        lines = sum(p.read_text().count("\n") for p in paths)
+        phases = run_phases(corpus, Path(tmp), args.repeat, jobs=args.jobs)
+
+    report = {
+        "spec": asdict(spec),
+        "lines": lines,
+        "repeat": args.repeat,
+        "jobs": args.jobs,
+        "environment": {
+            "python": platform.python_version(),
+            "cpplint": cpplint.__VERSION__,
+            "platform": platform.platform(),
+        },
+        "phases": phases,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    for name, stats in phases.items():
+        print(f"{name:40s} {stats['median'] * 1000:10.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import random
+from pathlib import Path
+from dataclasses import dataclass
+
+# Violations the generator can inject, by the cpplint code they trigger
+VIOLATIONS = (
+    "whitespace/end_of_line",
+    "whitespace/comments",
+    "whitespace/blank_line",
+    "whitespace/indent",
+    "whitespace/ending_newline",
+)
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """Shape of a synthetic C++ tree."""
+    files: int = 20
+    # Approximate number of lines per file
+    lines: int = 500
+    # Maximum depth of nested blocks inside functions
+    depth: int = 3
+    # Fraction of statement lines that get a fixable violation
+    density: float = 0.05
+    seed: int = 0
+
+
+class _FileWriter:
+    """Emits the lines of one file, injecting violations at random."""
+
+    def __init__(self, rng: random.Random, spec: CorpusSpec):
+        self.rng = rng
+        self.spec = spec
+        self.lines: list[str] = []
+        self.counter = 0
+
+    def _violates(self) -> bool:
+        return self.rng.random() < self.spec.density
+
+    def statement(self, indent: int) -> None:
+        self.counter += 1
+        line = " " * indent + f"total += value_{self.counter % 7} * {self.counter};"
+        if self._violates():
+            kind = self.rng.choice(("end_of_line", "comments"))
+            if kind == "end_of_line":
+                line += " " * self.rng.randint(1, 4)
+            else:
+                line += "// Accumulate"
+        self.lines.append(line)
+
+    def block(self, header: str, indent: int, depth: int) -> None:
+        self.lines.append(" " * indent + header + " {")
+        if self._violates():
+            self.lines.append("")
+        for _ in range(self.rng.randint(1, 3)):
+            if depth < self.spec.depth and self.rng.random() < 0.4:
+                self.block(f"if (total > {self.counter})", indent + 2, depth + 1)
+            else:
+                self.statement(indent + 2)
+        self.lines.append(" " * indent + "}")
+
+    def klass(self, name: str) -> None:
+        self.lines.append(f"class {name} {{")
+        for access in ("public", "private"):
+            self.lines.append(("" if self._violates() else " ") + f"{access}:")
+            self.lines.append(f"  int {access}_{self.counter}_;")
+            self.counter += 1
+        self.lines.append("};")
+        self.lines.append("")
+
+    def function(self, name: str) -> None:
+        self.lines.append(f"int {name}(int value_0) {{")
+        self.lines.append("  int total = 0;")
+        for i in range(1, 7):
+            self.lines.append(f"  int value_{i} = value_0 + {i};")
+        while self.rng.random() < 0.8:
+            self.block(f"for (int i = 0; i < {self.counter}; ++i)", 2, 1)
+        self.lines.append("  return total;")
+        self.lines.append("}")
+        self.lines.append("")
+
+
+def generate_file(rng: random.Random, spec: CorpusSpec, index: int) -> str:
+    """Returns the content of one synthetic source file."""
+    writer = _FileWriter(rng, spec)
+    writer.lines += ["// Copyright 2025 Benchmark Corpus", "", f"namespace corpus{index} {{", ""]
+    item = 0
+    while len(writer.lines) < spec.lines:
+        if item % 4 == 0:
+            writer.klass(f"Item{item}")
+        else:
+            writer.function(f"compute_{item}")
+        item += 1
+    writer.lines.append(f"}}  // namespace corpus{index}")
+    text = "\n".join(writer.lines)
+    return text if writer._violates() else text + "\n"
+
+
+def generate_corpus(root: Path, spec: CorpusSpec) -> list[Path]:
+    """Write a deterministic tree of C++ sources under root, per the spec.
+
+    The same spec always produces the same files. Returns the paths written.
+    """
+    rng = random.Random(spec.seed)
+    paths: list[Path] = []
+    for index in range(spec.files):
+        fpath = root / f"module{index % 10}" / f"file{index}.cpp"
+        fpath.parent.mkdir(parents=True, exist_ok=True)
+        fpath.write_text(generate_file(rng, spec, index), encoding="utf-8")
+        paths.append(fpath)
+    return paths
@@ -0,0 +1,135 @@
+import time
+import shutil
+import statistics
+from pathlib import Path
+from typing import Any, Callable
+from xml.sax.saxutils import escape, quoteattr
+from cpplint_fix.edits import EditPlan, Edits, FailedEditError, LineLocalEdit
+from cpplint_fix.engine import lint_inprocess
+from cpplint_fix.parser import CPPLTestcase, CPPLTestcaseFeed, CPPLTestsuite
+from cpplint_fix.source import SourceFile
+from cpplint_fix.wrapper import fix_files
+
+# Bytes fed to the parser at a time, as read from a cpplint pipe
+_CHUNK = 64 * 1024
+
+
+def measure(run: Callable[[Any], None], repeat: int,
+            setup: Callable[[], Any] = lambda: None) -> dict[str, Any]:
+    """Time `run` over `repeat` runs, each on a fresh state from `setup`.
+
+    Only `run` is timed. Returns the statistics of the wall times, in seconds.
+    """
+    times: list[float] = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "runs": times,
+    }
+
+
+def to_junit(testsuite: CPPLTestsuite) -> str:
+    """Returns the results as cpplint would write them with --output=junit."""
+    parts = [f'<testsuite errors="0" failures="{testsuite.total_failures}" '
+             f'name="cpplint" tests="{testsuite.total_failures}">']
+    for testcase in testsuite.testcases:
+        messages = "\n".join(f"{f.lineno}: {f.message} [{f.code}] [1]" for f in testcase.failures)
+        parts.append(f"<testcase name={quoteattr(str(testcase.fpath))}>"
+                     f"<failure>{escape(messages)}</failure></testcase>")
+    parts.append("</testsuite>")
+    return "".join(parts)
+
+
+def _parse_stream(data: bytes) -> list[CPPLTestcase]:
+    """Parse cpplint's XML output the way fix_files reads it from a pipe, in chunks."""
+    feed = CPPLTestcaseFeed()
+    testcases: list[CPPLTestcase] = []
+    for start in range(0, len(data), _CHUNK):
+        testcases.extend(feed.feed(data[start:start + _CHUNK]))
+    testcases.extend(feed.close())
+    return testcases
+
+
+def _load(root: Path, testsuite: CPPLTestsuite) -> dict[Path, SourceFile]:
+    return {tc.fpath: SourceFile.from_file(root / tc.fpath) for tc in testsuite.testcases}
+
+
+def _apply(sources: dict[Path, SourceFile], testsuite: CPPLTestsuite, code: str | None) -> None:
+    """Apply the edits for the failures with the code, or for all failures, planned
+    and applied per file as fix_files does."""
+    for testcase in testsuite.testcases:
+        plan = EditPlan(sources[testcase.fpath])
+        for failure in testcase.failures:
+            if code is not None and failure.code != code:
+                continue
+            edit_class = Edits.get(failure.code)
+            if edit_class is None:
+                continue
+            if issubclass(edit_class, LineLocalEdit):
+                plan.add_transform(failure.lineno, edit_class.transform)
+                continue
+            try:
+                plan.add(edit_class(failure))
+            except FailedEditError:
+                pass
+        plan.apply()
+
+
+def run_phases(corpus: Path, work_dir: Path, repeat: int, jobs: int = 1) -> dict[str, Any]:
+    """Benchmark each phase of a fix on the corpus, and fix_files end to end.
+
+    The corpus is never modified; outputs and copies go to work_dir.
+    """
+    testsuite, _ = lint_inprocess(corpus)
+    junit = to_junit(testsuite).encode("utf-8")
+    paths = [corpus / tc.fpath for tc in testsuite.testcases]
+    results: dict[str, Any] = {}
+
+    results["lint"] = measure(lambda _: lint_inprocess(corpus), repeat)
+    results["xml_parse"] = measure(lambda _: _parse_stream(junit), repeat)
+    results["source_load"] = measure(lambda _: [SourceFile.from_file(p) for p in paths], repeat)
+    results["nesting"] = measure(
+        lambda sources: [src.analyze_nesting() for src in sources.values()],
+        repeat, setup=lambda: _load(corpus, testsuite))
+
+    # Edits that need the nesting analysis include it in their time
+    codes = sorted({f.code for tc in testsuite.testcases for f in tc.failures})
+    for code in codes:
+        edit_class = Edits.get(code)
+        if edit_class is None:
+            continue
+        results[f"edits/{edit_class.__name__}"] = measure(
+            lambda sources, code=code: _apply(sources, testsuite, code),
+            repeat, setup=lambda: _load(corpus, testsuite))
+
+    def edited_sources() -> dict[Path, SourceFile]:
+        sources = _load(corpus, testsuite)
+        _apply(sources, testsuite, None)
+        return sources
+
+    out_dir = work_dir / "written"
+
+    def write(sources: dict[Path, SourceFile]) -> None:
+        for rel_path, src in sources.items():
+            dest = out_dir / rel_path
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            src.to_file(dest)
+
+    results["write"] = measure(write, repeat, setup=edited_sources)
+
+    copy_dir = work_dir / "fix_files"
+
+    def fresh_copy() -> Path:
+        shutil.rmtree(copy_dir, ignore_errors=True)
+        shutil.copytree(corpus, copy_dir)
+        return copy_dir
+
+    results["fix_files"] = measure(lambda root: fix_files(root, None, jobs=jobs), repeat,
+                                   setup=fresh_copy)
+    return results
@@ -1,8 +1,20 @@
+import os
+import sys
+import json
 from pathlib import Path
 import argparse as ap
 from typing import Protocol
-from cpplint_fix.wrapper import fix_files
+from xml.etree.ElementTree import ParseError
+from cpplint_fix.wrapper import fix_files, check_files, make_plan, plan_report
+from cpplint_fix.parser import CPPLTestsuite
+from cpplint_fix.planning import FixPlan
 from cpplint_fix.config import CPPLFixConfig
+from cpplint_fix.engine import LintBackend
+from cpplint_fix.cache import LintCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE
+from cpplint_fix.git import GitError
+from cpplint_fix.writing import LinkMode, SyncMode, write_atomic
+from cpplint_fix.pipeline import StageLimits
+from cpplint_fix import daemon
 import logging
 
 class MainArgs(Protocol):
@@ -10,48 +22,319 @@ class MainArgs(Protocol):
     output: Path | None
     config: Path | None
     dry_run: bool
+    check: bool
+    diff: bool
+    save_plan: Path | None
+    plan: Path | None
+    from_report: str | None
+    backend: str
+    jobs: int | None
+    no_cache: bool
+    cache_dir: Path
+    cache_size: int
+    until_clean: bool
+    max_rounds: int
+    since: str | None
+    changed_lines_only: bool
+    profile: bool
+    profile_json: Path | None
+    fsync: str
+    link: str
+    full_lint: bool
+    stage_limits: str | None
+
+
+def _setup_logger() -> logging.Logger:
+    logger = logging.getLogger("cpplint_fix")
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
+    logger.addHandler(handler)
+    handler.setFormatter(formatter)
+    return logger
+
+
+def _load_config(config_path: Path, logger: logging.Logger) -> CPPLFixConfig | None:
+    """Load the configuration file, logging an error and returning None on failure."""
+    if not config_path.exists():
+        logger.error(f"Configuration file {config_path} does not exist.")
+        return None
+
+    with config_path.open('r') as f:
+        config_content = f.read()
+
+    try:
+        config = CPPLFixConfig.model_validate_yaml(config_content)
+        logger.info("Configuration loaded successfully.")
+    except Exception as e:
+        logger.error(f"Failed to load configuration: {e}")
+        return None
+    return config
+
+
+def _load_report(report: str, input_path: Path, config: CPPLFixConfig | None,
+                 logger: logging.Logger) -> FixPlan | None:
+    """Plan the fixes for a saved cpplint report, or one read from stdin if `report`
+    is "-", logging an error and returning None on failure.
+
+    Files modified after a report file are skipped; there is no such check for stdin.
+    """
+    try:
+        if report == "-":
+            text, report_time = sys.stdin.read(), None
+        else:
+            report_path = Path(report)
+            text = report_path.read_text(encoding="utf-8", errors="replace")
+            report_time = report_path.stat().st_mtime
+        testsuite = CPPLTestsuite.from_report(text)
+    except (OSError, ValueError, ParseError, AssertionError) as e:
+        # ParseError for malformed XML, AssertionError for an unexpected root tag
+        logger.error(f"Failed to read cpplint report {report}: {e}")
+        return None
+    plan = plan_report(input_path, testsuite, config=config, report_time=report_time)
+    logger.info(f"{plan} from cpplint report {report}")
+    return plan
+
+
+def serve_main(argv: list[str]) -> None:
+    parser = ap.ArgumentParser(prog="cpplint-fix serve",
+                               description="Run a daemon that answers fix requests on a Unix socket.")
+    parser.add_argument("--socket", type=Path, default=daemon.DEFAULT_SOCKET,
+                        help=f"Path of the Unix socket (default: {daemon.DEFAULT_SOCKET})")
+    parser.add_argument("--config", "-c", type=Path, default=None,
+                        help="Path to the configuration file (optional)")
+    parser.add_argument("--idle-timeout", type=float, default=daemon.DEFAULT_IDLE_TIMEOUT,
+                        help="Shut down after this many seconds without requests")
+    parser.add_argument("--max-rounds", type=int, default=1,
+                        help="Maximum number of fix rounds per request")
+    args = parser.parse_args(argv)
+
+    logger = _setup_logger()
+    config: CPPLFixConfig | None = None
+    if args.config:
+        config = _load_config(args.config, logger)
+        if config is None:
+            return
+    try:
+        daemon.serve(daemon.FixDaemon(config, max_rounds=args.max_rounds),
+                     socket_path=args.socket, idle_timeout=args.idle_timeout)
+    except daemon.DaemonError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+def client_main(argv: list[str]) -> None:
+    parser = ap.ArgumentParser(prog="cpplint-fix client",
+                               description="Fix a file with a running cpplint-fix daemon.")
+    parser.add_argument("file", type=Path, help="Source file to fix")
+    parser.add_argument("--socket", type=Path, default=daemon.DEFAULT_SOCKET,
+                        help=f"Path of the daemon's Unix socket (default: {daemon.DEFAULT_SOCKET})")
+    parser.add_argument("--stdin", action="store_true",
+                        help="Fix the content read from stdin instead of the file, and print the "
+                             "fixed content to stdout; the file is not written")
+    args = parser.parse_args(argv)
+
+    logger = _setup_logger()
+    payload: dict = {"command": "fix", "path": str(args.file.absolute())}
+    if args.stdin:
+        payload["text"] = sys.stdin.buffer.read().decode("utf-8", "surrogateescape")
+    try:
+        response = daemon.request(payload, socket_path=args.socket)
+    except daemon.DaemonError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    if args.stdin:
+        sys.stdout.buffer.write(response["text"].encode("utf-8", "surrogateescape"))
+    elif response["edits_applied"] > 0:
+        write_atomic(args.file, [response["text"].encode("utf-8", "surrogateescape")])
+        logger.info(f"Applied {response['edits_applied']} edits to {args.file}")
 
 
 def main():
-    parser = ap.ArgumentParser(description="Run cpplint and apply fixes to source files.")
+    argv = sys.argv[1:]
+    if argv and argv[0] == "serve":
+        return serve_main(argv[1:])
+    if argv and argv[0] == "client":
+        return client_main(argv[1:])
+
+    parser = ap.ArgumentParser(description="Run cpplint and apply fixes to source files. "
+                                           "Use `cpplint-fix serve` and `cpplint-fix client` "
+                                           "to fix files through a long-lived daemon.")
     parser.add_argument("input", type=Path, help="Input directory containing source files, or single file")
     parser.add_argument("--output", "-o", type=Path, default=None, 
-                        help="Output directory for fixed files (optional)")
+                        help="Output directory for fixed files (optional); it mirrors the "
+                             "layout of the input, with unchanged files placed as --link sets")
     parser.add_argument("--config", "-c", type=Path, default=None,
                         help="Path to the configuration file (optional)")
-    parser.add_argument("--dry-run", action="store_true",
-                        help="If set, only print the changes without applying them")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--dry-run", action="store_true",
+                       help="If set, only print the changes without applying them")
+    modes.add_argument("--check", action="store_true",
+                       help="Only check for fixable failures, without loading or writing files; "
+                            "exit with status 1 as soon as one is found")
+    modes.add_argument("--diff", action="store_true",
+                       help="Print a unified diff of the fixes to stdout instead of writing "
+                            "them; exit with status 1 if any file would change")
+    modes.add_argument("--save-plan", type=Path, default=None, metavar="FILE",
+                       help="Only lint and save the planned fixes as JSON to FILE, without "
+                            "loading or writing source files")
+    parser.add_argument("--plan", type=Path, default=None, metavar="FILE",
+                        help="Apply the fixes planned in FILE (from --save-plan) instead of "
+                             "running cpplint; files changed since are skipped")
+    parser.add_argument("--from-report", type=str, default=None, metavar="FILE",
+                        help="Fix the failures in a saved cpplint report (JUnit XML, or emacs, "
+                             "eclipse or vs7 text) instead of running cpplint; '-' reads it "
+                             "from stdin. Files modified after the report file are skipped")
+    parser.add_argument("--backend", choices=[b.value for b in LintBackend],
+                        default=LintBackend.INPROCESS.value,
+                        help="Run cpplint in this process, or as a subprocess (fallback)")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="Number of files to process in parallel (default: CPU count)")
+    parser.add_argument("--stage-limits", type=str, default=None, metavar="SPEC",
+                        help="Files each stage handles at once, and files waiting between two "
+                             "stages, as name=N pairs separated by commas, such as "
+                             "'load=8,write=8,queue_size=64'; stages are lint, load, fix and "
+                             "write (default: --jobs for lint and fix, 4 for load and write)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always run cpplint, without reading or updating the lint cache")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR,
+                        help=f"Directory of the lint cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_SIZE // (1024 * 1024),
+                        help="Size limit of the lint cache in MiB; least recently used "
+                             "entries are evicted beyond it")
+    parser.add_argument("--until-clean", action="store_true",
+                        help="Lint each fixed file again in memory and keep fixing until no "
+                             "fixable failures are left; files are written once at the end")
+    parser.add_argument("--max-rounds", type=int, default=10,
+                        help="Maximum number of fix rounds per file with --until-clean")
+    parser.add_argument("--full-lint", action="store_true",
+                        help="Run all of cpplint's checks, reporting the failures that cannot "
+                             "be fixed too; by default only the fixable ones are reported")
+    parser.add_argument("--since", type=str, default=None, metavar="REF",
+                        help="Only lint and fix files that changed since the given git ref")
+    parser.add_argument("--changed-lines-only", action="store_true",
+                        help="With --since, only fix failures on added or modified lines, "
+                             "in every round of --until-clean too")
+    parser.add_argument("--fsync", choices=[m.value for m in SyncMode], default=SyncMode.NONE.value,
+                        help="Flush written files to disk: 'file' before each replaces the "
+                             "original, 'batch' all at once at the end (default: none)")
+    parser.add_argument("--link", choices=[m.value for m in LinkMode], default=LinkMode.HARDLINK.value,
+                        help="How --output places unchanged files: as hard links (default), "
+                             "reflinks or copies; links fall back to copies where unsupported")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print the wall and CPU time of each phase and file, and the "
+                             "edits applied and failed per error code, at the end")
+    parser.add_argument("--profile-json", type=Path, default=None, metavar="FILE",
+                        help="Profile the run and save the results as JSON to FILE")
     
     args: MainArgs = parser.parse_args() # type: ignore
+    if args.changed_lines_only and args.since is None:
+        parser.error("--changed-lines-only requires --since")
     
+    limits: StageLimits | None = None
+    if args.stage_limits is not None:
+        try:
+            limits = StageLimits.for_jobs(args.jobs or os.cpu_count() or 1).updated(args.stage_limits)
+        except ValueError as e:
+            parser.error(f"--stage-limits: {e}")
+
     input_path = args.input
     output_path = args.output
     
-    logger = logging.getLogger("cpplint_fix")
-    logger.setLevel(logging.INFO)
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
-    logger.addHandler(handler)
-    handler.setFormatter(formatter)
-    
-    config: CPPLFixConfig | None = None    
+    logger = _setup_logger()
+
+    config: CPPLFixConfig | None = None
     if args.config:
-        config_path: Path = args.config
-        if not config_path.exists():
-            logger.error(f"Configuration file {config_path} does not exist.")
+        config = _load_config(args.config, logger)
+        if config is None:
             return
-        
-        with config_path.open('r') as f:
-            config_content = f.read()
-        
+
+    cache: LintCache | None = None
+    if not args.no_cache:
+        cache = LintCache(args.cache_dir, max_size=args.cache_size * 1024 * 1024)
+
+    if args.plan is not None and args.save_plan is not None:
+        parser.error("--plan cannot be combined with --save-plan")
+    if args.plan is not None and args.from_report is not None:
+        parser.error("--plan cannot be combined with --from-report")
+    plan: FixPlan | None = None
+    if args.plan is not None:
         try:
-            config = CPPLFixConfig.model_validate_yaml(config_content)
-            logger.info("Configuration loaded successfully.")
-        except Exception as e:
-            logger.error(f"Failed to load configuration: {e}")
+            plan = FixPlan.load(args.plan)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Failed to load fix plan {args.plan}: {e}")
+            sys.exit(2)
+    if args.from_report is not None:
+        plan = _load_report(args.from_report, input_path, config, logger)
+        if plan is None:
+            sys.exit(2)
+
+    if args.save_plan is not None and plan is not None:
+        plan.save(args.save_plan)
+        logger.info(f"Plan saved to {args.save_plan}")
+        return
+    if args.save_plan is not None:
+        try:
+            new_plan = make_plan(input_path, config=config, backend=LintBackend(args.backend),
+                                 jobs=args.jobs, cache=cache, since=args.since,
+                                 changed_lines_only=args.changed_lines_only,
+                                 full_lint=args.full_lint)
+        except GitError as e:
+            logger.error(f"Failed to find changed files: {e}")
+            sys.exit(2)
+        new_plan.save(args.save_plan)
+        logger.info(f"{new_plan}; saved to {args.save_plan}")
+        return
+
+    if args.check and plan is not None:
+        for file_plan in plan.files:
+            for failure in file_plan.failures:
+                logger.error(f"{file_plan.fpath}:{failure.lineno}: {failure.message} [{failure.code}]")
+        if plan.files:
+            sys.exit(1)
+        logger.info("No fixable failures found.")
+        return
+    if args.check:
+        try:
+            testcase = check_files(input_path, config=config, backend=LintBackend(args.backend),
+                                   jobs=args.jobs, cache=cache, since=args.since,
+                                   changed_lines_only=args.changed_lines_only,
+                                   full_lint=args.full_lint)
+        except GitError as e:
+            logger.error(f"Failed to find changed files: {e}")
+            sys.exit(2)
+        if testcase is None:
+            logger.info("No fixable failures found.")
             return
+        for failure in testcase.failures:
+            logger.error(f"{testcase.fpath}:{failure.lineno}: {failure.message} [{failure.code}]")
+        sys.exit(1)
+
+    if args.diff:
+        # Invalid UTF-8 in the sources is printed back as the bytes it was
+        sys.stdout.reconfigure(errors="surrogateescape")  # type: ignore[union-attr]
+    profile = args.profile or args.profile_json is not None
+    try:
+        summary = fix_files(input_path, output_path, dry_run=args.dry_run, config=config,
+                            backend=LintBackend(args.backend), jobs=args.jobs, cache=cache,
+                            until_clean=args.until_clean, max_rounds=args.max_rounds,
+                            since=args.since, changed_lines_only=args.changed_lines_only,
+                            profile=profile, diff=sys.stdout if args.diff else None,
+                            plan=plan, sync=SyncMode(args.fsync), link=LinkMode(args.link),
+                            full_lint=args.full_lint, limits=limits)
+    except GitError as e:
+        logger.error(f"Failed to find changed files: {e}")
+        sys.exit(2)
 
-    fix_files(input_path, output_path, dry_run=args.dry_run, config=config)
+    if summary.profile is not None:
+        if args.profile:
+            logger.info(str(summary.profile))
+        if args.profile_json is not None:
+            args.profile_json.write_text(json.dumps(summary.profile.to_dict(), indent=2) + "\n")
+            logger.info(f"Profile saved to {args.profile_json}")
+    if args.diff and any(r.diff for r in summary.results):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,110 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+import cpplint
+from cpplint_fix.parser import CPPLFailure
+
+DEFAULT_CACHE_DIR = Path(".cpplint-fix-cache")
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+class LintCache:
+    """On-disk cache of cpplint failures, keyed by file content and lint settings.
+
+    Each entry is a small JSON file named after its key. Entries are touched
+    when read, so that eviction can drop the least recently used ones first.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_DIR, max_size: int = DEFAULT_MAX_SIZE,
+                 lint_args: tuple[str, ...] = ()):
+        self.path = path
+        self.max_size = max_size
+        # Extra cpplint arguments change what it reports, so they are part of the key
+        self.lint_args = lint_args
+        self._cfg_digests: dict[Path, str] = {}
+
+    def with_lint_args(self, *lint_args: str) -> "LintCache":
+        """Returns a cache sharing this one's directory, for cpplint run with extra arguments."""
+        return LintCache(self.path, self.max_size, (*self.lint_args, *lint_args))
+
+    def _cfg_digest(self, directory: Path) -> str:
+        """Hash of all the CPPLINT.cfg files cpplint would read for files in the directory."""
+        if directory not in self._cfg_digests:
+            cfg_file = directory / "CPPLINT.cfg"
+            digest = hashlib.sha256(cfg_file.read_bytes()).hexdigest() if cfg_file.is_file() else ""
+            parent = directory.parent
+            if parent != directory:
+                digest += self._cfg_digest(parent)
+            self._cfg_digests[directory] = hashlib.sha256(digest.encode()).hexdigest()
+        return self._cfg_digests[directory]
+
+    def key(self, fpath: Path) -> str:
+        """Returns the cache key for the current content of the file."""
+        abs_path = Path(os.path.abspath(fpath))
+        h = hashlib.sha256()
+        # The path matters too: header guard names are derived from it
+        for part in (cpplint.__VERSION__, str(abs_path), self._cfg_digest(abs_path.parent),
+                     *self.lint_args):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        h.update(fpath.read_bytes())
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.path / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> list[CPPLFailure] | None:
+        """Returns the cached failures for the key, or None on a miss.
+
+        Entries that cannot be parsed, such as ones from an older version, are
+        removed and count as a miss.
+        """
+        entry = self._entry_path(key)
+        try:
+            text = entry.read_text(encoding="utf-8")
+            os.utime(entry)
+        except OSError:
+            return None
+        try:
+            return [CPPLFailure(lineno=lineno, message=message, code=code)
+                    for lineno, message, code in json.loads(text)["failures"]]
+        except (KeyError, TypeError, ValueError):
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+            return None
+
+    def put(self, key: str, failures: list[CPPLFailure]) -> None:
+        """Stores the failures for the key."""
+        entry = self._entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        data = {"failures": [[f.lineno, f.message, f.code] for f in failures]}
+        # Write atomically, as several workers may share the cache
+        with NamedTemporaryFile("w", encoding="utf-8", dir=entry.parent, delete=False) as f:
+            json.dump(data, f)
+        os.replace(f.name, entry)
+
+    def evict(self) -> int:
+        """Removes the least recently used entries until the cache fits its size limit.
+
+        Returns the number of entries removed.
+        """
+        entries = []
+        for entry in self.path.glob("*/*.json"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
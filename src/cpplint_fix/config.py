@@ -1,6 +1,7 @@
 from re import Pattern
 from yaml import safe_load
 from pydantic import BaseModel, Field, ConfigDict
+from cpplint_fix.discovery import ExcludeFilter
 
 
 class CPPLFixConfig(BaseModel):
@@ -21,6 +22,11 @@ class CPPLFixConfig(BaseModel):
         description="List of regex patterns for file paths to exclude from fixing."
     )
     
+    @property
+    def exclude_filter(self) -> ExcludeFilter:
+        """Returns a single matcher for all the exclude_files patterns."""
+        return ExcludeFilter.of(tuple(self.exclude_files))
+
     @classmethod
     def model_validate_yaml(cls, content: str) -> "CPPLFixConfig":
         """Validate and parse YAML content into a CPPLFixConfig instance."""
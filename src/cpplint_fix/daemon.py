@@ -0,0 +1,207 @@
+import os
+import json
+import stat
+import socket
+import hashlib
+import logging
+import tempfile
+import socketserver
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any
+from cpplint_fix.config import CPPLFixConfig
+from cpplint_fix.wrapper import fix_text
+
+logger = logging.getLogger(__name__)
+
+
+
+def _runtime_dir() -> Path:
+    """The user's runtime directory, or a directory of their own in the temporary one."""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime)
+    return Path(tempfile.gettempdir()) / f"cpplint-fix-{os.getuid()}"
+
+
+DEFAULT_SOCKET = _runtime_dir() / "cpplint-fix.sock"
+DEFAULT_IDLE_TIMEOUT = 600.0
+DEFAULT_MAX_ENTRIES = 128
+
+
+class DaemonError(Exception):
+    """Raised when the daemon cannot be reached or reports an error."""
+
+
+class FixDaemon:
+    """Answers fix requests with the config and recent results kept in memory.
+
+    Requests and responses are JSON objects. A fix request has a "path" and
+    optionally the "text" to fix instead of the file's content on disk; the
+    response holds the fixed text and the counts of the fixes. Texts are the raw
+    content decoded with "surrogateescape", so line endings and invalid UTF-8
+    are kept as they are, and JSON carries any invalid bytes as lone surrogates.
+    Results are kept for the most recently fixed contents, so repeated saves of
+    an unchanged buffer are answered without linting again.
+    """
+
+    def __init__(self, config: CPPLFixConfig | None = None, max_rounds: int = 1,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.config = config if config is not None else CPPLFixConfig()
+        self.max_rounds = max_rounds
+        self.max_entries = max_entries
+        self._results: OrderedDict[tuple[str, str], dict[str, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def fix(self, fpath: Path, text: str) -> dict[str, Any]:
+        """Returns the response to a fix request for the given content of the file."""
+        key = (os.path.abspath(fpath),
+               hashlib.sha256(text.encode("utf-8", "surrogateescape")).hexdigest())
+        response = self._results.get(key)
+        if response is not None:
+            self._results.move_to_end(key)
+            self.hits += 1
+            return response
+
+        self.misses += 1
+        fixed, result = fix_text(fpath, text, config=self.config, max_rounds=self.max_rounds)
+        response = {
+            "text": fixed,
+            "failures": result.failures,
+            "edits_applied": result.edits_applied,
+            "edits_failed": result.edits_failed,
+            "logs": [message for _, message in result.logs],
+        }
+        self._results[key] = response
+        if len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+        return response
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        """Returns the response to a request, as sent back to the client."""
+        command = request.get("command", "fix")
+        if command == "ping":
+            return {"ok": True}
+        if command != "fix":
+            return {"ok": False, "error": f"Unknown command: {command}"}
+        if "path" not in request:
+            return {"ok": False, "error": "Missing path in fix request"}
+
+        fpath = Path(request["path"])
+        text = request.get("text")
+        try:
+            if text is None:
+                text = fpath.read_bytes().decode("utf-8", "surrogateescape")
+            return {"ok": True, **self.fix(fpath, text)}
+        except Exception as e:
+            logger.exception(f"Failed to fix {fpath}")
+            return {"ok": False, "error": str(e)}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request line and writes back one JSON response line."""
+    server: "_DaemonServer"
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError as e:
+            response = {"ok": False, "error": f"Invalid request: {e}"}
+        else:
+            if request.get("command") == "shutdown":
+                self.server.stopped = True
+                response = {"ok": True}
+            else:
+                response = self.server.daemon.handle(request)
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _DaemonServer(socketserver.UnixStreamServer):
+    """Serves requests one at a time, as cpplint keeps global state."""
+
+    def __init__(self, socket_path: Path, daemon: FixDaemon, idle_timeout: float):
+        super().__init__(str(socket_path), _RequestHandler)
+        self.daemon = daemon
+        self.timeout = idle_timeout
+        self.stopped = False
+
+    def handle_timeout(self) -> None:
+        logger.info(f"No requests for {self.timeout} seconds, shutting down")
+        self.stopped = True
+
+
+def _check_owner(path: Path) -> None:
+    """Raise DaemonError unless the path belongs to the current user and, for a
+    directory, no other user can write in it.
+
+    Another user who controls the socket could read the buffers sent to it and
+    answer with any text, which the client writes over the file.
+    """
+    st = os.stat(path)
+    if st.st_uid != os.getuid():
+        raise DaemonError(f"Refusing to use {path}: it is owned by another user")
+    if stat.S_ISDIR(st.st_mode) and st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise DaemonError(f"Refusing to use {path}: other users can write in it")
+
+
+def serve(daemon: FixDaemon, socket_path: Path = DEFAULT_SOCKET,
+          idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+    """Answer requests on the Unix socket until idle for `idle_timeout` seconds.
+
+    The socket's directory is created, only accessible to the current user, if
+    it does not exist; it must belong to the current user and not be writable by
+    others. A stale socket file left by a previous daemon is replaced; the
+    socket file is removed on shutdown.
+    """
+    socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    _check_owner(socket_path.parent)
+    if os.path.lexists(socket_path):
+        _check_owner(socket_path)
+        if _is_alive(socket_path):
+            raise DaemonError(f"A daemon is already listening on {socket_path}")
+        socket_path.unlink()
+
+    with _DaemonServer(socket_path, daemon, idle_timeout) as server:
+        logger.info(f"Listening on {socket_path}")
+        try:
+            while not server.stopped:
+                server.handle_request()
+        finally:
+            socket_path.unlink(missing_ok=True)
+    logger.info(f"Served {daemon.hits + daemon.misses} fix requests "
+                f"({daemon.hits} from recent results)")
+
+
+def request(payload: dict[str, Any], socket_path: Path = DEFAULT_SOCKET,
+            timeout: float | None = 60.0) -> dict[str, Any]:
+    """Send a request to the daemon and return its response.
+
+    Raises DaemonError if no daemon is listening, if the socket or its directory
+    does not belong to the current user, or if the request failed.
+    """
+    try:
+        _check_owner(socket_path.parent)
+        _check_owner(socket_path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError as e:
+        raise DaemonError(f"Cannot reach the daemon on {socket_path}: {e}") from e
+
+    response = json.loads(line) if line else {"ok": False, "error": "No response"}
+    if not response.get("ok"):
+        raise DaemonError(response.get("error", "Request failed"))
+    return response
+
+
+def _is_alive(socket_path: Path) -> bool:
+    """Whether a daemon answers on the socket."""
+    try:
+        request({"command": "ping"}, socket_path, timeout=1.0)
+    except DaemonError:
+        return False
+    return True
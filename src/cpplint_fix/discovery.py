@@ -0,0 +1,189 @@
+import os
+import re
+import heapq
+from re import Pattern
+from pathlib import Path
+from functools import lru_cache
+from typing import Iterable
+from cpplint import GetAllExtensions
+
+# Assertions on the text after a match: a pattern without them that matches the
+# path of a directory also matches the paths of everything under it
+_LOOKAHEAD = re.compile(r"\$|\\[ZbB]|\(\?[=!]")
+_BACKREF = re.compile(r"\\\d|\(\?P=")
+_META = frozenset(".^$*+?{}[]|()")
+_SCOPED_FLAGS = ((re.ASCII, "a"), (re.IGNORECASE, "i"), (re.MULTILINE, "m"),
+                 (re.DOTALL, "s"), (re.VERBOSE, "x"))
+
+
+def _literal_prefix(pattern: Pattern) -> str | None:
+    """Returns the text a path must start with to match the pattern, if that is all
+    the pattern requires, as for `third_party/.*`."""
+    if pattern.flags & (re.IGNORECASE | re.VERBOSE):
+        return None
+    source = pattern.pattern.removeprefix("^")
+    for suffix in (".*$", ".*"):
+        stripped = source.removesuffix(suffix)
+        # The dot must not be escaped
+        if stripped != source and (len(stripped) - len(stripped.rstrip("\\"))) % 2 == 0:
+            source = stripped
+            break
+    prefix: list[str] = []
+    chars = iter(source)
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            if not escaped or escaped.isalnum():
+                return None
+            prefix.append(escaped)
+        elif char in _META:
+            return None
+        else:
+            prefix.append(char)
+    return "".join(prefix)
+
+
+def _combine(patterns: list[Pattern]) -> tuple[Pattern | None, tuple[Pattern, ...]]:
+    """Combines the patterns into a single regex, keeping apart those that cannot be.
+
+    Returns the combined regex, if any, and the patterns to match one by one.
+    """
+    combinable = [p for p in patterns if not _BACKREF.search(p.pattern)]
+    separate = tuple(p for p in patterns if _BACKREF.search(p.pattern))
+    if not combinable:
+        return None, separate
+    alternatives = []
+    for p in combinable:
+        flags = "".join(letter for flag, letter in _SCOPED_FLAGS if p.flags & flag)
+        alternatives.append(f"(?{flags}:{p.pattern})")
+    try:
+        return re.compile("|".join(alternatives)), separate
+    except re.error:
+        # As with global inline flags or repeated group names
+        return None, tuple(patterns)
+
+
+class ExcludeFilter:
+    """Matches paths against a list of exclude patterns at once.
+
+    Patterns are matched from the start of the path, as with re.match. Those
+    that only require a literal prefix are checked with a single startswith;
+    the others are combined into one regex.
+    """
+
+    def __init__(self, patterns: Iterable[Pattern]):
+        prefixes: list[str] = []
+        others: list[Pattern] = []
+        for pattern in patterns:
+            prefix = _literal_prefix(pattern)
+            if prefix is None:
+                others.append(pattern)
+            else:
+                prefixes.append(prefix)
+        self._prefixes = tuple(prefixes)
+        self._regex, self._separate = _combine(others)
+        self._dir_regex, self._dir_separate = _combine(
+            [p for p in others if not _LOOKAHEAD.search(p.pattern)])
+        self._empty = not prefixes and not others
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def of(patterns: tuple[Pattern, ...]) -> "ExcludeFilter":
+        """Returns the filter for the patterns, compiled once for the same patterns."""
+        return ExcludeFilter(patterns)
+
+    def __bool__(self) -> bool:
+        return not self._empty
+
+    def excludes(self, path: str) -> bool:
+        """Whether the path of a file matches any of the patterns."""
+        return (path.startswith(self._prefixes)
+                or (self._regex is not None and self._regex.match(path) is not None)
+                or any(p.match(path) for p in self._separate))
+
+    def excludes_dir(self, path: str) -> bool:
+        """Whether the patterns exclude every file under the directory, so that it
+        does not need to be walked. May miss some excluded directories, never
+        the other way around."""
+        path += os.sep
+        return (path.startswith(self._prefixes)
+                or (self._dir_regex is not None and self._dir_regex.match(path) is not None)
+                or any(p.match(path) for p in self._dir_separate))
+
+
+def is_source(fpath: Path) -> bool:
+    """Whether cpplint would lint the file, judging by its extension."""
+    return fpath.suffix[1:] in GetAllExtensions()
+
+
+def find_sources(input: Path, exclude: ExcludeFilter | None = None) -> tuple[Path, list[Path]]:
+    """Returns the root directory and the source files cpplint would lint for the input.
+
+    Mirrors `cpplint --recursive ./` run from the root: only files with an extension
+    cpplint recognizes are kept, and paths are relative to the root and sorted the
+    same way cpplint sorts them. Files whose path (the root joined with the relative
+    path) the exclude filter matches are left out, and directories it excludes
+    as a whole are not walked.
+    """
+    extensions = GetAllExtensions()
+    if not input.is_dir():
+        if not is_source(input) or (exclude and exclude.excludes(str(input))):
+            return input.parent, []
+        return input.parent, [Path(input.name)]
+
+    fnames: list[str] = []
+    for dirpath, dirnames, files in os.walk(input):
+        rel_dir = os.path.relpath(dirpath, input)
+        if exclude:
+            dirnames[:] = [d for d in dirnames if not exclude.excludes_dir(str(input / rel_dir / d))]
+        for fname in files:
+            if os.path.splitext(fname)[1][1:] in extensions:
+                if exclude and exclude.excludes(str(input / rel_dir / fname)):
+                    continue
+                fnames.append(os.path.normpath(os.path.join(rel_dir, fname)))
+    # cpplint sorts the plain path strings, not the path components
+    fnames.sort()
+    return input, [Path(f) for f in fnames]
+
+
+def select_sources(input: Path, candidates: Iterable[Path],
+                   exclude: ExcludeFilter | None = None) -> tuple[Path, list[Path]]:
+    """Like find_sources, but only picks among the candidate paths, relative to the root.
+
+    The tree is not walked, so this stays cheap for a few files in a large tree.
+    """
+    if not input.is_dir():
+        candidates = [p for p in candidates if p == Path(input.name)]
+        input = input.parent
+    rel_paths = [p for p in candidates if is_source(p) and (input / p).is_file()
+                 and not (exclude and exclude.excludes(str(input / p)))]
+    rel_paths.sort(key=str)
+    return input, rel_paths
+
+
+def file_size(fpath: Path) -> int:
+    """Returns the size of the file in bytes, or 0 if it cannot be read."""
+    try:
+        return fpath.stat().st_size
+    except OSError:
+        return 0
+
+
+def split_balanced(root: Path, rel_paths: list[Path], shards: int) -> list[list[Path]]:
+    """Split the files into at most `shards` groups with roughly equal total size.
+
+    Files are assigned largest first to the currently smallest group; each group
+    keeps the files in their original order.
+    """
+    shards = max(1, min(shards, len(rel_paths)))
+    if shards == 1:
+        return [list(rel_paths)] if rel_paths else []
+
+    sizes = [file_size(root / rel_path) for rel_path in rel_paths]
+    heap = [(0, shard) for shard in range(shards)]
+    assigned: list[list[int]] = [[] for _ in range(shards)]
+    for i in sorted(range(len(rel_paths)), key=lambda i: sizes[i], reverse=True):
+        total, shard = heapq.heappop(heap)
+        assigned[shard].append(i)
+        heapq.heappush(heap, (total + sizes[i], shard))
+    return [[rel_paths[i] for i in sorted(indices)] for indices in assigned if indices]
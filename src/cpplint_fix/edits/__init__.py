@@ -1,5 +1,7 @@
+from inspect import isabstract
 from typing import Type
-from .base import BaseEdit, FailedEditError
+from .base import BaseEdit, LineLocalEdit, FailedEditError
+from .plan import EditPlan, EditConflict, EditDuplicate
 from .whitespace import (
     WhitespaceEndingNewline,
     WhitespaceEndOfLine,
@@ -10,7 +12,11 @@ from .whitespace import (
 
 __all__ = [
     "BaseEdit",
+    "LineLocalEdit",
     "FailedEditError",
+    "EditPlan",
+    "EditConflict",
+    "EditDuplicate",
     "Edits",
     "WhitespaceEndingNewline",
     "WhitespaceEndOfLine",
@@ -26,7 +32,7 @@ class Edits:
     __edits: dict[str, Type[BaseEdit]] = {
         v._error_code: v
         for v in globals().values()
-        if isinstance(v, type) and issubclass(v, BaseEdit) and v is not BaseEdit
+        if isinstance(v, type) and issubclass(v, BaseEdit) and not isabstract(v)
     }
 
     @classmethod
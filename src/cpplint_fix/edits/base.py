@@ -42,6 +42,8 @@ class FailedEditError(Exception):
 
 class BaseEdit(ABC):
     _error_code: str = "BASE_EDIT"
+    # Set for edits that read the block info of lines up to the failing one
+    _needs_nesting: bool = False
     _failure: CPPLFailure
 
     def __init__(self, failure: CPPLFailure):
@@ -68,11 +70,38 @@ class BaseEdit(ABC):
         """
         pass
     
+    def operations(self, source_file: SourceFile) -> list[EditOperation]:
+        """Returns the operations that fix the failure in the source, without applying them."""
+        if self._needs_nesting:
+            source_file.analyze_nesting(self._failure.lineno)
+        return self._operations(source_file)
+
     def apply(self, source_file: SourceFile) -> None:
         """Apply the edit to the given source file."""
-        operations = self._operations(source_file)
-        for operation in operations:
+        for operation in self.operations(source_file):
             operation.apply(source_file)
             
     def __repr__(self) -> str:
-        return f"{self.__class__.__name__}({self._failure.lineno}: {self.error_code})"
\ No newline at end of file
+        return f"{self.__class__.__name__}({self._failure.lineno}: {self.error_code})"
+
+
+class LineLocalEdit(BaseEdit):
+    """Edit that rewrites the failing line as a pure function of its text.
+
+    Such edits can be batched: EditPlan.add_transform plans the transform alone,
+    and all of them for a file are applied in the plan's single pass over the
+    lines, instead of one operation per failure.
+    """
+
+    @staticmethod
+    @abstractmethod
+    def transform(line: str) -> str:
+        """Returns the fixed text of a line with this failure."""
+        pass
+
+    def _operations(self, source_file: SourceFile) -> list[EditOperation]:
+        line_no = self.failure.lineno
+        line_text = source_file[line_no].final_line
+        if line_text is None:
+            return []
+        return [EditOperation(line_no, EditOperationType.EDIT, self.transform(line_text))]
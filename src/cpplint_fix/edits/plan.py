@@ -0,0 +1,150 @@
+from typing import Callable
+from dataclasses import dataclass, field
+from cpplint_fix.source import SourceFile
+from cpplint_fix.edits.base import BaseEdit, EditOperation, EditOperationType
+
+
+@dataclass(frozen=True)
+class EditConflict:
+    """An edit rejected from a plan, with the line it conflicted at and why."""
+    edit: BaseEdit
+    line_number: int
+    reason: str
+
+    def __str__(self) -> str:
+        return f"{self.edit} conflicts at line {self.line_number}: {self.reason}"
+
+
+@dataclass(frozen=True)
+class EditDuplicate:
+    """An edit merged away into a plan, as the edits planned before it do all it does."""
+    edit: BaseEdit
+
+    def __str__(self) -> str:
+        return f"{self.edit} is already planned"
+
+
+@dataclass
+class _LinePlan:
+    """Merged operations planned for a single line."""
+    insert_before: list[str] = field(default_factory=list)
+    insert_after: list[str] = field(default_factory=list)
+    # New text of the line from a structural edit, and the edit that set it
+    text: str | None = None
+    text_edit: BaseEdit | None = None
+    deleted: bool = False
+
+
+class EditPlan:
+    """Collects the operations of all the edits for a file, then applies them at once.
+
+    Edits compute their operations on the source as it was before any of them,
+    so the result does not depend on the order of the failures. Compatible
+    operations on the same line are merged: a deletion absorbs rewrites, equal
+    rewrites or rewrites for the same error code are kept once, and line-local
+    transforms are applied on top of a rewrite. An edit whose operations
+    conflict with those already planned is rejected as a whole.
+    """
+
+    def __init__(self, source_file: SourceFile):
+        self.source_file = source_file
+        self._lines: dict[int, _LinePlan] = {}
+        # Line-local rewrites are kept apart, as they are the most common by far
+        self._transforms: dict[int, list[Callable[[str], str]]] = {}
+
+    def _out_of_range(self, line_number: int) -> bool:
+        return not 1 <= line_number <= len(self.source_file)
+
+    def _conflict(self, edit: BaseEdit, operation: EditOperation) -> str | None:
+        """Returns why the operation cannot be merged into the plan, if it cannot."""
+        if self._out_of_range(operation.line_number):
+            return "line out of range"
+        planned = self._lines.get(operation.line_number)
+        if planned is None:
+            return None
+        op_type = operation.operation_type
+        if op_type in (EditOperationType.INSERT_BEFORE, EditOperationType.INSERT_AFTER):
+            return "the line is deleted by another edit" if planned.deleted else None
+        if op_type == EditOperationType.DELETE:
+            if planned.insert_before or planned.insert_after:
+                return "another edit inserts lines next to it"
+            return None
+        if op_type == EditOperationType.EDIT and not planned.deleted:
+            # Rewrites for the same error code fix the same thing; the first one is kept
+            if (planned.text is not None and planned.text != operation.text
+                    and planned.text_edit is not None
+                    and planned.text_edit.error_code != edit.error_code):
+                return f"the line is rewritten differently by {planned.text_edit}"
+        return None
+
+    def _merged(self, operation: EditOperation) -> bool:
+        """Returns whether the operation changes nothing in the plan."""
+        planned = self._lines.get(operation.line_number)
+        if planned is None:
+            return False
+        if operation.operation_type == EditOperationType.EDIT:
+            return planned.deleted or planned.text is not None
+        return operation.operation_type == EditOperationType.DELETE and planned.deleted
+
+    def add(self, edit: BaseEdit) -> EditConflict | EditDuplicate | None:
+        """Plan the operations of the edit, unless one of them conflicts.
+
+        Returns the conflict if the edit was rejected, as for a failure outside the
+        file, or a duplicate if all its operations were merged into ones already
+        planned. Raises FailedEditError if the edit cannot compute its operations.
+        """
+        if self._out_of_range(edit.failure.lineno):
+            return EditConflict(edit=edit, line_number=edit.failure.lineno,
+                                reason="line out of range")
+        operations = edit.operations(self.source_file)
+        for operation in operations:
+            reason = self._conflict(edit, operation)
+            if reason is not None:
+                return EditConflict(edit=edit, line_number=operation.line_number, reason=reason)
+        if operations and all(self._merged(operation) for operation in operations):
+            return EditDuplicate(edit=edit)
+
+        for operation in operations:
+            planned = self._lines.setdefault(operation.line_number, _LinePlan())
+            op_type = operation.operation_type
+            if op_type == EditOperationType.INSERT_BEFORE:
+                planned.insert_before.append(operation.text)
+            elif op_type == EditOperationType.INSERT_AFTER:
+                planned.insert_after.append(operation.text)
+            elif op_type == EditOperationType.DELETE:
+                planned.deleted = True
+            elif planned.text is None:
+                planned.text = operation.text
+                planned.text_edit = edit
+        return None
+
+    def add_transform(self, line_number: int, transform: Callable[[str], str]) -> bool:
+        """Plan a line-local rewrite, applied after any other rewrite of the line.
+
+        Returns False, planning nothing, if the line is not in the file.
+        """
+        if self._out_of_range(line_number):
+            return False
+        self._transforms.setdefault(line_number, []).append(transform)
+        return True
+
+    def apply(self) -> None:
+        """Apply the planned operations to the source, in a single pass over the lines."""
+        source_file = self.source_file
+        no_plan = _LinePlan()
+        for line_number in sorted(self._lines.keys() | self._transforms.keys()):
+            planned = self._lines.get(line_number, no_plan)
+            for text in planned.insert_before:
+                source_file.insert_before(line_number, text)
+            if planned.deleted:
+                source_file.delete_line(line_number)
+                continue
+            current = source_file.line_text(line_number)
+            if current is not None:
+                text = planned.text if planned.text is not None else current
+                for transform in self._transforms.get(line_number, ()):
+                    text = transform(text)
+                if text != current:
+                    source_file.edit_line(line_number, text)
+            for text in planned.insert_after:
+                source_file.insert_after(line_number, text)
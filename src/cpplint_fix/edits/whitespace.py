@@ -2,12 +2,12 @@ import re
 from typing import Callable
 from cpplint_fix.edits.base import (
     BaseEdit,
+    LineLocalEdit,
     EditOperation,
     EditOperationType,
     FailedEditError,
 )
-from cpplint_fix.source import SourceFile
-from cpplint import _ClassInfo
+from cpplint_fix.source import SourceFile, NestingType
 
 
 class WhitespaceEndingNewline(BaseEdit):
@@ -17,32 +17,29 @@ class WhitespaceEndingNewline(BaseEdit):
 
     def _operations(self, source_file: SourceFile) -> list[EditOperation]:
         """Returns an edit operation to add a newline at the end of the file."""
-        if not source_file.lines or source_file.lines[-1].final_line == "":
+        if len(source_file) == 0 or source_file[len(source_file)].final_line == "":
             return (
                 []
             )  # No operation needed if the last line already ends with a newline
 
         return [
             EditOperation(
-                line_number=len(source_file.lines),
+                line_number=len(source_file),
                 operation_type=EditOperationType.INSERT_AFTER,
                 text="",
             )
         ]
 
 
-class WhitespaceEndOfLine(BaseEdit):
+class WhitespaceEndOfLine(LineLocalEdit):
     """Edit to remove trailing whitespace from lines."""
 
     _error_code = "whitespace/end_of_line"
 
-    def _operations(self, source_file: SourceFile) -> list[EditOperation]:
-        """Returns edit operations to remove trailing whitespace from lines."""
-        line_no = self.failure.lineno
-        line_text = source_file[line_no].final_line
-        if line_text is None:
-            return []
-        return [EditOperation(line_no, EditOperationType.EDIT, line_text.rstrip())]
+    @staticmethod
+    def transform(line: str) -> str:
+        """Removes trailing whitespace from the line."""
+        return line.rstrip()
 
 
 class WhitespaceBlankLine(BaseEdit):
@@ -60,6 +57,7 @@ class WhitespaceIndent(BaseEdit):
     """Edit to fix indentation issues."""
 
     _error_code = "whitespace/indent"
+    _needs_nesting = True
 
     # This edit has several variants, so we need to handle them specifically
     _handler_type = Callable[[SourceFile], list[EditOperation]]
@@ -120,7 +118,7 @@ class WhitespaceIndent(BaseEdit):
         # Find the class info from the previous line
         prev_line = source_file[line_no - 1]
         class_info = prev_line.last_block
-        if not isinstance(class_info, _ClassInfo):
+        if class_info is None or class_info.nesting_type != NestingType.CLASS:
             raise FailedEditError(
                 f"Could not fix {self.error_code}: Line {line_no} does not have a class block above it"
             )
@@ -141,23 +139,14 @@ class WhitespaceIndent(BaseEdit):
         )
 
 
-class WhitespaceComments(BaseEdit):
+class WhitespaceComments(LineLocalEdit):
     """Edit to fix whitespace issues between code and comments."""
 
     _error_code = "whitespace/comments"
 
-    def _operations(self, source_file: SourceFile) -> list[EditOperation]:
-        """Returns edit operations to fix whitespace in comments."""
-        line_no = self.failure.lineno
-        line_text = source_file[line_no].final_line
-        if line_text is None:
-            return []
-        comment_idx = line_text.find("//")
-        code_part = line_text[:comment_idx].rstrip()
-        return [
-            EditOperation(
-                line_no,
-                EditOperationType.EDIT,
-                f"{code_part}  {line_text[comment_idx:]}",
-            )
-        ]
+    @staticmethod
+    def transform(line: str) -> str:
+        """Puts two spaces between the code and the comment on the line."""
+        comment_idx = line.find("//")
+        code_part = line[:comment_idx].rstrip()
+        return f"{code_part}  {line[comment_idx:]}"
@@ -0,0 +1,154 @@
+import os
+from enum import Enum
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+import cpplint
+from cpplint import NestingState
+from cpplint_fix.parser import CPPLFailure, CPPLTestcase, CPPLTestsuite
+from cpplint_fix.source import SourceFile, NestingSnapshot, NestingTracker
+from cpplint_fix.discovery import find_sources
+
+
+class LintBackend(Enum):
+    """Enum to represent the ways cpplint can be run."""
+    INPROCESS = "inprocess"
+    SUBPROCESS = "subprocess"
+
+
+class _RecordingNestingState(NestingState):
+    """NestingState that keeps a snapshot of the block stack after every line."""
+
+    def __init__(self):
+        super().__init__()
+        self.snapshots: dict[int, NestingSnapshot | None] = {}
+        self._tracker = NestingTracker()
+
+    def Update(self, filename, clean_lines, linenum, error):
+        super().Update(filename, clean_lines, linenum, error)
+        self.snapshots[linenum] = self._tracker.snapshot(self.stack)
+
+
+@contextmanager
+def _recording_nesting():
+    """Makes cpplint build _RecordingNestingState objects and collects them."""
+    states: list[_RecordingNestingState] = []
+
+    def factory() -> _RecordingNestingState:
+        state = _RecordingNestingState()
+        states.append(state)
+        return state
+
+    original = cpplint.NestingState
+    cpplint.NestingState = factory
+    try:
+        yield states
+    finally:
+        cpplint.NestingState = original
+
+
+@dataclass(frozen=True)
+class LintResult:
+    """Failures found in a single file, with the source cpplint already analyzed,
+    if it was asked for."""
+    testcase: CPPLTestcase
+    source: SourceFile | None
+
+
+def lint_file(root: Path, rel_path: Path, filters: str | None = None,
+              with_source: bool = True) -> LintResult | None:
+    """Lint a single file in this process, the way `cpplint` would from the root directory.
+
+    Returns None if the file is skipped by a CPPLINT.cfg or has no failures. See
+    lint_lines for `filters` and `with_source`.
+    """
+    data = (root / rel_path).read_bytes()
+    # cpplint sees the content decoded as it would read it; the source keeps the bytes
+    return lint_lines(root, rel_path, data.decode("utf-8", "replace").split("\n"), data=data,
+                      filters=filters, with_source=with_source)
+
+
+def lint_lines(root: Path, rel_path: Path, file_lines: list[str],
+               data: bytes | None = None, filters: str | None = None,
+               with_source: bool = True) -> LintResult | None:
+    """Lint the given content of a file in this process, without reading it from disk.
+
+    The lines are split on '\\n' only, as cpplint splits them; a trailing empty line
+    means the content ends with a newline. If the raw content the lines were
+    decoded from is given, the returned source is built from it, so it keeps its
+    line endings and any invalid UTF-8. `filters` are added to cpplint's filters,
+    as with its --filter option. Without `with_source`, the nesting of each line
+    is not recorded and the result has no source. Returns None if the file is
+    skipped by a CPPLINT.cfg or has no failures.
+    """
+    fpath = root / rel_path
+    filename = str(rel_path)
+    file_lines = list(file_lines)
+    last_quiet = cpplint._cpplint_state.SetQuiet(True)
+    cpplint._BackupFilters()
+    try:
+        if filters is not None:
+            # Before the CPPLINT.cfg filters, which apply on top, as on the command line
+            cpplint._AddFilters(filters)
+        if not cpplint.ProcessConfigOverrides(os.path.abspath(fpath)):
+            return None
+
+        # Remove trailing '\r', as cpplint does; the last line comes from split()
+        crlf_lines: list[int] = []
+        for i in range(len(file_lines) - 1):
+            if file_lines[i].endswith("\r"):
+                file_lines[i] = file_lines[i].rstrip("\r")
+                crlf_lines.append(i + 1)
+
+        failures: list[CPPLFailure] = []
+
+        def error(_: str, linenum: int, category: str, confidence: int, message: str) -> None:
+            if cpplint._ShouldPrintError(category, confidence, filename, linenum):
+                failures.append(CPPLFailure(lineno=linenum, message=message.strip(), code=category))
+
+        recording = _recording_nesting() if with_source else nullcontext([])
+        with recording as states:
+            cpplint.ProcessFileData(os.path.abspath(fpath), fpath.suffix[1:],
+                                    list(file_lines), error)
+        # Mixed line endings are flagged on the lines with a CR
+        if crlf_lines and len(crlf_lines) < len(file_lines) - 1:
+            for linenum in crlf_lines:
+                error(filename, linenum, "whitespace/newline", 1,
+                      "Unexpected \\r (^M) found; better to use only \\n")
+    finally:
+        cpplint._RestoreFilters()
+        cpplint._cpplint_state.SetQuiet(last_quiet)
+
+    if not failures:
+        return None
+    testcase = CPPLTestcase(fpath=rel_path, failures=failures)
+    if not with_source:
+        return LintResult(testcase=testcase, source=None)
+
+    # Line 0 is cpplint's leading marker, so source lines start at 1
+    snapshots = states[0].snapshots
+    block_info = [snapshots.get(i + 1) for i in range(len(file_lines))]
+    return LintResult(
+        testcase=testcase,
+        source=(SourceFile.from_lines(fpath, file_lines, block_info) if data is None
+                else SourceFile.from_bytes(fpath, data, block_info)),
+    )
+
+
+def lint_inprocess(input: Path) -> tuple[CPPLTestsuite, dict[Path, SourceFile]]:
+    """Run cpplint in this process on the given input.
+
+    Returns the parsed results, as run_cpplint would, along with the already
+    loaded SourceFile of every file with failures, keyed by relative path.
+    """
+    root, rel_paths = find_sources(input)
+    testcases: list[CPPLTestcase] = []
+    sources: dict[Path, SourceFile] = {}
+    for rel_path in rel_paths:
+        result = lint_file(root, rel_path)
+        if result is None:
+            continue
+        assert result.source is not None
+        testcases.append(result.testcase)
+        sources[rel_path] = result.source
+    return CPPLTestsuite(testcases=testcases), sources
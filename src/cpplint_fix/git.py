@@ -0,0 +1,61 @@
+import re
+import sys
+import subprocess as sp
+from pathlib import Path
+
+# Start and length of the new side of a hunk; the length defaults to 1
+_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(?P<start>\d+)(?:,(?P<count>\d+))? @@")
+
+# Line range covering a whole file, used for untracked files
+WHOLE_FILE = (1, sys.maxsize)
+
+
+class GitError(Exception):
+    pass
+
+
+def _git(root: Path, *args: str) -> str:
+    """Run a git command in the given directory and return its output."""
+    cmd = ["git", "-c", "core.quotepath=off", *args]
+    try:
+        proc = sp.run(cmd, cwd=root, capture_output=True, text=True)
+    except FileNotFoundError as e:
+        raise GitError("git is not installed") from e
+    if proc.returncode != 0:
+        raise GitError(f"'git {' '.join(args)}' failed: {proc.stderr.strip()}")
+    return proc.stdout
+
+
+def changed_lines(root: Path, since: str) -> dict[Path, list[tuple[int, int]]]:
+    """Returns the files under root that changed since the given ref, with their changed lines.
+
+    Changes in the working tree, staged or not, are included, and untracked files
+    count as changed in full. Paths are relative to root; each file maps to the
+    (first, last) ranges of lines added or modified since the ref, which is empty
+    for files where lines were only removed. Deleted files are left out.
+    """
+    diff = _git(root, "diff", "-U0", "--no-color", "--no-ext-diff", "--relative",
+                "--diff-filter=d", since, "--")
+    changes: dict[Path, list[tuple[int, int]]] = {}
+    ranges: list[tuple[int, int]] = []
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            ranges = changes.setdefault(Path(line[len("+++ b/"):]), [])
+            continue
+        hunk = _HUNK_RE.match(line)
+        if hunk is None:
+            continue
+        start = int(hunk.group("start"))
+        count = int(hunk.group("count") or 1)
+        if count > 0:
+            ranges.append((start, start + count - 1))
+
+    untracked = _git(root, "ls-files", "--others", "--exclude-standard")
+    for line in untracked.splitlines():
+        changes[Path(line)] = [WHOLE_FILE]
+    return changes
+
+
+def in_ranges(lineno: int, ranges: list[tuple[int, int]]) -> bool:
+    """Whether the line number falls into any of the ranges."""
+    return any(first <= lineno <= last for first, last in ranges)
@@ -1,5 +1,6 @@
 import re
 from pathlib import Path
+from typing import IO, Iterator
 from dataclasses import dataclass
 import xml.etree.ElementTree as XMLET
 
@@ -96,4 +97,92 @@ class CPPLTestsuite:
     def from_string(cls, xml_string: str) -> "CPPLTestsuite":
         """Creates a CPPLTestsuite from an XML string."""
         root = XMLET.fromstring(xml_string)
-        return cls.from_xml(root)
\ No newline at end of file
+        return cls.from_xml(root)
+
+    # Failure lines of cpplint's emacs and eclipse output formats, and of the vs7 one
+    _emacsre = re.compile(r"^(?P<path>.+?):(?P<lineno>\d+):\s+(?:warning:\s+)?"
+                          r"(?P<message>.*?)\s+\[(?P<code>[^\]\s]+)\] \[\d+\]$")
+    _vs7re = re.compile(r"^(?P<path>.+?)\((?P<lineno>\d+)\): error cpplint: "
+                        r"\[(?P<code>[^\]\s]+)\] (?P<message>.*?)\s*\[\d+\]$")
+
+    @classmethod
+    def from_text(cls, text: str) -> "CPPLTestsuite":
+        """Creates a CPPLTestsuite from cpplint's emacs, eclipse or vs7 text output.
+
+        Lines that are not failures, such as "Done processing", are ignored.
+        Testcases are in the order their files first appear.
+        """
+        failures: dict[Path, list[CPPLFailure]] = {}
+        for line in text.splitlines():
+            match = cls._emacsre.match(line) or cls._vs7re.match(line)
+            if match is None:
+                continue
+            failure = CPPLFailure(lineno=int(match.group("lineno")),
+                                  message=match.group("message").strip(),
+                                  code=match.group("code"))
+            failures.setdefault(Path(match.group("path")), []).append(failure)
+        return cls(testcases=[CPPLTestcase(fpath=fpath, failures=fails)
+                              for fpath, fails in failures.items()])
+
+    @classmethod
+    def from_report(cls, text: str) -> "CPPLTestsuite":
+        """Creates a CPPLTestsuite from a cpplint report, either JUnit XML or text.
+
+        Text around the XML document, such as cpplint's progress messages when both
+        its output streams were saved together, is ignored.
+        """
+        start = text.find("<testsuite")
+        if start < 0:
+            return cls.from_text(text)
+        end = text.find("</testsuite>", start)
+        end = len(text) if end < 0 else end + len("</testsuite>")
+        return cls.from_string(text[start:end])
+
+    @staticmethod
+    def iterparse(source: str | Path | IO[bytes]) -> Iterator[CPPLTestcase]:
+        """Yields the testcases of an XML file or stream one at a time, as they are parsed.
+
+        Each testcase element is discarded once it has been converted, so memory
+        use does not grow with the size of the document.
+        """
+        root: XMLET.Element | None = None
+        for event, elem in XMLET.iterparse(source, events=("start", "end")):
+            if root is None:
+                assert elem.tag == "testsuite", f"Expected 'testsuite' tag, got {elem.tag}"
+                root = elem
+            if event == "end" and elem.tag == "testcase":
+                yield CPPLTestcase.from_xml(elem)
+                root.clear()
+
+
+class CPPLTestcaseFeed:
+    """Parses testcases out of JUnit XML fed in chunks, as read from an asynchronous pipe.
+
+    Like CPPLTestsuite.iterparse, each testcase element is discarded once converted.
+    """
+
+    def __init__(self):
+        self._parser = XMLET.XMLPullParser(events=("start", "end"))
+        self._root: XMLET.Element | None = None
+
+    def _read(self) -> list[CPPLTestcase]:
+        testcases = []
+        for event, elem in self._parser.read_events():
+            if self._root is None:
+                assert elem.tag == "testsuite", f"Expected 'testsuite' tag, got {elem.tag}"
+                self._root = elem
+            if event == "end" and elem.tag == "testcase":
+                testcases.append(CPPLTestcase.from_xml(elem))
+                self._root.clear()
+        return testcases
+
+    def feed(self, data: bytes) -> list[CPPLTestcase]:
+        """Parse the next chunk, returning the testcases it completes."""
+        self._parser.feed(data)
+        return self._read()
+
+    def close(self) -> list[CPPLTestcase]:
+        """Finish parsing, returning the remaining testcases; raises ParseError if the
+        document is incomplete."""
+        self._parser.close()
+        return self._read()
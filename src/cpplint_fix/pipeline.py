@@ -0,0 +1,119 @@
+import asyncio
+from dataclasses import dataclass, replace
+from typing import AsyncIterable, Awaitable, Callable, Generic, Iterable, Sequence, TypeVar
+
+_T = TypeVar("_T")
+
+# Marks the end of a stage's input; one is queued for each of its workers
+_END = object()
+
+_LIMIT_NAMES = ("lint", "load", "fix", "write", "queue_size")
+
+
+@dataclass(frozen=True)
+class StageLimits:
+    """How many files each stage of the fix pipeline handles at once, and how many
+    may wait between two stages."""
+    # cpplint processes, or files linted in-process at once
+    lint: int = 1
+    load: int = 4
+    fix: int = 1
+    write: int = 4
+    # Files waiting for the next stage; a full queue holds back the stage before it
+    queue_size: int = 16
+
+    @staticmethod
+    def for_jobs(jobs: int) -> "StageLimits":
+        """Limits for `jobs` CPU workers, with room for a few files per worker between stages."""
+        return StageLimits(lint=jobs, fix=jobs, queue_size=max(16, 4 * jobs))
+
+    def __post_init__(self):
+        for name in _LIMIT_NAMES:
+            if getattr(self, name) < 1:
+                raise ValueError(f"Stage limit {name} must be at least 1")
+
+    def updated(self, spec: str) -> "StageLimits":
+        """Returns these limits with the ones given as "name=N,..." replaced, such as
+        "load=8,queue_size=64". Raises ValueError if the spec is invalid."""
+        values: dict[str, int] = {}
+        for item in filter(None, spec.split(",")):
+            name, sep, value = item.partition("=")
+            name = name.strip()
+            if not sep or name not in _LIMIT_NAMES:
+                raise ValueError(f"Invalid stage limit '{item}'; expected one of "
+                                 f"{', '.join(_LIMIT_NAMES)} as name=N")
+            values[name] = int(value)
+        return replace(self, **values)
+
+
+@dataclass(frozen=True)
+class Stage(Generic[_T]):
+    """A step of a pipeline, run on up to `limit` items at once.
+
+    `run` returns whether the item goes on to the next stage; False means the
+    pipeline is done with it.
+    """
+    name: str
+    run: Callable[[_T], Awaitable[bool]]
+    limit: int
+
+
+async def run_pipeline(source: Iterable[_T] | AsyncIterable[_T], stages: Sequence[Stage[_T]],
+                       queue_size: int, on_done: Callable[[_T], None]) -> None:
+    """Pass the items of the source through the stages, calling `on_done` with each
+    item once the pipeline is done with it.
+
+    Stages are linked by queues of at most `queue_size` items, so a slow stage
+    holds back the ones before it, down to the source, instead of letting items
+    pile up in memory. If a stage raises, the others are cancelled and the error
+    is raised here.
+    """
+    queues: list[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    async def end(index: int) -> None:
+        for _ in range(stages[index].limit):
+            await queues[index].put(_END)
+
+    async def feed() -> None:
+        try:
+            if isinstance(source, AsyncIterable):
+                async for item in source:
+                    await queues[0].put(item)
+            else:
+                for item in source:
+                    await queues[0].put(item)
+        finally:
+            # Stops the work behind an asynchronous source when the pipeline fails
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        await end(0)
+
+    # Workers left in each stage; the last one to finish ends the input of the next stage
+    remaining = [stage.limit for stage in stages]
+
+    async def worker(index: int) -> None:
+        stage, queue = stages[index], queues[index]
+        while True:
+            item = await queue.get()
+            if item is _END:
+                break
+            if not await stage.run(item) or index + 1 == len(stages):
+                on_done(item)
+            else:
+                await queues[index + 1].put(item)
+        remaining[index] -= 1
+        if remaining[index] == 0 and index + 1 < len(stages):
+            await end(index + 1)
+
+    tasks = [asyncio.ensure_future(feed()),
+             *(asyncio.ensure_future(worker(index))
+               for index, stage in enumerate(stages) for _ in range(stage.limit))]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in done:
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,149 @@
+import os
+import json
+import hashlib
+from pathlib import Path
+from collections import Counter
+from dataclasses import dataclass, field
+from cpplint_fix.config import CPPLFixConfig
+from cpplint_fix.edits import Edits
+from cpplint_fix.parser import CPPLFailure, CPPLTestcase, CPPLTestsuite
+
+PLAN_VERSION = 1
+
+
+def is_fixable(failure: CPPLFailure, config: CPPLFixConfig) -> bool:
+    """Whether an edit would be attempted for the failure."""
+    return failure.code not in config.exclude_rules and Edits.get(failure.code) is not None
+
+
+def lint_filter(config: CPPLFixConfig) -> str:
+    """Returns a cpplint --filter value that only reports the failures that would be fixed.
+
+    CPPLINT.cfg filters still apply on top of it.
+    """
+    codes = sorted(set(Edits.codes()) - set(config.exclude_rules))
+    return ",".join(["-", *(f"+{code}" for code in codes)])
+
+
+def file_digest(fpath: Path) -> str:
+    """Returns the SHA-256 of the file's content."""
+    return hashlib.sha256(fpath.read_bytes()).hexdigest()
+
+
+@dataclass(frozen=True)
+class FilePlan:
+    """The failures to fix in a single file, with the digest of its planned content."""
+    fpath: Path
+    failures: list[CPPLFailure]
+    sha256: str | None = None
+
+    @property
+    def testcase(self) -> CPPLTestcase:
+        return CPPLTestcase(fpath=self.fpath, failures=self.failures)
+
+
+@dataclass(frozen=True)
+class FixPlan:
+    """Which files need loading and which edits will run, decided from lint results only.
+
+    File paths are relative to the root directory the files were linted from.
+    `skipped` counts, per error code, the failures that will not be fixed
+    because the code has no edit or is excluded.
+    """
+    files: list[FilePlan] = field(default_factory=list)
+    skipped: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_testcases(cls, testcases: list[CPPLTestcase], config: CPPLFixConfig,
+                       root: Path | None = None) -> "FixPlan":
+        """Plan the fixes for the testcases.
+
+        Files are expected to be filtered by the config's exclude_files already.
+        If a root is given, the digest of each planned file is recorded, so that
+        files changed since can be detected when the plan is executed.
+        """
+        files: list[FilePlan] = []
+        skipped: Counter[str] = Counter()
+        for testcase in testcases:
+            fixable = []
+            for failure in testcase.failures:
+                if is_fixable(failure, config):
+                    fixable.append(failure)
+                else:
+                    skipped[failure.code] += 1
+            if fixable:
+                digest = file_digest(root / testcase.fpath) if root is not None else None
+                files.append(FilePlan(fpath=testcase.fpath, failures=fixable, sha256=digest))
+        return cls(files=files, skipped=dict(sorted(skipped.items())))
+
+    @classmethod
+    def from_testsuite(cls, testsuite: CPPLTestsuite, config: CPPLFixConfig,
+                       root: Path | None = None) -> "FixPlan":
+        return cls.from_testcases(testsuite.testcases, config, root)
+
+    @property
+    def edits(self) -> int:
+        """Returns the number of edits the plan will attempt."""
+        return sum(len(f.failures) for f in self.files)
+
+    def to_json(self) -> str:
+        data = {
+            "version": PLAN_VERSION,
+            "files": [
+                {
+                    "path": f.fpath.as_posix(),
+                    "sha256": f.sha256,
+                    "failures": [[x.lineno, x.message, x.code] for x in f.failures],
+                }
+                for f in self.files
+            ],
+            "skipped": self.skipped,
+        }
+        return json.dumps(data, indent=2)
+
+    def validate(self) -> None:
+        """Raise ValueError unless every planned file is a relative path that stays
+        under the root directory and has a digest.
+
+        Executing the plan then only edits files under the root, and only if they
+        did not change since the plan was made.
+        """
+        for f in self.files:
+            normalized = Path(os.path.normpath(f.fpath))
+            if f.fpath.is_absolute() or normalized.parts[:1] in ((os.pardir,), (os.curdir,)):
+                raise ValueError(f"Planned path {f.fpath} is not a file under the root directory")
+            if not f.sha256:
+                raise ValueError(f"Planned file {f.fpath} has no sha256 digest")
+
+    @classmethod
+    def from_json(cls, text: str) -> "FixPlan":
+        """Parse a saved plan; raises ValueError if it is invalid, see validate."""
+        data = json.loads(text)
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported fix plan version: {data.get('version')}")
+        files = [
+            FilePlan(
+                fpath=Path(f["path"]),
+                failures=[CPPLFailure(lineno=lineno, message=message, code=code)
+                          for lineno, message, code in f["failures"]],
+                sha256=f.get("sha256"),
+            )
+            for f in data["files"]
+        ]
+        plan = cls(files=files, skipped=data.get("skipped", {}))
+        plan.validate()
+        return plan
+
+    def save(self, path: Path) -> None:
+        path.write_text(self.to_json() + "\n", encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "FixPlan":
+        return cls.from_json(path.read_text(encoding="utf-8"))
+
+    def __str__(self) -> str:
+        summary = f"Planned {self.edits} edits in {len(self.files)} files"
+        if self.skipped:
+            skipped = ", ".join(f"{code}: {n}" for code, n in self.skipped.items())
+            summary += f"; skipping {sum(self.skipped.values())} failures ({skipped})"
+        return summary
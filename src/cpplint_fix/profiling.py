@@ -0,0 +1,165 @@
+import os
+import time
+from pathlib import Path
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Iterator
+
+# Number of files listed in the text report, slowest first
+_SLOWEST_FILES = 10
+
+
+@dataclass
+class PhaseTime:
+    """Accumulated wall and CPU time of a phase, in seconds."""
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+
+    def add(self, other: "PhaseTime") -> None:
+        self.wall += other.wall
+        self.cpu += other.cpu
+        self.calls += other.calls
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"wall": self.wall, "cpu": self.cpu, "calls": self.calls}
+
+
+def _record(phases: dict[str, PhaseTime], name: str, clock: Callable[[], float]) -> Iterator[None]:
+    wall, cpu = time.perf_counter(), clock()
+    try:
+        yield
+    finally:
+        phase = phases.setdefault(name, PhaseTime())
+        phase.wall += time.perf_counter() - wall
+        phase.cpu += clock() - cpu
+        phase.calls += 1
+
+
+@dataclass
+class FileProfile:
+    """Timings and edit counts of a single file, recorded by the worker that fixed it.
+
+    CPU time is that of the worker's thread, so it stays accurate when cpplint
+    runs in other threads of the same process.
+    """
+    phases: dict[str, PhaseTime] = field(default_factory=dict)
+    applied: Counter[str] = field(default_factory=Counter)
+    failed: Counter[str] = field(default_factory=Counter)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the body of the with statement as part of the named phase."""
+        yield from _record(self.phases, name, time.thread_time)
+
+    @property
+    def wall(self) -> float:
+        return sum(p.wall for p in self.phases.values())
+
+    @property
+    def cpu(self) -> float:
+        return sum(p.cpu for p in self.phases.values())
+
+
+@dataclass
+class RunProfile:
+    """Timings of a whole fix_files run, with the profiles of the files it fixed."""
+    phases: dict[str, PhaseTime] = field(default_factory=dict)
+    files: dict[Path, FileProfile] = field(default_factory=dict)
+    lines: dict[Path, int] = field(default_factory=dict)
+    # CPU time of worker processes and cpplint subprocesses
+    children_cpu: float = 0.0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the body of the with statement as a phase of the whole run.
+
+        CPU time covers all threads of this process; child processes are counted
+        separately, when they finish.
+        """
+        children = os.times()
+        try:
+            yield from _record(self.phases, name, time.process_time)
+        finally:
+            after = os.times()
+            self.children_cpu += (after.children_user - children.children_user
+                                  + after.children_system - children.children_system)
+
+    @property
+    def wall(self) -> float:
+        return sum(p.wall for p in self.phases.values())
+
+    @property
+    def total_lines(self) -> int:
+        return sum(self.lines.values())
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.total_lines / self.wall if self.wall > 0 else 0.0
+
+    def file_phases(self) -> dict[str, PhaseTime]:
+        """Returns the time of each per-file phase, summed over all files."""
+        totals: dict[str, PhaseTime] = {}
+        for file_profile in self.files.values():
+            for name, phase in file_profile.phases.items():
+                totals.setdefault(name, PhaseTime()).add(phase)
+        return totals
+
+    def edits(self) -> dict[str, tuple[int, int]]:
+        """Returns the number of edits applied and failed for each error code."""
+        applied: Counter[str] = Counter()
+        failed: Counter[str] = Counter()
+        for file_profile in self.files.values():
+            applied.update(file_profile.applied)
+            failed.update(file_profile.failed)
+        return {code: (applied[code], failed[code]) for code in sorted(applied.keys() | failed.keys())}
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "wall": self.wall,
+            "children_cpu": self.children_cpu,
+            "lines": self.total_lines,
+            "lines_per_second": self.lines_per_second,
+            "phases": {name: phase.to_dict() for name, phase in self.phases.items()},
+            "file_phases": {name: phase.to_dict() for name, phase in self.file_phases().items()},
+            "edits": {code: {"applied": applied, "failed": failed}
+                      for code, (applied, failed) in self.edits().items()},
+            "files": {
+                str(fpath): {
+                    "lines": self.lines.get(fpath, 0),
+                    "wall": file_profile.wall,
+                    "cpu": file_profile.cpu,
+                    "phases": {name: phase.to_dict() for name, phase in file_profile.phases.items()},
+                }
+                for fpath, file_profile in self.files.items()
+            },
+        }
+
+    def __str__(self) -> str:
+        cpu = sum(p.cpu for p in self.phases.values())
+        report = [
+            f"Profile: {len(self.lines)} files, {self.total_lines} lines in {self.wall:.3f}s "
+            f"({self.lines_per_second:.0f} lines/s), CPU {cpu:.3f}s "
+            f"+ {self.children_cpu:.3f}s in child processes",
+            "Run phases (wall / CPU):",
+        ]
+        report += [f"  {name:12s} {p.wall:9.3f}s / {p.cpu:9.3f}s" for name, p in self.phases.items()]
+        report.append("File phases, summed over files (wall / CPU):")
+        report += [f"  {name:12s} {p.wall:9.3f}s / {p.cpu:9.3f}s"
+                   for name, p in self.file_phases().items()]
+        edits = self.edits()
+        if edits:
+            report.append("Edits by code (applied / failed):")
+            report += [f"  {code:32s} {applied:6d} / {failed:6d}"
+                       for code, (applied, failed) in edits.items()]
+        slowest = sorted(self.files.items(), key=lambda item: item[1].wall, reverse=True)
+        if slowest:
+            report.append("Slowest files (wall):")
+            report += [f"  {fp.wall:9.3f}s  {fpath}" for fpath, fp in slowest[:_SLOWEST_FILES]]
+        return "\n".join(report)
+
+
+def timed(profile: FileProfile | RunProfile | None, name: str) -> ContextManager[None]:
+    """Time a phase if profiling is on; does nothing, at almost no cost, otherwise."""
+    return profile.phase(name) if profile is not None else nullcontext()
@@ -0,0 +1,76 @@
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field
+from cpplint_fix.profiling import FileProfile, RunProfile
+
+
+@dataclass
+class FileFixResult:
+    """Outcome of fixing a single file.
+
+    Log messages are buffered here rather than emitted directly, so that results
+    computed in worker processes can be reported in a deterministic order.
+    """
+    fpath: Path
+    failures: int = 0
+    edits_applied: int = 0
+    edits_failed: int = 0
+    written: bool = False
+    # With an output directory, where the fixed file was written or found up to date
+    dest: Path | None = None
+    # Whether the lint results came from the cache; None if it was not consulted
+    cached: bool | None = None
+    # Set when the run is profiled
+    profile: FileProfile | None = field(default=None, repr=False)
+    # Unified diff of the fixes, when computed instead of writing them
+    diff: str | None = field(default=None, repr=False)
+    logs: list[tuple[int, str]] = field(default_factory=list, repr=False)
+
+    def log(self, level: int, message: str) -> None:
+        """Buffer a log message for this file."""
+        self.logs.append((level, message))
+
+    def replay_logs(self, logger: logging.Logger) -> None:
+        """Emit all buffered log messages to the given logger."""
+        for level, message in self.logs:
+            logger.log(level, message)
+
+
+@dataclass(frozen=True)
+class FixSummary:
+    """Combined totals of a fix_files run."""
+    results: list[FileFixResult] = field(default_factory=list)
+    cache_hits: int = 0
+    cache_misses: int = 0
+    profile: RunProfile | None = None
+
+    @property
+    def files(self) -> int:
+        """Returns the number of files with failures that were processed."""
+        return len(self.results)
+
+    @property
+    def failures(self) -> int:
+        return sum(r.failures for r in self.results)
+
+    @property
+    def edits_applied(self) -> int:
+        return sum(r.edits_applied for r in self.results)
+
+    @property
+    def edits_failed(self) -> int:
+        return sum(r.edits_failed for r in self.results)
+
+    @property
+    def files_written(self) -> int:
+        return sum(r.written for r in self.results)
+
+    def __str__(self) -> str:
+        summary = (
+            f"Processed {self.files} files with {self.failures} failures: "
+            f"{self.edits_applied} edits applied, {self.edits_failed} failed, "
+            f"{self.files_written} files written"
+        )
+        if self.cache_hits or self.cache_misses:
+            summary += f" (lint cache: {self.cache_hits} hits, {self.cache_misses} misses)"
+        return summary
@@ -1,10 +1,20 @@
 import os
+import re
+import mmap
 from enum import Enum
-from copy import deepcopy
 from pathlib import Path
-from tempfile import NamedTemporaryFile
+from array import array
+from bisect import bisect_right
+from typing import Iterator
 from dataclasses import dataclass, field
 from cpplint import CleansedLines, NestingState, _BlockInfo, _ClassInfo, _NamespaceInfo
+from cpplint_fix.writing import write_if_changed
+
+# Files at least this large are mapped into memory instead of read
+MMAP_THRESHOLD = 1 << 20
+# Invalid UTF-8 decodes to lone surrogates, which encode back to the same bytes
+_ERRORS = "surrogateescape"
+_NEWLINE = re.compile(b"\n")
 
 class NestingType(Enum):
     """Enum to represent different types of nesting."""
@@ -21,11 +31,74 @@ class NestingType(Enum):
         return NestingType.BLOCK
 
 
+@dataclass(frozen=True)
+class NestingSnapshot:
+    """Immutable view of the innermost block around a line, linked to its enclosing blocks.
+
+    Snapshots form a persistent stack: all lines of a block share one snapshot,
+    and a new one is only created when a block opens.
+    """
+    nesting_type: NestingType
+    start_line: int
+    class_indent: int = 0
+    parent: "NestingSnapshot | None" = field(default=None, repr=False)
+    depth: int = field(init=False, repr=False)
+    total_class_indent: int = field(init=False, repr=False)
+
+    def __post_init__(self):
+        parent_depth = self.parent.depth if self.parent is not None else 0
+        parent_indent = self.parent.total_class_indent if self.parent is not None else 0
+        object.__setattr__(self, "depth", parent_depth + 1)
+        object.__setattr__(self, "total_class_indent", parent_indent + self.class_indent)
+
+    @classmethod
+    def from_block(cls, block: _BlockInfo, parent: "NestingSnapshot | None") -> "NestingSnapshot":
+        """Creates a snapshot of a cpplint block, nested in the given parent."""
+        nesting_type = NestingType.from_object(block)
+        class_indent = block.class_indent if isinstance(block, _ClassInfo) else 0
+        return cls(nesting_type=nesting_type, start_line=block.starting_linenum,
+                   class_indent=class_indent, parent=parent)
+
+    def blocks(self) -> list["NestingSnapshot"]:
+        """Returns the snapshots of all enclosing blocks, outermost first."""
+        chain: list[NestingSnapshot] = []
+        node: NestingSnapshot | None = self
+        while node is not None:
+            chain.append(node)
+            node = node.parent
+        return chain[::-1]
+
+
+class NestingTracker:
+    """Turns successive states of cpplint's block stack into shared NestingSnapshots."""
+
+    def __init__(self):
+        self._blocks: list[_BlockInfo] = []
+        self._nodes: list[NestingSnapshot] = []
+
+    def snapshot(self, stack: list[_BlockInfo]) -> NestingSnapshot | None:
+        """Returns the snapshot for the current stack, reusing it if no block opened or closed."""
+        # Blocks are never pushed twice, so an unchanged top means an unchanged stack
+        if len(stack) != len(self._blocks) or (stack and stack[-1] is not self._blocks[-1]):
+            common = 0
+            for block, known in zip(stack, self._blocks):
+                if block is not known:
+                    break
+                common += 1
+            del self._blocks[common:]
+            del self._nodes[common:]
+            for block in stack[common:]:
+                parent = self._nodes[-1] if self._nodes else None
+                self._nodes.append(NestingSnapshot.from_block(block, parent))
+                self._blocks.append(block)
+        return self._nodes[-1] if self._nodes else None
+
+
 @dataclass(frozen=True)
 class SourceLine:
     number: int
     line: str
-    block_info: tuple[_BlockInfo, ...] = field(default_factory=tuple)
+    block_info: NestingSnapshot | None = None
     insert_before: list[str] = field(default_factory=list)
     insert_after: list[str] = field(default_factory=list)
     edits: list[str|None] = field(default_factory=list)
@@ -60,110 +133,341 @@ class SourceLine:
         return self.edits[-1]
     
     @property
-    def last_block(self) -> _BlockInfo | None:
-        if len(self.block_info) == 0:
-            return None
-        return self.block_info[-1]
+    def last_block(self) -> NestingSnapshot | None:
+        return self.block_info
     
     @property
     def nesting_level(self) -> int:
-        return len(self.block_info)
+        if self.block_info is None:
+            return 0
+        return self.block_info.depth
     
     @property
     def nesting_types(self) -> list[NestingType]:
-        return [NestingType.from_object(info) for info in self.block_info]
+        if self.block_info is None:
+            return []
+        return [block.nesting_type for block in self.block_info.blocks()]
     
     @property
     def total_class_indent(self) -> int:
-        return sum(info.class_indent for info in self.block_info if isinstance(info, _ClassInfo))
+        if self.block_info is None:
+            return 0
+        return self.block_info.total_class_indent
 
     def __repr__(self) -> str:
         return f"{self.number}: {self.line} (+{len(self.insert_before)} before, {len(self.insert_after)} after)"
 
 
-@dataclass(frozen=True)
+class _LazyNesting:
+    """Runs cpplint's NestingState over a file on demand, only as far as needed."""
+
+    def __init__(self, source_file: "SourceFile"):
+        self._source_file = source_file
+        self._cleansed_lines: CleansedLines | None = None
+        self._nesting_state = NestingState()
+        self._tracker = NestingTracker()
+
+    def advance(self, line_number: int) -> None:
+        """Record the block info of all lines up to the given one."""
+        src = self._source_file
+        line_number = min(line_number, len(src))
+        if line_number <= src._nested_upto:
+            return
+        if self._cleansed_lines is None:
+            # CleansedLines requires the placeholder to be 1-indexed; it is built for
+            # the whole file, as cpplint looks ahead for the end of classes
+            raw_lines = [src._line_text(i) for i in range(1, len(src) + 1)]
+            self._cleansed_lines = CleansedLines(["// Placeholder"] + raw_lines)
+        for i in range(src._nested_upto + 1, line_number + 1):
+            self._nesting_state.Update(src.path.name, self._cleansed_lines, i, lambda *args: None)
+            src._record_block(i, self._tracker.snapshot(self._nesting_state.stack))
+
+
 class SourceFile:
-    """Represents a source file with its lines."""
+    """Represents a source file with its lines.
+
+    The original content is kept as raw bytes, with an array of line offsets,
+    and lines are only decoded when accessed. Lines are split on '\\n' as
+    cpplint splits them, and a '\\r' before it is part of the line ending, not
+    of the text. SourceLine objects are only stored for lines that have edits;
+    for the others they are created on access. When written, runs of unedited
+    lines are copied as they are, with their own line endings, and only edited
+    lines are encoded. The block info of lines loaded from a file is only
+    computed when requested through analyze_nesting.
+    """
+
+    def __init__(self, path: Path, lines: list[SourceLine]):
+        self.path = path
+        self._init_buffer("\n".join(line.line for line in lines).encode("utf-8", _ERRORS),
+                          empty=not lines)
+        self._overlay: dict[int, SourceLine] = {}
+        for line in lines:
+            self._record_block(line.number, line.block_info)
+            if line.insert_before or line.insert_after or line.edits:
+                self._overlay[line.number] = line
+
+    def _init_buffer(self, data: bytes | mmap.mmap, empty: bool = False) -> None:
+        self._data = data
+        # Line n spans from _offsets[n-1] to the newline at _offsets[n] - 1; the
+        # last line has no newline, so its end is one past the end of the data
+        self._offsets = array("q", [0])
+        if not empty:
+            self._offsets.extend(match.end() for match in _NEWLINE.finditer(data))
+            self._offsets.append(len(data) + 1)
+        # Line ending of inserted lines that follow the last line, which has none
+        first = self._offsets[1] if len(self._offsets) > 2 else 0
+        self._newline = b"\r\n" if first > 1 and data[first - 2] == 13 else b"\n"
+        # Block info is stored as the lines at which the innermost block changes
+        self._block_lines = array("q")
+        self._block_snapshots: list[NestingSnapshot | None] = []
+        self._nested_upto = 0
+        self._nesting: _LazyNesting | None = None
+
+    def _line_end(self, line_number: int) -> int:
+        """Returns the offset of the line ending of the line, or of the end of the data."""
+        end = self._offsets[line_number] - 1
+        if line_number < len(self) and end > self._offsets[line_number - 1] \
+                and self._data[end - 1] == 13:
+            return end - 1
+        return end
+
+    def _line_text(self, line_number: int) -> str:
+        return str(self._data[self._offsets[line_number - 1]:self._line_end(line_number)],
+                   "utf-8", _ERRORS)
+
+    def _line_ending(self, line_number: int) -> bytes:
+        return self._data[self._line_end(line_number):self._offsets[line_number]]
+
+    def _record_block(self, line_number: int, block_info: NestingSnapshot | None) -> None:
+        """Record the block info of the next line; lines must be recorded in order."""
+        if not self._block_snapshots or self._block_snapshots[-1] is not block_info:
+            self._block_lines.append(line_number)
+            self._block_snapshots.append(block_info)
+        self._nested_upto = line_number
+
+    def _block_at(self, line_number: int) -> NestingSnapshot | None:
+        if line_number > self._nested_upto:
+            return None
+        i = bisect_right(self._block_lines, line_number) - 1
+        return self._block_snapshots[i] if i >= 0 else None
+
+    def analyze_nesting(self, up_to: int | None = None) -> None:
+        """Compute the block info of the lines up to the given number (default: all)."""
+        if self._nesting is not None:
+            self._nesting.advance(len(self) if up_to is None else up_to)
+
+    @property
+    def lines(self) -> list[SourceLine]:
+        """Returns all the lines of the file; prefer indexing for single lines."""
+        return list(self)
 
-    path: Path
-    lines: list[SourceLine] = field(repr=False)
-        
     def _valid_line_number(self, line_number: int) -> None:
         """Check if the line number is valid."""
-        if line_number < 1 or line_number > len(self.lines):
+        if line_number < 1 or line_number > len(self):
             raise IndexError("Line number out of range")
 
+    def _edited_line(self, line_number: int) -> SourceLine:
+        """Returns the stored line to record edits on, creating it if needed."""
+        self._valid_line_number(line_number)
+        line = self._overlay.get(line_number)
+        if line is None:
+            line = SourceLine(number=line_number, line=self._line_text(line_number))
+            self._overlay[line_number] = line
+        return line
+
     def insert_before(self, line_number: int, text: str):
         """Insert a line before the specified line number."""
-        self._valid_line_number(line_number)
-        self.lines[line_number - 1].insert_before.append(text)
+        self._edited_line(line_number).insert_before.append(text)
 
     def insert_after(self, line_number: int, text: str):
         """Insert a line after the specified line number."""
-        self._valid_line_number(line_number)
-        self.lines[line_number - 1].insert_after.append(text)
+        self._edited_line(line_number).insert_after.append(text)
         
     def edit_line(self, line_number: int, text: str):
         """Edit the line at the specified line number."""
-        self._valid_line_number(line_number)
         # Store the edit in the edits list
-        self.lines[line_number - 1].edits.append(text)
+        self._edited_line(line_number).edits.append(text)
         
     def delete_line(self, line_number: int):
         """Mark the line at the specified line number for deletion."""
-        self._valid_line_number(line_number)
         # Set the final line to None to indicate deletion
-        self.lines[line_number - 1].edits.append(None)
+        self._edited_line(line_number).edits.append(None)
+
+    def line_text(self, line_number: int) -> str | None:
+        """Returns the text of the line after its edits so far, or None if deleted."""
+        line = self._overlay.get(line_number)
+        if line is None:
+            self._valid_line_number(line_number)
+            return self._line_text(line_number)
+        return line.final_line
+
+    def edited_ranges(self, line_ranges: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Returns the given (first, last) ranges of lines as numbered after the edits.
+
+        Lines inserted next to a line of a range are part of it; ranges whose lines
+        are all deleted are dropped.
+        """
+        # Edited lines, and how many lines all the edited lines before them add
+        edited = sorted(self._overlay)
+        shifts = [0]
+        for line_number in edited:
+            shifts.append(shifts[-1] + len(self._overlay[line_number].edited_lines) - 1)
+
+        def span(line_number: int) -> tuple[int, int]:
+            index = bisect_right(edited, line_number)
+            if index and edited[index - 1] == line_number:
+                start = line_number + shifts[index - 1]
+                return start, start + len(self._overlay[line_number].edited_lines) - 1
+            start = line_number + shifts[index]
+            return start, start
+
+        ranges = []
+        for first, last in line_ranges:
+            start, end = span(first)[0], span(last)[1]
+            if start <= end:
+                ranges.append((start, end))
+        return ranges
 
     def __getitem__(self, index: int) -> SourceLine:
         """Get a specific line by its index (1-based)."""
         self._valid_line_number(index)
-        return self.lines[index - 1]
+        block_info = self._block_at(index)
+        line = self._overlay.get(index)
+        if line is None:
+            return SourceLine(number=index, line=self._line_text(index), block_info=block_info)
+        # The nesting may have been analyzed after the line was edited
+        object.__setattr__(line, "block_info", block_info)
+        return line
 
     def __len__(self) -> int:
         """Returns the number of lines in the source file."""
-        return len(self.lines)
+        return len(self._offsets) - 1
     
-    def __iter__(self):
-        return iter(self.lines)
+    def __iter__(self) -> Iterator[SourceLine]:
+        return (self[i] for i in range(1, len(self) + 1))
 
     def __repr__(self) -> str:
-        return f"SourceFile(path={self.path}, lines_count={len(self.lines)})"
+        return f"SourceFile(path={self.path}, lines_count={len(self)})"
     
-    def to_file(self, file_path: Path) -> None:
-        """Writes the source file to the specified path."""
-        all_lines = sum([line.edited_lines for line in self.lines], [])
-        with file_path.open("w", encoding="utf-8") as f:
-            f.write("\n".join(all_lines))
-        
-    def apply_edits(self) -> None:
-        """Applies all edits to the source file."""
-        # First, create a temporary file with all edits applied
-        temp_file = NamedTemporaryFile(delete=False, mode='w', encoding='utf-8')
-        self.to_file(Path(temp_file.name))
-        # Now, replace the original file with the temporary file
-        temp_file.close()
-        os.replace(temp_file.name, self.path)
+    def iter_lines(self) -> Iterator[str]:
+        """Yields the lines of the file after all edits, without line endings."""
+        for i in range(1, len(self) + 1):
+            line = self._overlay.get(i)
+            if line is None:
+                yield self._line_text(i)
+            else:
+                yield from line.edited_lines
+
+    def _iter_pieces(self) -> Iterator[tuple[bytes, bytes]]:
+        """Yields the edited content as pieces of one or more whole lines, in order,
+        each with the line ending that follows it.
+
+        Runs of unedited lines are sliced from the buffer in one piece. Edited
+        lines keep the line ending of the line they replace or are inserted next to.
+        """
+        data, offsets = self._data, self._offsets
+        next_line = 1
+        for i in sorted(self._overlay):
+            if i > next_line:
+                end = self._line_end(i - 1)
+                yield data[offsets[next_line - 1]:end], data[end:offsets[i - 1]]
+            edited_lines = self._overlay[i].edited_lines
+            if edited_lines:
+                ending = self._line_ending(i)
+                yield (ending or self._newline).join(
+                    line.encode("utf-8", _ERRORS) for line in edited_lines), ending
+            next_line = i + 1
+        if next_line <= len(self):
+            yield data[offsets[next_line - 1]:], b""
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        """Yields the edited content in pieces, with the line ending of each piece
+        before the next one; the last piece has none, as the last line."""
+        ending: bytes | None = None
+        for piece, next_ending in self._iter_pieces():
+            if ending is not None:
+                yield ending
+            yield piece
+            ending = next_ending
+
+    def to_text(self) -> str:
+        """Returns the edited source as a single string."""
+        return str(self.to_bytes(), "utf-8", _ERRORS)
+
+    def to_bytes(self) -> bytes:
+        """Returns the edited source, with unedited bytes as they were loaded."""
+        return b"".join(self._iter_chunks())
+
+    def to_file(self, file_path: Path, fsync: bool = False) -> bool:
+        """Writes the source file to the specified path, unless the file already has
+        this content. Returns whether it was written.
+
+        The content is compared and then streamed out piece by piece, without
+        joining it; the file is replaced at once through a temporary file next to
+        it, which also leaves a mapped original intact.
+        """
+        return write_if_changed(file_path, self._iter_chunks, fsync=fsync)
+
+    def apply_edits(self, fsync: bool = False) -> bool:
+        """Applies all edits to the source file; returns whether its content changed."""
+        return self.to_file(self.path, fsync=fsync)
 
     @classmethod
-    def from_file(cls, file_path: Path) -> "SourceFile":
-        """Creates a SourceFile from a given file path."""
+    def from_lines(cls, file_path: Path, file_lines: list[str],
+                   block_info: list[NestingSnapshot | None] | None = None) -> "SourceFile":
+        """Creates a SourceFile from lines that were already read and split.
+
+        If block_info is given, it must hold one nesting snapshot per line (as
+        built by the in-process cpplint engine); otherwise it is computed lazily.
+        """
+        if block_info is not None and len(block_info) != len(file_lines):
+            raise ValueError(
+                f"Expected {len(file_lines)} nesting snapshots, got {len(block_info)}"
+            )
+        source_file = cls(path=file_path, lines=[])
+        source_file._init_buffer("\n".join(file_lines).encode("utf-8", _ERRORS),
+                                 empty=not file_lines)
+        source_file._init_nesting(block_info)
+        return source_file
+
+    @classmethod
+    def from_bytes(cls, file_path: Path, data: bytes | mmap.mmap,
+                   block_info: list[NestingSnapshot | None] | None = None) -> "SourceFile":
+        """Creates a SourceFile from the raw content of a file, kept as it is.
+
+        Invalid UTF-8 is decoded to lone surrogates, so it is written back unchanged.
+        If block_info is given, it must hold one nesting snapshot per line.
+        """
+        source_file = cls(path=file_path, lines=[])
+        source_file._init_buffer(data)
+        if block_info is not None and len(block_info) != len(source_file):
+            raise ValueError(
+                f"Expected {len(source_file)} nesting snapshots, got {len(block_info)}"
+            )
+        source_file._init_nesting(block_info)
+        return source_file
+
+    def _init_nesting(self, block_info: list[NestingSnapshot | None] | None) -> None:
+        if block_info is None:
+            self._nesting = _LazyNesting(self)
+        else:
+            for i, info in enumerate(block_info):
+                self._record_block(i + 1, info)
+
+    @classmethod
+    def from_file(cls, file_path: Path, mmap_threshold: int | None = MMAP_THRESHOLD) -> "SourceFile":
+        """Creates a SourceFile from a given file path.
+
+        Files of at least `mmap_threshold` bytes are mapped into memory rather than
+        read, unless it is None. If the file ends with a newline, its last line is empty.
+        """
         if not file_path.exists():
             raise FileNotFoundError(f"File {file_path} does not exist")
 
-        file_text = file_path.read_text(encoding="utf-8")
-        file_lines = file_text.splitlines()
-        # If the file ends with a newline, it will be treated as an empty line
-        if file_text.endswith("\n"):
-            file_lines.append("")
-
-        # CleansedLines requires the placeholder to be 1-indexed
-        cleansed_lines = CleansedLines(["// Placeholder"] + file_lines)
-        nesting_state = NestingState()
-        lines: list[SourceLine] = []
-        for i, line in enumerate(file_lines):
-            nesting_state.Update(file_path.name, cleansed_lines, i+1, lambda *args: None)
-            block_info_tuple = tuple(deepcopy(nesting_state.stack))
-            lines.append(SourceLine(number=i+1, line=line, block_info=block_info_tuple))
-
-        return cls(path=file_path, lines=lines)
+        with file_path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if mmap_threshold is not None and size >= max(mmap_threshold, 1):
+                data: bytes | mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                data = f.read()
+        return cls.from_bytes(file_path, data)
@@ -1,83 +1,957 @@
+import os
 from pathlib import Path
 import subprocess as sp
+import asyncio
+import hashlib
 import logging
-from cpplint_fix.parser import CPPLTestsuite
+import difflib
+from collections import deque
+from typing import AsyncIterator, Iterable, TextIO
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from cpplint_fix.parser import CPPLFailure, CPPLTestcase, CPPLTestcaseFeed, CPPLTestsuite
 from cpplint_fix.source import SourceFile
-from cpplint_fix.edits import Edits, FailedEditError
+from cpplint_fix.edits import (EditConflict, EditDuplicate, Edits, EditPlan, FailedEditError,
+                               LineLocalEdit)
 from cpplint_fix.config import CPPLFixConfig
+from cpplint_fix.engine import LintBackend, lint_file, lint_lines
+from cpplint_fix.discovery import find_sources, select_sources, split_balanced, file_size
+from cpplint_fix.git import changed_lines, in_ranges
+from cpplint_fix.results import FileFixResult, FixSummary
+from cpplint_fix.cache import LintCache
+from cpplint_fix.profiling import FileProfile, RunProfile, timed
+from cpplint_fix.planning import FixPlan, is_fixable, lint_filter
+from cpplint_fix.writing import LinkMode, SyncMode, mirror_tree, place_file, sync_paths, write_if_changed
+from cpplint_fix.pipeline import Stage, StageLimits, run_pipeline
 
 logger = logging.getLogger(__name__)
 
-def run_cpplint(root: Path) -> CPPLTestsuite:
-    """Run cpplint on the given root directory and return the parsed results."""
-    if root.is_dir():
-        cmd = ["cpplint", "--output=junit", "--recursive", "./"]
+# Upper bound on the files passed to a single cpplint call, to stay clear of
+# command line length limits
+_MAX_SHARD_FILES = 1000
+# Bytes read from an asynchronous cpplint pipe at a time
+_PIPE_CHUNK = 64 * 1024
+
+
+def _cpplint_cmd(rel_paths: list[Path], filters: str | None) -> list[str]:
+    cmd = ["cpplint", "--output=junit"]
+    if filters is not None:
+        cmd.append(f"--filter={filters}")
+    cmd.extend(str(p) for p in rel_paths)
+    return cmd
+
+
+def run_cpplint(root: Path, workers: int = 1, files: list[Path] | None = None,
+                filters: str | None = None) -> CPPLTestsuite:
+    """Run cpplint on the given root directory and return the parsed results.
+
+    See aiter_cpplint; the merged results are ordered as a single
+    `cpplint --recursive` run would order them.
+    """
+    if files is None:
+        files = find_sources(root)[1]
+
+    async def lint() -> list[CPPLTestcase]:
+        return [testcase async for testcase in aiter_cpplint(root, workers, files, filters)]
+
+    order = {rel_path: i for i, rel_path in enumerate(files)}
+    testcases = sorted(asyncio.run(lint()), key=lambda tc: order.get(tc.fpath, len(order)))
+    return CPPLTestsuite(testcases=testcases)
+
+
+async def _aiter_cpplint_shard(root: Path, rel_paths: list[Path],
+                               filters: str | None = None) -> AsyncIterator[CPPLTestcase]:
+    """Run a single cpplint process on the given files without blocking the event loop.
+
+    The process is killed if the iteration stops early.
+    """
+    proc = await asyncio.create_subprocess_exec(*_cpplint_cmd(rel_paths, filters),
+                                                stdout=sp.DEVNULL, stderr=sp.PIPE, cwd=root)
+    assert proc.stderr is not None
+    feed = CPPLTestcaseFeed()
+    try:
+        while chunk := await proc.stderr.read(_PIPE_CHUNK):
+            for testcase in feed.feed(chunk):
+                yield testcase
+        for testcase in feed.close():
+            yield testcase
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+        raise
+    finally:
+        await proc.wait()
+
+
+async def aiter_cpplint(root: Path, workers: int = 1, files: list[Path] | None = None,
+                        filters: str | None = None, max_pending: int = 16) -> AsyncIterator[CPPLTestcase]:
+    """Run cpplint on the given root directory and yield testcases as they are parsed.
+
+    The files are split into balanced shards that are linted by up to `workers`
+    concurrent cpplint processes, run by the event loop. Only testcases with
+    failures are yielded, in the order the shards produce them. If `files` is
+    given, only those files (relative to the root directory) are linted.
+    `filters` is passed as cpplint's --filter. At most `max_pending` testcases
+    are parsed ahead of the consumer; beyond that, the output of the processes
+    is left unread, which pauses them.
+    """
+    if files is None:
+        root_dir, rel_paths = find_sources(root)
     else:
-        fname = root.name
-        cmd = ["cpplint", "--output=junit", fname]
-        root = root.parent  # Use the parent directory as the working directory
-    proc = sp.Popen(cmd, stdout=sp.PIPE, stderr=sp.PIPE, cwd=root)
-    _, stderr = proc.communicate()
-    
-    return CPPLTestsuite.from_string(stderr.decode("utf-8"))
-
-def fix_files(input: Path, output: Path | None, dry_run: bool = False, 
-               config: CPPLFixConfig | None = None) -> None:
-    """Run cpplint on the input files and apply fixes to the output files/folder."""
-    
-    # Check if input is a file or folder
-    root_dir = input if input.is_dir() else input.parent
-       
+        root_dir, rel_paths = (root if root.is_dir() else root.parent), files
+    if not rel_paths:
+        return
+
+    n_shards = max(workers, -(-len(rel_paths) // _MAX_SHARD_FILES))
+    shards = split_balanced(root_dir, rel_paths, n_shards)
+    parsed: asyncio.Queue[CPPLTestcase | None] = asyncio.Queue(maxsize=max_pending)
+    running = asyncio.Semaphore(max(1, workers))
+    errors: list[Exception] = []
+
+    async def run_shard(shard: list[Path]) -> None:
+        try:
+            async with running, aclosing(_aiter_cpplint_shard(root_dir, shard, filters)) as testcases:
+                async for testcase in testcases:
+                    # Skip the placeholder testcase cpplint emits for shards without failures
+                    if testcase.failures:
+                        await parsed.put(testcase)
+        except Exception as e:
+            errors.append(e)
+        await parsed.put(None)
+
+    tasks = [asyncio.ensure_future(run_shard(shard)) for shard in shards]
+    try:
+        remaining = len(shards)
+        while remaining:
+            testcase = await parsed.get()
+            if testcase is None:
+                remaining -= 1
+            else:
+                yield testcase
+        if errors:
+            raise errors[0]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _cache_lookup(root_dir: Path, rel_paths: list[Path],
+                  cache: LintCache) -> tuple[dict[Path, str], dict[Path, list[CPPLFailure]], list[Path]]:
+    """Returns the cache key of each file, the cached failures, and the files to lint."""
+    keys = {rel_path: cache.key(root_dir / rel_path) for rel_path in rel_paths}
+    cached: dict[Path, list[CPPLFailure]] = {}
+    for rel_path, key in keys.items():
+        failures = cache.get(key)
+        if failures is not None:
+            cached[rel_path] = failures
+    return keys, cached, [rel_path for rel_path in rel_paths if rel_path not in cached]
+
+
+def _aiter_cpplint_cached(root: Path, rel_paths: list[Path], workers: int, cache: LintCache,
+                          filters: str | None = None,
+                          max_pending: int = 16) -> tuple[AsyncIterator[CPPLTestcase], int, int]:
+    """Run cpplint through the subprocess backend, only on files missing from the cache.
+
+    Returns an iterator over the testcases, cached ones first, along with the number
+    of cache hits and misses.
+    """
+    root_dir = root if root.is_dir() else root.parent
+    keys, cached, misses = _cache_lookup(root_dir, rel_paths, cache)
+
+    async def testcases() -> AsyncIterator[CPPLTestcase]:
+        for rel_path, failures in cached.items():
+            if failures:
+                yield CPPLTestcase(fpath=rel_path, failures=failures)
+        clean = set(misses)
+        async with aclosing(aiter_cpplint(root, workers, misses, filters, max_pending)) as linted:
+            async for testcase in linted:
+                cache.put(keys[testcase.fpath], testcase.failures)
+                clean.discard(testcase.fpath)
+                yield testcase
+        for rel_path in clean:
+            cache.put(keys[rel_path], [])
+
+    return testcases(), len(rel_paths) - len(misses), len(misses)
+
+
+def _lint_inprocess_cached(root_dir: Path, rel_path: Path, cache: LintCache | None,
+                           result: FileFixResult, filters: str | None = None,
+                           with_source: bool = False) -> tuple[CPPLTestcase | None, SourceFile | None]:
+    """Lint a single file in-process, unless its failures are in the cache.
+
+    With `with_source`, the source cpplint analyzed is returned too, unless the
+    failures came from the cache.
+    """
+    key = None
+    if cache is not None:
+        key = cache.key(root_dir / rel_path)
+        failures = cache.get(key)
+        result.cached = failures is not None
+        if failures is not None:
+            return CPPLTestcase(fpath=rel_path, failures=failures) if failures else None, None
+
+    lint_result = lint_file(root_dir, rel_path, filters, with_source)
+    if cache is not None and key is not None:
+        cache.put(key, lint_result.testcase.failures if lint_result is not None else [])
+    if lint_result is None:
+        return None, None
+    return lint_result.testcase, lint_result.source
+
+
+@dataclass(frozen=True)
+class _FileTask:
+    """A file to fix; without a testcase, the worker lints it in-process first."""
+    rel_path: Path
+    testcase: CPPLTestcase | None = None
+    # If set, only failures within these (first, last) line ranges are fixed
+    line_ranges: list[tuple[int, int]] | None = None
+    # If set, the file is skipped unless its content still has this digest
+    sha256: str | None = None
+
+
+def _restrict_to_lines(testcase: CPPLTestcase,
+                       line_ranges: list[tuple[int, int]] | None) -> CPPLTestcase:
+    """Drop the failures outside the given line ranges, if any."""
+    if line_ranges is None:
+        return testcase
+    failures = [f for f in testcase.failures if in_ranges(f.lineno, line_ranges)]
+    return CPPLTestcase(fpath=testcase.fpath, failures=failures)
+
+
+@dataclass(frozen=True)
+class _FixOptions:
+    """Settings shared by all the per-file tasks of a fix_files run."""
+    root_dir: Path
+    output: Path | None
+    dry_run: bool
+    config: CPPLFixConfig
+    cache: LintCache | None
+    # Number of lint and fix rounds to run on each file's in-memory content
+    max_rounds: int = 1
+    profile: bool = False
+    # Compute a diff of the fixes instead of writing them
+    diff: bool = False
+    sync: SyncMode = SyncMode.NONE
+    # cpplint --filter for every lint of the run; None reports all the checks
+    filters: str | None = None
+
+    def dest_path(self, fpath: Path) -> Path:
+        """Returns where the fixed content of a file is written; the output directory
+        mirrors the layout of the input directory."""
+        if self.output is None:
+            return fpath
+        return self.output / fpath.relative_to(self.root_dir)
+
+
+def _triage(testcase: CPPLTestcase, config: CPPLFixConfig, result: FileFixResult) -> list[CPPLFailure]:
+    """Returns the failures an edit will be attempted for, logging the others."""
+    fixable = []
+    for failure in testcase.failures:
+        if failure.code in config.exclude_rules:
+            result.log(logging.INFO, f"Excluding rule {failure.code} for file {result.fpath}")
+        elif Edits.get(failure.code) is None:
+            result.log(logging.WARNING, f"No edits found for error code: {failure.code}")
+        else:
+            fixable.append(failure)
+    return fixable
+
+
+def _apply_failures(src: SourceFile, failures: list[CPPLFailure], options: _FixOptions,
+                    result: FileFixResult) -> int:
+    """Apply the edits for the failures to the source, returning how many were applied.
+
+    The failures must all be fixable, as returned by _triage. All the edits are
+    planned first, on the unmodified source; edits that conflict with the ones
+    planned before them are rejected, and the rest are applied in a single pass.
+    Edits merged away into ones planned before them are not counted.
+    """
+    fpath = src.path
+    applied = 0
+    plan = EditPlan(src)
+    for failure in failures:
+        edit_class = Edits.get(failure.code)
+        assert edit_class is not None, f"No edit for {failure.code}; failures must be triaged"
+        if options.dry_run:
+            result.log(logging.INFO, f"Dry run: would apply edit {edit_class(failure)} to {fpath}")
+            continue
+        error: str | None = None
+        if issubclass(edit_class, LineLocalEdit):
+            if not plan.add_transform(failure.lineno, edit_class.transform):
+                conflict = EditConflict(edit=edit_class(failure), line_number=failure.lineno,
+                                        reason="line out of range")
+                error = f"Rejected conflicting edit in {fpath}: {conflict}"
+        else:
+            edit = edit_class(failure)
+            try:
+                outcome = plan.add(edit)
+            except FailedEditError as e:
+                error = f"Failed to apply edit {edit} to {fpath}: {e}"
+            else:
+                if isinstance(outcome, EditDuplicate):
+                    result.log(logging.DEBUG, f"Merged duplicate edit in {fpath}: {outcome}")
+                    continue
+                if isinstance(outcome, EditConflict):
+                    error = f"Rejected conflicting edit in {fpath}: {outcome}"
+
+        if error is None:
+            applied += 1
+        else:
+            result.log(logging.ERROR, error)
+            result.edits_failed += 1
+        if result.profile is not None:
+            counts = result.profile.applied if error is None else result.profile.failed
+            counts[failure.code] += 1
+
+    plan.apply()
+    result.edits_applied += applied
+    return applied
+
+
+def _fix_source(src: SourceFile, failures: list[CPPLFailure], rel_path: Path,
+                options: _FixOptions, result: FileFixResult,
+                line_ranges: list[tuple[int, int]] | None = None) -> SourceFile:
+    """Apply the edits for the failures, with further rounds if enabled.
+
+    Later rounds only fix failures within `line_ranges`, if given, as moved by
+    the lines the earlier rounds deleted and inserted. Returns the final source,
+    which is a new object if more rounds ran.
+    """
+    if result.profile is not None:
+        # Run the nesting analysis the edits would trigger lazily, to time it apart
+        needs_nesting = [f.lineno for f in failures
+                         if getattr(Edits.get(f.code), "_needs_nesting", False)]
+        if needs_nesting:
+            with result.profile.phase("nesting"):
+                src.analyze_nesting(max(needs_nesting))
+    with timed(result.profile, "edits"):
+        applied = _apply_failures(src, failures, options, result)
+
+    # Fixes can expose new failures: lint the edited content again, in memory
+    rounds = 1
+    while applied > 0 and rounds < options.max_rounds:
+        with timed(result.profile, "lint"):
+            data = src.to_bytes()
+            lint_result = lint_lines(options.root_dir, rel_path,
+                                     data.decode("utf-8", "replace").split("\n"), data=data,
+                                     filters=options.filters)
+        if lint_result is None:
+            break
+        testcase = lint_result.testcase
+        if line_ranges is not None:
+            line_ranges = src.edited_ranges(line_ranges)
+            testcase = _restrict_to_lines(testcase, line_ranges)
+        fixable = [f for f in testcase.failures if is_fixable(f, options.config)]
+        if not fixable:
+            break
+        rounds += 1
+        result.log(logging.INFO, f"Round {rounds}: {len(fixable)} fixable failures left in {src.path}")
+        src = lint_result.source
+        with timed(result.profile, "edits"):
+            applied = _apply_failures(src, fixable, options, result)
+    if rounds == options.max_rounds > 1 and applied > 0:
+        result.log(logging.WARNING, f"Reached the limit of {rounds} fix rounds for {src.path}")
+    return src
+
+
+def _diff_lines(text: str) -> list[str]:
+    """Split text into lines for difflib, marking a missing final newline as git does."""
+    lines = [line + "\n" for line in text.split("\n")]
+    last = lines.pop()
+    if last != "\n":
+        lines.append(last + "\\ No newline at end of file\n")
+    return lines
+
+
+def _unified_diff(before: str, after: str, rel_path: Path) -> str:
+    """Returns the unified diff between two versions of a file, empty if they are equal."""
+    return "".join(difflib.unified_diff(_diff_lines(before), _diff_lines(after),
+                                        fromfile=f"a/{rel_path.as_posix()}",
+                                        tofile=f"b/{rel_path.as_posix()}"))
+
+
+@dataclass
+class _FileJob:
+    """A file going through the fix pipeline, with what each stage passes on to the next."""
+    # Position of the file in discovery order, whatever the order of the tasks
+    position: int
+    task: _FileTask
+    result: FileFixResult
+    failures: list[CPPLFailure] = field(default_factory=list)
+    # The source as linted in-process, when the workers share this process
+    source: SourceFile | None = None
+    # The loaded content, then the fixed content to write, as the edited source
+    # when the workers share this process
+    data: SourceFile | bytes | None = None
+
+
+def _lint_stage(options: _FixOptions, task: _FileTask, result: FileFixResult,
+                with_source: bool) -> tuple[CPPLTestcase | None, SourceFile | None, FileFixResult]:
+    """Lint a single file in-process, in a worker.
+
+    Returns the failures, the analyzed source if `with_source`, and the result
+    as updated there.
+    """
+    with timed(result.profile, "lint"):
+        testcase, source = _lint_inprocess_cached(options.root_dir, task.rel_path, options.cache,
+                                                  result, options.filters, with_source)
+    if testcase is not None:
+        testcase = _restrict_to_lines(testcase, task.line_ranges)
+    return testcase, source, result
+
+
+def _load_stage(options: _FixOptions, task: _FileTask, result: FileFixResult) -> bytes | None:
+    """Read a file to fix, or returns None if it cannot be read or changed since its
+    fixes were planned."""
+    with timed(result.profile, "load"):
+        try:
+            data = result.fpath.read_bytes()
+        except OSError as e:
+            result.log(logging.WARNING, f"Skipping {result.fpath}: {e}")
+            return None
+    if task.sha256 is not None and hashlib.sha256(data).hexdigest() != task.sha256:
+        result.log(logging.WARNING, f"Skipping {result.fpath}: it changed since the fixes were planned")
+        return None
+    return data
+
+
+def _fix_stage(options: _FixOptions, task: _FileTask, src: SourceFile | bytes,
+               failures: list[CPPLFailure], result: FileFixResult,
+               with_source: bool) -> tuple[SourceFile | bytes | None, FileFixResult]:
+    """Edit the source of a file, or its loaded content, in a worker.
+
+    Returns the content to write, if any, as the edited source if `with_source`,
+    and the result as updated there.
+    """
+    if isinstance(src, bytes):
+        with timed(result.profile, "load"):
+            src = SourceFile.from_bytes(result.fpath, src)
+    original = src.to_text() if options.diff else ""
+    src = _fix_source(src, failures, task.rel_path, options, result, task.line_ranges)
+    if options.dry_run:
+        return None, result
+    if options.diff:
+        result.diff = _unified_diff(original, src.to_text(), task.rel_path)
+        return None, result
+    if options.output is None and result.edits_applied == 0:
+        return None, result
+    return (src if with_source else src.to_bytes()), result
+
+
+def _write_content(path: Path, data: SourceFile | bytes, fsync: bool) -> bool:
+    """Write the content unless the file already holds it; an edited source is
+    streamed out without joining the whole file."""
+    if isinstance(data, SourceFile):
+        return data.to_file(path, fsync=fsync)
+    return write_if_changed(path, data, fsync=fsync)
+
+
+def _write_stage(options: _FixOptions, data: SourceFile | bytes, result: FileFixResult) -> None:
+    """Write the fixed content of a file, in place or under the output directory."""
+    fpath = result.fpath
+    with timed(result.profile, "write"):
+        fsync = options.sync == SyncMode.FILE
+        if options.output is not None:
+            dest_path = options.dest_path(fpath)
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            result.written = _write_content(dest_path, data, fsync)
+            result.dest = dest_path
+            if result.written:
+                result.log(logging.INFO, f"Fixed file written to: {dest_path}")
+            else:
+                result.log(logging.INFO, f"Fixed file {dest_path} is up to date")
+        else:
+            result.written = _write_content(fpath, data, fsync)
+            if result.written:
+                result.log(logging.INFO, f"Applied edits to source file: {fpath}")
+            else:
+                result.log(logging.INFO, f"Edits leave {fpath} unchanged; not writing it")
+
+
+def fix_text(fpath: Path, text: str, config: CPPLFixConfig | None = None,
+             max_rounds: int = 1, full_lint: bool = False) -> tuple[str, FileFixResult]:
+    """Lint and fix the given content of a file in memory, without touching disk.
+
+    The path is only used to find CPPLINT.cfg files and to name the file in
+    cpplint's checks. Returns the fixed text and the outcome of the fixes;
+    `full_lint` is as for fix_files.
+    """
+    if config is None:
+        config = CPPLFixConfig()
+    result = FileFixResult(fpath=fpath)
+    if config.exclude_filter.excludes(str(fpath)):
+        result.log(logging.INFO, f"Excluding file {fpath} based on configuration.")
+        return text, result
 
-    cppl_testsuite = run_cpplint(input)
+    rel_path = Path(fpath.name)
+    filters = None if full_lint else lint_filter(config)
+    lint_result = lint_lines(fpath.parent, rel_path, text.split("\n"),
+                             data=text.encode("utf-8", "surrogateescape"), filters=filters)
+    if lint_result is None:
+        return text, result
+    result.failures = len(lint_result.testcase.failures)
+    failures = _triage(lint_result.testcase, config, result)
+    options = _FixOptions(root_dir=fpath.parent, output=None, dry_run=False, config=config,
+                          cache=None, max_rounds=max_rounds, filters=filters)
+    src = _fix_source(lint_result.source, failures, rel_path, options, result)
+    return src.to_text(), result
+
+
+def _mirror(input: Path, root_dir: Path, output: Path, link: LinkMode, fixed: set[Path],
+            cache: LintCache | None) -> int:
+    """Place the files of the input that were not fixed in the output directory,
+    leaving out the lint cache."""
+    if input.is_dir():
+        return mirror_tree(root_dir, output, link, exclude=fixed,
+                           skip_dirs=[cache.path] if cache is not None else [])
+    rel_path = Path(input.name)
+    if rel_path in fixed:
+        return 0
+    output.mkdir(parents=True, exist_ok=True)
+    return int(place_file(input, output / rel_path, link))
+
+
+def _count_lines(fpath: Path) -> int:
+    """Returns the number of lines of the file, as cpplint counts them."""
+    try:
+        return fpath.read_bytes().count(b"\n") + 1
+    except OSError:
+        return 0
+
+
+def _discover(input: Path, config: CPPLFixConfig, since: str | None,
+              changed_lines_only: bool) -> tuple[Path, list[Path], dict[Path, list[tuple[int, int]]] | None]:
+    """Returns the root directory, the files to lint and, if only changed lines are
+    to be fixed, their line ranges.
+
+    Files excluded by the config are left out, so they are never linted.
+    """
+    # All paths are relative to the input directory, or the parent of an input file
+    if since is None:
+        root_dir, rel_paths = find_sources(input, config.exclude_filter)
+        return root_dir, rel_paths, None
+    changes = changed_lines(input if input.is_dir() else input.parent, since)
+    root_dir, rel_paths = select_sources(input, changes, config.exclude_filter)
+    return root_dir, rel_paths, changes if changed_lines_only else None
+
+
+def _lint_settings(config: CPPLFixConfig, cache: LintCache | None,
+                   full_lint: bool) -> tuple[str | None, LintCache | None]:
+    """Returns the cpplint --filter of a run, and the cache to use with it.
+
+    Unless `full_lint`, cpplint only reports the failures that would be fixed.
+    Their cache entries are kept apart from those of full lint results.
+    """
+    if full_lint:
+        return None, cache
+    filters = lint_filter(config)
+    if cache is not None:
+        cache = cache.with_lint_args(f"--filter={filters}")
+    return filters, cache
+
+
+def _make_pipeline_tasks(input: Path, root_dir: Path, rel_paths: list[Path], backend: LintBackend,
+                         limits: StageLimits, cache: LintCache | None,
+                         changes: dict[Path, list[tuple[int, int]]] | None,
+                         filters: str | None, largest_first: bool = False,
+                         ) -> tuple[Iterable[_FileTask] | AsyncIterator[_FileTask], int, int]:
+    """Returns the per-file tasks for the backend, with the subprocess cache hits and misses.
+
+    With the in-process backend, tasks are in file order, or largest file first
+    to balance the load of several workers. With the subprocess backend, cpplint
+    processes are run by the event loop, up to `limits.lint` at once, and paused
+    while the pipeline is full.
+    """
+    if backend == LintBackend.INPROCESS:
+        # Each worker lints its own file
+        tasks = [_FileTask(rel_path, line_ranges=changes.get(rel_path) if changes is not None else None)
+                 for rel_path in rel_paths]
+        if largest_first:
+            tasks.sort(key=lambda task: file_size(root_dir / task.rel_path), reverse=True)
+        return tasks, 0, 0
+
+    cache_hits = cache_misses = 0
+    testcases: AsyncIterator[CPPLTestcase]
+    if cache is not None:
+        testcases, cache_hits, cache_misses = _aiter_cpplint_cached(
+            input, rel_paths, limits.lint, cache, filters, max_pending=limits.queue_size)
+    else:
+        testcases = aiter_cpplint(input, limits.lint, rel_paths, filters,
+                                  max_pending=limits.queue_size)
+
+    async def tasks() -> AsyncIterator[_FileTask]:
+        async with aclosing(testcases):
+            async for testcase in testcases:
+                testcase = _restrict_to_lines(testcase, changes.get(testcase.fpath)
+                                              if changes is not None else None)
+                if testcase.failures:
+                    yield _FileTask(testcase.fpath, testcase)
+
+    return tasks(), cache_hits, cache_misses
+
+
+async def _run_fix_pipeline(tasks: Iterable[_FileTask] | AsyncIterator[_FileTask],
+                            rel_paths: list[Path], options: _FixOptions, limits: StageLimits,
+                            workers: int, diff: TextIO | None) -> list[FileFixResult]:
+    """Lint (if needed), load, edit and write the file of each task, in bounded stages.
+
+    Returns the results in the order of `rel_paths`, whatever the order of the
+    tasks; diffs are written to the stream in that order as well, as soon as
+    the files before them are done or known to have no task. A single worker is
+    a thread rather than a process, as cpplint's in-process state is global; it
+    runs both the lint and fix stages, so they never run at once.
+    """
+    loop = asyncio.get_running_loop()
+    executor: Executor = (ProcessPoolExecutor(max_workers=workers) if workers > 1
+                          else ThreadPoolExecutor(max_workers=1))
+    positions = {rel_path: i for i, rel_path in enumerate(rel_paths)}
+    # Files with a task so far, and whether all the tasks have been seen
+    started: set[int] = set()
+    all_started = False
+
+    async def jobs() -> AsyncIterator[_FileJob]:
+        nonlocal all_started
+
+        def job(task: _FileTask) -> _FileJob:
+            result = FileFixResult(fpath=options.root_dir / task.rel_path,
+                                   profile=FileProfile() if options.profile else None)
+            position = positions[task.rel_path]
+            started.add(position)
+            return _FileJob(position, task, result)
+
+        if isinstance(tasks, AsyncIterator):
+            async with aclosing(tasks):  # type: ignore[type-var]
+                async for task in tasks:
+                    yield job(task)
+        else:
+            for task in tasks:
+                yield job(task)
+        all_started = True
+
+    async def lint(job: _FileJob) -> bool:
+        fpath = job.result.fpath
+        if options.config.exclude_filter.excludes(str(fpath)):
+            job.result.log(logging.INFO, f"Excluding file {fpath} based on configuration.")
+            return False
+        testcase = job.task.testcase
+        if testcase is None:
+            # A thread worker hands the source over to the fix stage, which a process
+            # worker could only do by pickling it
+            testcase, job.source, job.result = await loop.run_in_executor(
+                executor, _lint_stage, options, job.task, job.result, workers == 1)
+            if testcase is None or not testcase.failures:
+                return False
+        job.result.failures = len(testcase.failures)
+        job.result.log(logging.INFO, f"Processing file: {fpath}")
+        # Only load the file if there is anything to fix in it
+        job.failures = _triage(testcase, options.config, job.result)
+        if not job.failures:
+            job.source = None
+        return bool(job.failures)
+
+    async def load(job: _FileJob) -> bool:
+        if job.source is not None:
+            return True
+        job.data = await asyncio.to_thread(_load_stage, options, job.task, job.result)
+        return job.data is not None
+
+    async def fix(job: _FileJob) -> bool:
+        src = job.source if job.source is not None else job.data
+        assert src is not None
+        job.source = None
+        job.data, job.result = await loop.run_in_executor(executor, _fix_stage, options,
+                                                          job.task, src, job.failures,
+                                                          job.result, workers == 1)
+        return job.data is not None
+
+    async def write(job: _FileJob) -> bool:
+        assert job.data is not None
+        await asyncio.to_thread(_write_stage, options, job.data, job.result)
+        return True
+
+    finished: dict[int, FileFixResult] = {}
+    # Position of the first file whose diff may still have to be written
+    next_diff = 0
+
+    def write_diffs() -> None:
+        nonlocal next_diff
+        while next_diff < len(rel_paths):
+            result = finished.get(next_diff)
+            if result is None:
+                if next_diff in started or not all_started:
+                    return
+            elif diff is not None and result.diff:
+                diff.write(result.diff)
+            next_diff += 1
+
+    def done(job: _FileJob) -> None:
+        job.data = job.source = None
+        finished[job.position] = job.result
+        write_diffs()
+
+    stages = [Stage("lint", lint, limits.lint), Stage("load", load, limits.load),
+              Stage("fix", fix, limits.fix), Stage("write", write, limits.write)]
+    try:
+        await run_pipeline(jobs(), stages, limits.queue_size, done)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    write_diffs()
+    return [finished[position] for position in sorted(finished)]
+
+
+def fix_files(input: Path, output: Path | None, dry_run: bool = False,
+              config: CPPLFixConfig | None = None,
+              backend: LintBackend = LintBackend.INPROCESS,
+              jobs: int | None = None, cache: LintCache | None = None,
+              until_clean: bool = False, max_rounds: int = 10,
+              since: str | None = None, changed_lines_only: bool = False,
+              profile: bool = False, diff: TextIO | None = None,
+              plan: FixPlan | None = None, sync: SyncMode = SyncMode.NONE,
+              link: LinkMode = LinkMode.HARDLINK, full_lint: bool = False,
+              limits: StageLimits | None = None) -> FixSummary:
+    """Run cpplint on the input files and apply fixes to the output files/folder.
+
+    Files are linted, loaded, fixed and written by a pipeline of stages bounded by
+    `limits` (default: StageLimits.for_jobs(jobs)); linting and fixing run in up to
+    `jobs` processes. The CLI options of the same names describe the others: a
+    `plan` from make_plan or plan_report replaces linting, `diff` receives the
+    diffs in file order instead of files being written, and `output` receives the
+    fixed files along with the others placed as `link` sets.
+    """
+    return asyncio.run(fix_files_async(
+        input, output, dry_run=dry_run, config=config, backend=backend, jobs=jobs, cache=cache,
+        until_clean=until_clean, max_rounds=max_rounds, since=since,
+        changed_lines_only=changed_lines_only, profile=profile, diff=diff, plan=plan, sync=sync,
+        link=link, full_lint=full_lint, limits=limits))
+
+
+async def fix_files_async(input: Path, output: Path | None, dry_run: bool = False,
+                          config: CPPLFixConfig | None = None,
+                          backend: LintBackend = LintBackend.INPROCESS,
+                          jobs: int | None = None, cache: LintCache | None = None,
+                          until_clean: bool = False, max_rounds: int = 10,
+                          since: str | None = None, changed_lines_only: bool = False,
+                          profile: bool = False, diff: TextIO | None = None,
+                          plan: FixPlan | None = None, sync: SyncMode = SyncMode.NONE,
+                          link: LinkMode = LinkMode.HARDLINK, full_lint: bool = False,
+                          limits: StageLimits | None = None) -> FixSummary:
+    """Asynchronous version of fix_files, to run the fixes in an existing event loop."""
     if config is None:
         config = CPPLFixConfig()
-    
-    if not cppl_testsuite.testcases:
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    if limits is None:
+        limits = StageLimits.for_jobs(jobs)
+    run_profile = RunProfile() if profile else None
+    filters, cache = _lint_settings(config, cache, full_lint)
+
+    tasks: Iterable[_FileTask] | AsyncIterator[_FileTask]
+    if plan is not None:
+        # Lint results come from the plan; its paths are relative to the input
+        plan.validate()
+        root_dir = input if input.is_dir() else input.parent
+        rel_paths = [f.fpath for f in plan.files]
+        tasks = [_FileTask(f.fpath, f.testcase, sha256=f.sha256) for f in plan.files]
+        cache_hits = cache_misses = 0
+    else:
+        with timed(run_profile, "discovery"):
+            root_dir, rel_paths, changes = _discover(input, config, since, changed_lines_only)
+        tasks, cache_hits, cache_misses = _make_pipeline_tasks(input, root_dir, rel_paths, backend,
+                                                               limits, cache, changes, filters,
+                                                               largest_first=jobs > 1)
+
+    options = _FixOptions(root_dir=root_dir, output=output, dry_run=dry_run, config=config,
+                          cache=cache, max_rounds=max_rounds if until_clean else 1,
+                          profile=profile, diff=diff is not None, sync=sync, filters=filters)
+    with timed(run_profile, "fix"):
+        results = await _run_fix_pipeline(tasks, rel_paths, options, limits,
+                                          min(jobs, len(rel_paths)), diff)
+
+    with timed(run_profile, "report"):
+        cache_hits += sum(r.cached is True for r in results)
+        cache_misses += sum(r.cached is False for r in results)
+        if run_profile is not None:
+            run_profile.files = {r.fpath: r.profile for r in results if r.profile is not None}
+        results = [r for r in results if r.logs]
+        for result in results:
+            result.replay_logs(logger)
+        if cache is not None:
+            cache.evict()
+
+    if output is not None and not dry_run and diff is None:
+        with timed(run_profile, "mirror"):
+            placed = await asyncio.to_thread(
+                _mirror, input, root_dir, output, link,
+                {r.fpath.relative_to(root_dir) for r in results if r.dest is not None}, cache)
+        logger.info(f"Placed {placed} unchanged files in {output}")
+
+    if sync == SyncMode.BATCH:
+        with timed(run_profile, "sync"):
+            await asyncio.to_thread(sync_paths, [options.dest_path(r.fpath) for r in results if r.written])
+
+    if run_profile is not None:
+        # Counted apart from the timed phases, as cpplint reads all the files
+        run_profile.lines = {root_dir / rel_path: _count_lines(root_dir / rel_path)
+                             for rel_path in rel_paths}
+    summary = FixSummary(results=[r for r in results if r.failures > 0],
+                         cache_hits=cache_hits, cache_misses=cache_misses,
+                         profile=run_profile)
+    if summary.files == 0:
         logger.info("No test cases found in cpplint output.")
+    else:
+        logger.info(str(summary))
+    return summary
+
+
+async def _aiter_linted(input: Path, root_dir: Path, rel_paths: list[Path],
+                        changes: dict[Path, list[tuple[int, int]]] | None, config: CPPLFixConfig,
+                        backend: LintBackend, jobs: int, cache: LintCache | None,
+                        filters: str | None) -> AsyncIterator[CPPLTestcase]:
+    """Lint the files as the fix pipeline's lint stage does, yielding the testcases
+    with failures.
+
+    With the in-process backend, testcases are in file order. Files not linted
+    yet are cancelled if the iterator is closed early.
+    """
+    limits = StageLimits.for_jobs(jobs)
+    tasks, _, _ = _make_pipeline_tasks(input, root_dir, rel_paths, backend, limits, cache,
+                                       changes, filters)
+    if isinstance(tasks, AsyncIterator):
+        async with aclosing(tasks):  # type: ignore[type-var]
+            async for task in tasks:
+                assert task.testcase is not None
+                yield task.testcase
         return
-    
-    for testcase in cppl_testsuite.testcases:
-        # All paths are relative to the input directory
-        fpath = root_dir / testcase.fpath
-
-        # Check if any exclusion rules apply
-        if any(pattern.match(str(fpath)) for pattern in config.exclude_files):
-            logger.info(f"Excluding file {fpath} based on configuration.")
-            continue
 
-        logger.info(f"Processing file: {fpath}")
-        src = SourceFile.from_file(fpath)
-        edits_count = 0
-        for failure in testcase.failures:
+    loop = asyncio.get_running_loop()
+    options = _FixOptions(root_dir=root_dir, output=None, dry_run=True, config=config,
+                          cache=cache, filters=filters)
+    workers = min(jobs, len(rel_paths))
+    executor: Executor = (ProcessPoolExecutor(max_workers=workers) if workers > 1
+                          else ThreadPoolExecutor(max_workers=1))
+    pending: deque[asyncio.Future] = deque()
+    try:
+        for task in tasks:
+            result = FileFixResult(fpath=root_dir / task.rel_path)
+            pending.append(loop.run_in_executor(executor, _lint_stage, options, task, result, False))
+            # Up to a queue of files is linted ahead of the consumer
+            while pending and (len(pending) > limits.queue_size or pending[0].done()):
+                testcase, _, _ = await pending.popleft()
+                if testcase is not None and testcase.failures:
+                    yield testcase
+        while pending:
+            testcase, _, _ = await pending.popleft()
+            if testcase is not None and testcase.failures:
+                yield testcase
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True, cancel_futures=True)
 
-            if failure.code in config.exclude_rules:
-                logger.info(f"Excluding rule {failure.code} for file {fpath}")
-                continue
 
-            edit_class = Edits.get(failure.code)
-            if edit_class is None:
-                logger.warning(f"No edits found for error code: {failure.code}")
-                continue
+def check_files(input: Path, config: CPPLFixConfig | None = None,
+                backend: LintBackend = LintBackend.INPROCESS,
+                jobs: int | None = None, cache: LintCache | None = None,
+                since: str | None = None, changed_lines_only: bool = False,
+                full_lint: bool = False) -> CPPLTestcase | None:
+    """Lint the input files until one with fixable failures is found.
 
-            edit = edit_class(failure)
-            if dry_run:
-                logger.info(f"Dry run: would apply edit {edit} to {fpath}")
-                continue
-            try:
-                edit.apply(src)
-                edits_count += 1
-            except FailedEditError as e:
-                logger.error(f"Failed to apply edit {edit} to {fpath}: {e}")
-                continue
-        
-        if dry_run:
-            continue
+    Returns that file's fixable failures, or None if no file has any. Nothing is
+    loaded for fixing or written, and the remaining files are not linted once a
+    file with fixable failures is found. Arguments are as for fix_files.
+    """
+    if config is None:
+        config = CPPLFixConfig()
+    filters, cache = _lint_settings(config, cache, full_lint)
+    root_dir, rel_paths, changes = _discover(input, config, since, changed_lines_only)
+
+    async def check() -> CPPLTestcase | None:
+        testcases = _aiter_linted(input, root_dir, rel_paths, changes, config, backend,
+                                  jobs or os.cpu_count() or 1, cache, filters)
+        async with aclosing(testcases):
+            async for testcase in testcases:
+                fixable = [f for f in testcase.failures if is_fixable(f, config)]
+                if fixable:
+                    return CPPLTestcase(fpath=testcase.fpath, failures=fixable)
+        return None
+
+    try:
+        return asyncio.run(check())
+    finally:
+        if cache is not None:
+            cache.evict()
 
-        if output is not None:
-            dest_path = output / fpath.name
-            src.to_file(dest_path)
-            logger.info(f"Fixed file written to: {dest_path}")
-        elif edits_count > 0:
-            logger.info(f"Applying edits to source file: {fpath}")
-            src.apply_edits()
\ No newline at end of file
+
+def make_plan(input: Path, config: CPPLFixConfig | None = None,
+              backend: LintBackend = LintBackend.INPROCESS,
+              jobs: int | None = None, cache: LintCache | None = None,
+              since: str | None = None, changed_lines_only: bool = False,
+              full_lint: bool = False) -> FixPlan:
+    """Lint the input files and plan their fixes, without loading or writing any file.
+
+    The plan records the digest of each file to fix, and can be executed later
+    with fix_files. Arguments are as for fix_files; with `full_lint`, the plan's
+    `skipped` counts cover all the failures cpplint finds.
+    """
+    if config is None:
+        config = CPPLFixConfig()
+    filters, cache = _lint_settings(config, cache, full_lint)
+    root_dir, rel_paths, changes = _discover(input, config, since, changed_lines_only)
+
+    async def lint() -> list[CPPLTestcase]:
+        return [testcase async for testcase in _aiter_linted(
+            input, root_dir, rel_paths, changes, config, backend, jobs or os.cpu_count() or 1,
+            cache, filters)]
+
+    # The subprocess backend yields testcases in the order its shards finish
+    order = {rel_path: i for i, rel_path in enumerate(rel_paths)}
+    linted = sorted(asyncio.run(lint()), key=lambda tc: order.get(tc.fpath, len(order)))
+    if cache is not None:
+        cache.evict()
+    return FixPlan.from_testcases(linted, config, root=root_dir)
+
+
+def plan_report(input: Path, testsuite: CPPLTestsuite, config: CPPLFixConfig | None = None,
+                report_time: float | None = None) -> FixPlan:
+    """Plan the fixes for a cpplint report of the input files, made earlier, without
+    running cpplint.
+
+    Relative paths in the report are taken as relative to the input directory, or
+    to the parent of an input file, as cpplint prints them when run from there.
+    Files outside it, missing or excluded by the config are skipped. So are files
+    modified after `report_time`, a timestamp as returned by os.stat, as the line
+    numbers of the report may no longer match them; the plan then records the
+    digest of each file, so later changes are detected when it is executed.
+    """
+    if config is None:
+        config = CPPLFixConfig()
+    root_dir = input if input.is_dir() else input.parent
+    root_abs = root_dir.absolute()
+    failures: dict[Path, list[CPPLFailure]] = {}
+    for testcase in testsuite.testcases:
+        if not testcase.failures:
+            continue
+        fpath = Path(os.path.normpath(root_abs / testcase.fpath))
+        if not fpath.is_relative_to(root_abs):
+            logger.warning(f"Skipping {testcase.fpath}: it is outside {root_dir}")
+            continue
+        rel_path = fpath.relative_to(root_abs)
+        if input.is_file() and rel_path != Path(input.name):
+            continue
+        if config.exclude_filter.excludes(str(root_dir / rel_path)):
+            logger.info(f"Excluding file {root_dir / rel_path} based on configuration.")
+            continue
+        try:
+            mtime = fpath.stat().st_mtime
+        except OSError as e:
+            logger.warning(f"Skipping {testcase.fpath}: {e}")
+            continue
+        if report_time is not None and mtime > report_time:
+            logger.warning(f"Skipping {root_dir / rel_path}: it changed since the report was made")
+            continue
+        failures.setdefault(rel_path, []).extend(testcase.failures)
+    # A file may be listed more than once, as by reports of overlapping runs
+    testcases = [CPPLTestcase(fpath=rel_path, failures=list(dict.fromkeys(fails)))
+                 for rel_path, fails in failures.items()]
+    return FixPlan.from_testcases(testcases, config, root=root_dir)
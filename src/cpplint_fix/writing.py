@@ -0,0 +1,199 @@
+import os
+import shutil
+import secrets
+from enum import Enum
+from pathlib import Path
+from typing import Callable, Container, Iterable
+
+# Linux ioctl that makes a file share the extents of another, copy-on-write
+_FICLONE = 0x40049409
+
+
+class SyncMode(Enum):
+    """Enum to represent when written files are flushed to disk."""
+    # Left to the operating system
+    NONE = "none"
+    # Each file, before it replaces the original
+    FILE = "file"
+    # All files at once, at the end of the run
+    BATCH = "batch"
+
+
+class LinkMode(Enum):
+    """Enum to represent how unchanged files are placed in an output tree."""
+    # Shares the file with the input: editing it in place edits the input too
+    HARDLINK = "hardlink"
+    # Shares the data copy-on-write, where the filesystem supports it
+    REFLINK = "reflink"
+    COPY = "copy"
+
+
+def _fsync_dir(directory: str) -> None:
+    """Flush a rename in the directory to disk, where directories can be opened."""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+
+
+def write_atomic(path: Path, chunks: Iterable[bytes], fsync: bool = False) -> None:
+    """Write a file through a temporary file in the same directory, which then
+    replaces it at once, so readers never see a partial file.
+
+    The permissions of an existing file are kept, and a symlink is written
+    through rather than replaced. With fsync, the data and the rename are
+    flushed to disk before returning.
+    """
+    target = os.path.realpath(path)
+    directory = os.path.dirname(target)
+    while True:
+        temp = str(_temp_path(Path(target)))
+        try:
+            # Created with the default permissions, as a new file would be
+            fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.writelines(chunks)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.exists(target):
+            shutil.copymode(target, temp)
+        os.replace(temp, target)
+    except BaseException:
+        if os.path.exists(temp):
+            os.unlink(temp)
+        raise
+    if fsync:
+        _fsync_dir(directory)
+
+
+def sync_paths(paths: Iterable[Path]) -> None:
+    """Flush the given written files to disk, then the renames in their directories,
+    each directory once. Other files on the system are left alone."""
+    directories: dict[str, None] = {}
+    for path in paths:
+        target = os.path.realpath(path)
+        fd = os.open(target, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.setdefault(os.path.dirname(target))
+    for directory in directories:
+        _fsync_dir(directory)
+
+
+def _has_content(path: Path, chunks: Iterable[bytes]) -> bool:
+    """Whether the file holds exactly the concatenated chunks, read piece by piece."""
+    try:
+        with path.open("rb") as f:
+            for chunk in chunks:
+                if f.read(len(chunk)) != chunk:
+                    return False
+            return not f.read(1)
+    except OSError:
+        return False
+
+
+def write_if_changed(path: Path, content: bytes | Callable[[], Iterable[bytes]],
+                     fsync: bool = False) -> bool:
+    """Write the content atomically, unless the file already holds exactly these bytes,
+    so that its modification time is left alone. Returns whether it was written.
+
+    The content is either the data or a function that yields it in chunks; that is
+    called once to compare against the file and once more to stream it out.
+    """
+    if isinstance(content, bytes):
+        try:
+            if os.path.getsize(path) == len(content) and path.read_bytes() == content:
+                return False
+        except OSError:
+            pass
+        write_atomic(path, [content], fsync=fsync)
+        return True
+    if _has_content(path, content()):
+        return False
+    write_atomic(path, content(), fsync=fsync)
+    return True
+
+
+def _reflink(source: Path, dest: Path) -> None:
+    """Clone the file's data copy-on-write; raises OSError where that is not supported."""
+    import fcntl  # Not available on Windows
+    with source.open("rb") as src, dest.open("wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    shutil.copystat(source, dest)
+
+
+def _is_placed(source: Path, dest: Path, mode: LinkMode) -> bool:
+    """Whether dest already is an unchanged copy or link of source."""
+    try:
+        src_stat, dest_stat = source.stat(), dest.stat()
+    except OSError:
+        return False
+    if mode == LinkMode.HARDLINK and os.path.samestat(src_stat, dest_stat):
+        return True
+    # Copies keep the modification time of the source, hard links that fell back
+    # to one included
+    return (src_stat.st_size == dest_stat.st_size
+            and src_stat.st_mtime_ns == dest_stat.st_mtime_ns)
+
+
+def place_file(source: Path, dest: Path, mode: LinkMode = LinkMode.HARDLINK) -> bool:
+    """Place an unchanged file at dest, as a link when the mode and the filesystem
+    allow it, or as a copy otherwise. An existing dest is replaced at once.
+
+    Returns False if dest was already in place.
+    """
+    if _is_placed(source, dest, mode):
+        return False
+    temp = _temp_path(dest)
+    try:
+        if mode == LinkMode.HARDLINK:
+            os.link(source, temp)
+        elif mode == LinkMode.REFLINK:
+            _reflink(source, temp)
+        else:
+            shutil.copy2(source, temp)
+    except (OSError, ImportError):
+        # Across filesystems, or where links are not supported
+        if os.path.lexists(temp):
+            os.unlink(temp)
+        shutil.copy2(source, temp)
+    os.replace(temp, dest)
+    return True
+
+
+def mirror_tree(root: Path, output: Path, mode: LinkMode = LinkMode.HARDLINK,
+                exclude: Container[Path] = (), skip_dirs: Iterable[Path] = ()) -> int:
+    """Place every file under root at the same relative path under output, except
+    the excluded relative paths.
+
+    Symlinks to files are placed as the files they point to; symlinked
+    directories are not followed, as in source discovery. An output directory
+    inside root is skipped, and so are `skip_dirs`, such as a lint cache.
+    Returns the number of files placed.
+    """
+    output.mkdir(parents=True, exist_ok=True)
+    skip = {os.path.realpath(path) for path in (output, *skip_dirs)}
+    placed = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if os.path.realpath(os.path.join(dirpath, d)) not in skip]
+        dest_dir = output / os.path.relpath(dirpath, root)
+        dest_dir.mkdir(exist_ok=True)
+        for fname in filenames:
+            source = Path(dirpath, fname)
+            if source.is_file() and source.relative_to(root) not in exclude:
+                placed += place_file(source, dest_dir / fname, mode)
+    return placed
@@ -0,0 +1,82 @@
+import os
+import shutil
+import pytest
+from pathlib import Path
+from cpplint_fix.cache import LintCache
+from cpplint_fix.engine import LintBackend
+from cpplint_fix.parser import CPPLFailure
+from cpplint_fix.wrapper import fix_files
+
+
+def test_lint_cache(tmp_path: Path):
+    cache = LintCache(tmp_path / "cache")
+    source = tmp_path / "main.cpp"
+    source.write_text("int x = 0; \n")
+
+    key = cache.key(source)
+    assert cache.get(key) is None
+
+    failures = [CPPLFailure(lineno=1, message="Line ends in whitespace.", code="whitespace/end_of_line")]
+    cache.put(key, failures)
+    assert cache.get(key) == failures
+    assert cache.key(source) == key
+
+    # Content, CPPLINT.cfg files and lint arguments all change the key
+    source.write_text("int x = 0;\n")
+    assert cache.key(source) != key
+    key = cache.key(source)
+    (tmp_path / "CPPLINT.cfg").write_text("linelength=100\n")
+    assert LintCache(tmp_path / "cache").key(source) != key
+    assert LintCache(tmp_path / "cache", lint_args=("--filter=-whitespace",)).key(source) != key
+
+
+@pytest.mark.parametrize("text", ["{", "[]", '{"entries": []}', '{"failures": 1}',
+                                  '{"failures": [[1, "message"]]}'])
+def test_lint_cache_invalid_entry(tmp_path: Path, text: str):
+    """Entries of the wrong shape are a miss, and are removed."""
+    cache = LintCache(tmp_path / "cache")
+    key = "ab" * 32
+    cache.put(key, [])
+    cache._entry_path(key).write_text(text)
+    assert cache.get(key) is None
+    assert not cache._entry_path(key).exists()
+
+
+def test_lint_cache_evict(tmp_path: Path):
+    cache = LintCache(tmp_path / "cache")
+    keys = [f"{i:02d}" * 32 for i in range(4)]
+    for i, key in enumerate(keys):
+        cache.put(key, [])
+        os.utime(cache._entry_path(key), (i, i))
+    # Reading an entry marks it as recently used
+    assert cache.get(keys[0]) == []
+    entry_size = cache._entry_path(keys[0]).stat().st_size
+
+    cache.max_size = 2 * entry_size
+    assert cache.evict() == 2
+    assert cache.get(keys[0]) == []
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is None
+    assert cache.get(keys[3]) == []
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_cache(examples_path: Path, tmp_path: Path, backend: LintBackend):
+    input_path = tmp_path / "input"
+    shutil.copytree(examples_path / "whitespace/indent/input", input_path)
+    (input_path / "clean.cpp").write_text("// Copyright 2025 Someone\n")
+    fixed_path = tmp_path / "fixed"
+    fixed_path.mkdir()
+    cache = LintCache(tmp_path / "cache")
+
+    first = fix_files(input_path, fixed_path, backend=backend, jobs=1, cache=cache)
+    assert (first.cache_hits, first.cache_misses) == (0, 2)
+    second = fix_files(input_path, fixed_path, backend=backend, jobs=1, cache=cache)
+    assert (second.cache_hits, second.cache_misses) == (2, 0)
+    assert second.failures == first.failures
+    assert second.edits_applied == first.edits_applied
+
+    # Fixing in place changes the file, so it is linted again
+    fix_files(input_path, None, backend=backend, jobs=1, cache=cache)
+    third = fix_files(input_path, None, backend=backend, jobs=1, cache=cache)
+    assert (third.cache_hits, third.cache_misses) == (1, 1)
@@ -0,0 +1,111 @@
+import os
+import threading
+import pytest
+from pathlib import Path
+from cpplint_fix.daemon import FixDaemon, DaemonError, serve, request
+from cpplint_fix.wrapper import fix_text
+
+
+@pytest.fixture
+def socket_path(tmp_path: Path):
+    """Path of the socket of a daemon running in a background thread."""
+    path = tmp_path / "fix.sock"
+    daemon = FixDaemon()
+    thread = threading.Thread(target=serve, args=(daemon, path, 30.0), daemon=True)
+    thread.start()
+    for _ in range(100):
+        if path.exists():
+            break
+        thread.join(0.05)
+    yield path
+    if thread.is_alive():
+        request({"command": "shutdown"}, path)
+    thread.join(5)
+    assert not path.exists(), "The socket file should be removed on shutdown"
+
+
+def test_fix_text(examples_path: Path) -> None:
+    """fix_text fixes content in memory without writing the file."""
+    example = examples_path / "whitespace/end_of_line/input/main.cpp"
+    original = example.read_text()
+    fixed, result = fix_text(example, original)
+    assert fixed == (examples_path / "whitespace/end_of_line/output/main.cpp").read_text()
+    assert result.edits_applied > 0
+    assert example.read_text() == original
+
+
+def test_fix_daemon_recent_results(examples_path: Path) -> None:
+    """Repeated requests for the same content are answered from memory."""
+    daemon = FixDaemon(max_entries=1)
+    example = examples_path / "whitespace/comments/input/main.cpp"
+    first = daemon.handle({"path": str(example)})
+    second = daemon.handle({"path": str(example), "text": example.read_text()})
+    assert first == second
+    assert first["ok"] and first["edits_applied"] > 0
+    assert (daemon.hits, daemon.misses) == (1, 1)
+
+    daemon.handle({"path": str(example), "text": ""})
+    daemon.handle({"path": str(example)})
+    assert (daemon.hits, daemon.misses) == (1, 3), "Only the most recent content is kept"
+
+
+def test_fix_daemon_errors(tmp_path: Path) -> None:
+    daemon = FixDaemon()
+    assert not daemon.handle({"command": "unknown"})["ok"]
+    assert not daemon.handle({"command": "fix"})["ok"]
+    assert not daemon.handle({"path": str(tmp_path / "missing.cpp")})["ok"]
+
+
+def test_serve(examples_path: Path, socket_path: Path) -> None:
+    """The daemon answers fix requests for text buffers over its socket."""
+    for example in examples_path.glob("whitespace/*/input/main.cpp"):
+        expected = (example.parent.parent / "output/main.cpp").read_text()
+        response = request({"path": str(example), "text": example.read_text()}, socket_path)
+        assert response["text"] == expected, f"Fixed text differs for {example}"
+
+    with pytest.raises(DaemonError):
+        request({"command": "unknown"}, socket_path)
+    with pytest.raises(DaemonError):
+        serve(FixDaemon(), socket_path)
+
+
+def test_serve_keeps_bytes(tmp_path: Path, socket_path: Path) -> None:
+    """CRLF line endings and invalid UTF-8 survive a fix through the daemon."""
+    source = tmp_path / "main.cpp"
+    source.write_bytes(b"// Copyright 2025 X\r\nint a;  \r\nconst char* s = \"\xff\";\r\n")
+    expected = b"// Copyright 2025 X\r\nint a;\r\nconst char* s = \"\xff\";\r\n"
+
+    for payload in ({"path": str(source)},
+                    {"path": str(source),
+                     "text": source.read_bytes().decode("utf-8", "surrogateescape")}):
+        response = request(payload, socket_path)
+        assert response["edits_applied"] == 1
+        assert response["text"].encode("utf-8", "surrogateescape") == expected
+
+
+def test_serve_idle_timeout(tmp_path: Path) -> None:
+    """The daemon shuts down by itself when no requests arrive."""
+    path = tmp_path / "idle.sock"
+    serve(FixDaemon(), path, idle_timeout=0.1)
+    assert not path.exists()
+    with pytest.raises(DaemonError):
+        request({"command": "ping"}, path)
+
+
+def test_socket_ownership(tmp_path: Path, socket_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Sockets that other users could have created or replaced are refused."""
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(DaemonError, match="other users can write"):
+        serve(FixDaemon(), shared / "fix.sock", idle_timeout=0.1)
+    with pytest.raises(DaemonError, match="other users can write"):
+        request({"command": "ping"}, shared / "fix.sock")
+
+    # A new socket directory is private
+    serve(FixDaemon(), tmp_path / "new" / "fix.sock", idle_timeout=0.1)
+    assert (tmp_path / "new").stat().st_mode & 0o777 == 0o700
+
+    monkeypatch.setattr("os.getuid", lambda: os.stat(socket_path).st_uid + 1)
+    with pytest.raises(DaemonError, match="owned by another user"):
+        request({"command": "ping"}, socket_path)
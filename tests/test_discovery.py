@@ -0,0 +1,88 @@
+import os
+import re
+import pytest
+from pathlib import Path
+from cpplint_fix import discovery
+from cpplint_fix.discovery import ExcludeFilter, find_sources, select_sources, split_balanced
+
+
+def test_find_sources(tmp_path: Path):
+    (tmp_path / "sub").mkdir()
+    for name in ["main.cpp", "sub/a.h", "sub/b.cc", "notes.txt", "sub_file.cpp"]:
+        (tmp_path / name).write_text("")
+
+    root, files = find_sources(tmp_path)
+    assert root == tmp_path
+    # Sorted as plain strings, the way cpplint sorts them
+    assert files == [Path("main.cpp"), Path("sub/a.h"), Path("sub/b.cc"), Path("sub_file.cpp")]
+
+    root, files = find_sources(tmp_path / "sub/a.h")
+    assert root == tmp_path / "sub"
+    assert files == [Path("a.h")]
+
+    assert find_sources(tmp_path / "notes.txt")[1] == []
+
+
+def test_split_balanced(tmp_path: Path):
+    sizes = {"a.cpp": 50, "b.cpp": 10, "c.cpp": 40, "d.cpp": 30, "e.cpp": 20}
+    for name, size in sizes.items():
+        (tmp_path / name).write_text("x" * size)
+    rel_paths = [Path(name) for name in sizes]
+
+    shards = split_balanced(tmp_path, rel_paths, 2)
+    assert len(shards) == 2
+    assert sorted(p for shard in shards for p in shard) == sorted(rel_paths)
+    totals = sorted(sum(sizes[p.name] for p in shard) for shard in shards)
+    assert totals == [70, 80]
+    # Each shard keeps the original file order
+    for shard in shards:
+        assert shard == sorted(shard)
+
+    assert split_balanced(tmp_path, rel_paths, 1) == [rel_paths]
+    assert len(split_balanced(tmp_path, rel_paths, 10)) == len(rel_paths)
+    assert split_balanced(tmp_path, [], 4) == []
+
+
+def test_exclude_filter():
+    patterns = [r"third_party/.*", r"^build\.out/", r".*/test/.*", r".*\.pb\.h$", r"(gen)\1/.*"]
+    exclude = ExcludeFilter([re.compile(p) for p in patterns])
+    # Same answers as matching each pattern in turn
+    for path in ["third_party/a.cpp", "build.out/a.cpp", "buildxout/a.cpp", "src/test/a.cpp",
+                 "src/a.pb.h", "src/a.pb.h.cpp", "gengen/a.cpp", "gen/a.cpp", "src/a.cpp"]:
+        expected = any(re.compile(p).match(path) for p in patterns)
+        assert exclude.excludes(path) == expected, path
+
+    sep = os.sep
+    assert exclude.excludes_dir("third_party")
+    assert exclude.excludes_dir(f"src{sep}test") == (sep == "/")
+    assert exclude.excludes_dir("gengen")
+    # A pattern anchored at the end cannot exclude a whole directory
+    assert not exclude.excludes_dir("src.pb.h")
+    assert not exclude.excludes_dir("src")
+    assert not ExcludeFilter([])
+    assert ExcludeFilter.of((re.compile("a"),)) is ExcludeFilter.of((re.compile("a"),))
+
+
+def test_find_sources_excluded(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Excluded directories are not walked, and excluded files are not returned."""
+    for name in ["main.cpp", "main.pb.h", "third_party/lib/a.cpp", "src/b.cpp"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("")
+    walked: list[str] = []
+    walk = os.walk
+
+    def recording_walk(top, *args, **kwargs):
+        for entry in walk(top, *args, **kwargs):
+            walked.append(os.path.relpath(entry[0], top))
+            yield entry
+
+    monkeypatch.setattr(discovery.os, "walk", recording_walk)
+    exclude = ExcludeFilter([re.compile(f"{re.escape(str(tmp_path))}/third_party/.*"),
+                             re.compile(r".*\.pb\.h$")])
+    root, files = find_sources(tmp_path, exclude)
+    assert files == [Path("main.cpp"), Path("src/b.cpp")]
+    assert sorted(walked) == [".", "src"]
+
+    assert select_sources(tmp_path, [Path("main.pb.h"), Path("src/b.cpp")], exclude)[1] == \
+        [Path("src/b.cpp")]
+    assert find_sources(tmp_path / "main.pb.h", exclude)[1] == []
@@ -1,9 +1,9 @@
 import pytest
 from pathlib import Path
-from cpplint_fix.edits.base import BaseEdit, EditOperation, EditOperationType
+from cpplint_fix.edits.base import BaseEdit, LineLocalEdit, EditOperation, EditOperationType
 from cpplint_fix.parser import CPPLFailure
 from cpplint_fix.source import SourceFile, SourceLine
-from cpplint_fix.edits import Edits
+from cpplint_fix.edits import EditPlan, Edits
 
 def test_base_edit():
     class TestEdit(BaseEdit):
@@ -48,4 +48,28 @@ def test_edits_list(edit_code: str):
     
 def test_edits_unknown_code():
     # Check that an unknown edit code raises KeyError
-    assert Edits.get("unknown/edit_code") is None, "Unknown edit code should return None"
\ No newline at end of file
+    assert Edits.get("unknown/edit_code") is None, "Unknown edit code should return None"
+
+
+def test_line_local_edits():
+    """Line-local edits give the same result one at a time or batched."""
+    lines = ["int x; // a  ", "int y;  ", "int z;"]
+    failures = [
+        CPPLFailure(lineno=1, message="Line ends in whitespace.", code="whitespace/end_of_line"),
+        CPPLFailure(lineno=1, message="At least two spaces", code="whitespace/comments"),
+        CPPLFailure(lineno=2, message="Line ends in whitespace.", code="whitespace/end_of_line"),
+    ]
+    edit_classes = [Edits.get(f.code) for f in failures]
+    assert all(c is not None and issubclass(c, LineLocalEdit) for c in edit_classes)
+    assert LineLocalEdit not in Edits.all()
+
+    one_by_one = SourceFile.from_lines(Path("test.cpp"), lines)
+    for edit_class, failure in zip(edit_classes, failures):
+        edit_class(failure).apply(one_by_one)
+    batched = SourceFile.from_lines(Path("test.cpp"), lines)
+    plan = EditPlan(batched)
+    for edit_class, failure in zip(edit_classes, failures):
+        assert plan.add_transform(failure.lineno, edit_class.transform)
+    plan.apply()
+
+    assert batched.to_text() == one_by_one.to_text() == "int x;  // a\nint y;\nint z;"
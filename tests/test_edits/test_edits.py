@@ -3,16 +3,18 @@ import pytest
 from cpplint_fix.edits import Edits
 from .conftest import EditExample
 from cpplint_fix.wrapper import fix_files
+from cpplint_fix.engine import LintBackend
 
 @pytest.mark.usefixtures("edit_example")
 @pytest.mark.parametrize("error_code", Edits.codes())
-def test_edit(edit_example: EditExample, tmp_path: Path):
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_edit(edit_example: EditExample, backend: LintBackend, tmp_path: Path):
     assert edit_example is not None
     
     fixed_path = tmp_path / "fixed"
     fixed_path.mkdir(parents=True, exist_ok=True)
 
-    fix_files(edit_example.input, fixed_path)
+    fix_files(edit_example.input, fixed_path, backend=backend)
     
     # Check that all output files match and exist
     for output_file in edit_example.output.glob("*"):
@@ -0,0 +1,109 @@
+from pathlib import Path
+from cpplint_fix.edits import EditDuplicate, EditPlan, Edits
+from cpplint_fix.edits.base import BaseEdit, EditOperation, EditOperationType
+from cpplint_fix.parser import CPPLFailure
+from cpplint_fix.source import SourceFile
+
+
+class _FixedEdit(BaseEdit):
+    """Edit returning the operations it was built with."""
+    _error_code = "test/fixed"
+
+    def __init__(self, *operations: EditOperation):
+        super().__init__(CPPLFailure(lineno=operations[0].line_number, message="",
+                                     code=self._error_code))
+        self._fixed = list(operations)
+
+    def _operations(self, source_file: SourceFile) -> list[EditOperation]:
+        return self._fixed
+
+
+class _OtherEdit(_FixedEdit):
+    _error_code = "test/other"
+
+
+def _source() -> SourceFile:
+    return SourceFile.from_lines(Path("plan.cpp"), ["int a;", "", "int b;  ", "int c;", ""])
+
+
+def test_plan_merges_compatible_operations():
+    src = _source()
+    plan = EditPlan(src)
+    assert plan.add(_FixedEdit(EditOperation(2, EditOperationType.EDIT, "// x"))) is None
+    assert plan.add(_FixedEdit(EditOperation(2, EditOperationType.DELETE))) is None
+    assert plan.add(_FixedEdit(EditOperation(4, EditOperationType.EDIT, "  int c;"))) is None
+    duplicate = _FixedEdit(EditOperation(4, EditOperationType.EDIT, "  int c;"))
+    assert plan.add(duplicate) == EditDuplicate(edit=duplicate)
+    assert isinstance(plan.add(_FixedEdit(EditOperation(2, EditOperationType.EDIT, "// y"))),
+                      EditDuplicate)
+    assert plan.add(_FixedEdit(EditOperation(1, EditOperationType.INSERT_BEFORE, "// a"),
+                               EditOperation(1, EditOperationType.INSERT_AFTER, "// b"))) is None
+    plan.add_transform(3, str.rstrip)
+    plan.add_transform(4, lambda line: line + "  // c")
+    plan.apply()
+
+    # The deletion absorbs the rewrite, equal rewrites are applied once, and
+    # line-local transforms apply on top of a rewrite
+    assert src.to_text() == "// a\nint a;\n// b\nint b;\n  int c;  // c\n"
+    assert src[4].edits == ["  int c;  // c"]
+
+
+def test_plan_rejects_conflicts():
+    src = _source()
+    plan = EditPlan(src)
+    assert plan.add(_FixedEdit(EditOperation(4, EditOperationType.EDIT, " int c;"))) is None
+    assert plan.add(_FixedEdit(EditOperation(2, EditOperationType.DELETE))) is None
+
+    # A different rewrite for the same code is merged away, not for another code
+    merged = plan.add(_FixedEdit(EditOperation(4, EditOperationType.EDIT, "int c; ")))
+    assert isinstance(merged, EditDuplicate) and "already planned" in str(merged)
+    rewrite = _OtherEdit(EditOperation(1, EditOperationType.INSERT_AFTER, "// ok"),
+                         EditOperation(4, EditOperationType.EDIT, "  int c;"))
+    conflict = plan.add(rewrite)
+    assert conflict is not None and conflict.edit is rewrite
+    assert conflict.line_number == 4
+    assert "rewritten differently" in str(conflict)
+
+    insert = plan.add(_FixedEdit(EditOperation(2, EditOperationType.INSERT_BEFORE, "// lost")))
+    assert insert is not None and "deleted" in insert.reason
+    out_of_range = plan.add(_FixedEdit(EditOperation(9, EditOperationType.DELETE)))
+    assert out_of_range is not None and "out of range" in out_of_range.reason
+    assert not plan.add_transform(9, str.rstrip)
+
+    # Failures outside the file are rejected before the edit looks at the source
+    for lineno in (0, 9):
+        indent = Edits.get("whitespace/indent")
+        assert indent is not None
+        outside = plan.add(indent(CPPLFailure(lineno=lineno, message="Weird number of "
+                                              "spaces at line-start.", code="whitespace/indent")))
+        assert outside is not None and outside.line_number == lineno
+
+    # Rejected edits leave no trace, not even their compatible operations
+    plan.apply()
+    assert src.to_text() == "int a;\nint b;  \n int c;\n"
+
+
+def test_plan_order_independent():
+    """Edits are planned on the unmodified source, so their order does not matter."""
+    lines = ["class A {", "  public:", "  int x;  ", "", "};"]
+    failures = [
+        CPPLFailure(lineno=3, message="Line ends in whitespace.", code="whitespace/end_of_line"),
+        CPPLFailure(lineno=4, message="Redundant blank line at the end of a code block "
+                    "should be deleted.", code="whitespace/blank_line"),
+        CPPLFailure(lineno=2, message="public: should be indented +1 space inside class A",
+                    code="whitespace/indent"),
+    ]
+    results = []
+    for ordered in (failures, failures[::-1]):
+        src = SourceFile.from_lines(Path("order.cpp"), lines)
+        plan = EditPlan(src)
+        for failure in ordered:
+            edit_class = Edits.get(failure.code)
+            assert edit_class is not None
+            if failure.code == "whitespace/end_of_line":
+                plan.add_transform(failure.lineno, edit_class.transform)
+            else:
+                assert plan.add(edit_class(failure)) is None
+        plan.apply()
+        results.append(src.to_text())
+    assert results[0] == results[1] == "class A {\n public:\n  int x;\n};"
@@ -0,0 +1,50 @@
+import pytest
+from pathlib import Path
+from cpplint_fix.engine import lint_file, lint_inprocess
+from cpplint_fix.source import SourceFile
+from cpplint_fix.wrapper import run_cpplint
+
+
+@pytest.mark.parametrize("example", [
+    "whitespace/blank_line",
+    "whitespace/comments",
+    "whitespace/end_of_line",
+    "whitespace/ending_newline",
+    "whitespace/indent",
+])
+def test_inprocess_matches_subprocess(examples_path: Path, example: str):
+    input_path = examples_path / example / "input"
+
+    expected = run_cpplint(input_path)
+    tsuite, sources = lint_inprocess(input_path)
+
+    assert [tc.fpath for tc in tsuite.testcases] == [tc.fpath for tc in expected.testcases]
+    for testcase, expected_testcase in zip(tsuite.testcases, expected.testcases):
+        assert testcase.failures == expected_testcase.failures
+        assert sources[testcase.fpath].path == input_path / testcase.fpath
+
+
+def test_inprocess_source(examples_path: Path):
+    input_path = examples_path / "whitespace/indent/input"
+    result = lint_file(input_path, Path("main.cpp"))
+    assert result is not None and result.source is not None
+
+    # Without the source, the same failures are found
+    bare = lint_file(input_path, Path("main.cpp"), with_source=False)
+    assert bare is not None and bare.source is None
+    assert bare.testcase == result.testcase
+
+    # The source built from cpplint's own pass matches a fresh load
+    loaded = SourceFile.from_file(input_path / "main.cpp")
+    loaded.analyze_nesting()
+    assert len(result.source) == len(loaded)
+    for line, loaded_line in zip(result.source, loaded):
+        assert line.line == loaded_line.line
+        assert line.nesting_types == loaded_line.nesting_types
+        assert line.total_class_indent == loaded_line.total_class_indent
+
+
+def test_lint_file_clean(tmp_path: Path):
+    source = tmp_path / "clean.cpp"
+    source.write_text("// Copyright 2025 Someone\nint x = 0;\n")
+    assert lint_file(tmp_path, Path("clean.cpp")) is None
@@ -0,0 +1,71 @@
+import subprocess as sp
+import pytest
+from pathlib import Path
+from cpplint_fix.engine import LintBackend
+from cpplint_fix.git import GitError, WHOLE_FILE, changed_lines, in_ranges
+from cpplint_fix.wrapper import fix_files
+
+
+def _git(root: Path, *args: str) -> None:
+    sp.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+           cwd=root, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src/a.cpp").write_text("int a = 0; \nint b = 0; \nint c = 0; \n")
+    (tmp_path / "src/b.cpp").write_text("int x = 0; \n")
+    (tmp_path / "gone.cpp").write_text("int y = 0;\n")
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-q", "-m", "Initial commit")
+    return tmp_path
+
+
+def test_changed_lines(repo: Path):
+    (repo / "src/a.cpp").write_text("int a = 0; \nint b = 1; \nint c = 0; \nint d = 0; \n")
+    (repo / "src/new.cpp").write_text("int n = 0;\n")
+    (repo / "gone.cpp").unlink()
+
+    changes = changed_lines(repo, "HEAD")
+    assert changes == {
+        Path("src/a.cpp"): [(2, 2), (4, 4)],
+        Path("src/new.cpp"): [WHOLE_FILE],
+    }
+    # Paths are relative to the given directory
+    assert changed_lines(repo / "src", "HEAD") == {
+        Path("a.cpp"): [(2, 2), (4, 4)],
+        Path("new.cpp"): [WHOLE_FILE],
+    }
+    assert in_ranges(4, changes[Path("src/a.cpp")])
+    assert not in_ranges(3, changes[Path("src/a.cpp")])
+
+    with pytest.raises(GitError):
+        changed_lines(repo, "no-such-ref")
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_since(repo: Path, backend: LintBackend):
+    (repo / "src/a.cpp").write_text("int a = 0; \nint b = 1; \nint c = 0; \n")
+
+    summary = fix_files(repo, None, backend=backend, jobs=1, since="HEAD",
+                        changed_lines_only=True)
+    assert [r.fpath for r in summary.results] == [repo / "src/a.cpp"]
+    assert summary.edits_applied == 1
+    assert (repo / "src/a.cpp").read_text() == "int a = 0; \nint b = 1;\nint c = 0; \n"
+    assert (repo / "src/b.cpp").read_text() == "int x = 0; \n"
+
+    summary = fix_files(repo, None, backend=backend, jobs=1, since="HEAD")
+    assert summary.edits_applied == 2
+    assert (repo / "src/a.cpp").read_text() == "int a = 0;\nint b = 1;\nint c = 0;\n"
+
+
+def test_fix_files_since_until_clean(repo: Path):
+    """Later rounds only fix the changed lines too, as moved by the earlier rounds."""
+    (repo / "src/a.cpp").write_text("int a = 0; \nvoid f() {\n\n\n\n  g();  \n}\nint c = 0; \n")
+
+    summary = fix_files(repo, None, jobs=1, since="HEAD", changed_lines_only=True,
+                        until_clean=True)
+    assert summary.edits_applied == 4
+    assert (repo / "src/a.cpp").read_text() == "int a = 0; \nvoid f() {\n  g();\n}\nint c = 0; \n"
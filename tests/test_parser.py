@@ -1,3 +1,4 @@
+import io
 import pytest
 from pathlib import Path
 import xml.etree.ElementTree as ET
@@ -75,4 +76,59 @@ def test_example_xml(examples_path: Path):
             assert isinstance(failure, CPPLFailure), "Failure is not of type CPPLFailure"
             assert failure.lineno >= 0, "Failure line number is negative"
             assert failure.message, "Failure message is empty"
-            assert failure.code, "Failure code is empty"
\ No newline at end of file
+            assert failure.code, "Failure code is empty"
+
+
+def test_iterparse(examples_path: Path):
+    example_file = examples_path / "example.xml"
+    expected = CPPLTestsuite.from_string(example_file.read_text(encoding="utf-8"))
+
+    testcases = list(CPPLTestsuite.iterparse(example_file))
+    assert [tc.fpath for tc in testcases] == [tc.fpath for tc in expected.testcases]
+    assert [tc.failures for tc in testcases] == [tc.failures for tc in expected.testcases]
+
+    # Binary streams, such as a process pipe, work too
+    stream = io.BytesIO(example_file.read_bytes())
+    first = next(CPPLTestsuite.iterparse(stream))
+    assert first == expected.testcases[0]
+
+    with pytest.raises(AssertionError):
+        list(CPPLTestsuite.iterparse(io.BytesIO(b"<testcase name='x'/>")))
+
+
+@pytest.mark.parametrize("report", [
+    "src/a.cpp:0:  No copyright message found.  You should have a line: "
+    "\"Copyright [year] <Copyright Owner>\"  [legal/copyright] [5]\n"
+    "src/a.cpp:3:  Line ends in whitespace.  Consider deleting these extra spaces.  "
+    "[whitespace/end_of_line] [4]\nDone processing src/a.cpp\n"
+    "b.h:1:  Blank line  [whitespace/blank_line] [2]\nTotal errors found: 3\n",
+    "src/a.cpp:0: warning: No copyright message found.  You should have a line: "
+    "\"Copyright [year] <Copyright Owner>\"  [legal/copyright] [5]\n"
+    "src/a.cpp:3: warning: Line ends in whitespace.  Consider deleting these extra spaces.  "
+    "[whitespace/end_of_line] [4]\nb.h:1: warning: Blank line  [whitespace/blank_line] [2]\n",
+    "src/a.cpp(0): error cpplint: [legal/copyright] No copyright message found.  You should "
+    "have a line: \"Copyright [year] <Copyright Owner>\" [5]\r\n"
+    "src/a.cpp(3): error cpplint: [whitespace/end_of_line] Line ends in whitespace.  "
+    "Consider deleting these extra spaces. [4]\r\n"
+    "b.h(1): error cpplint: [whitespace/blank_line] Blank line [2]\r\n",
+    "Done processing src/a.cpp\n<?xml version=\"1.0\" encoding=\"UTF-8\" ?>\n"
+    "<testsuite errors=\"0\" failures=\"3\" name=\"cpplint\" tests=\"3\">"
+    "<testcase name=\"src/a.cpp\"><failure>0: No copyright message found.  You should have "
+    "a line: \"Copyright [year] &lt;Copyright Owner&gt;\" [legal/copyright] [5]\n"
+    "3: Line ends in whitespace.  Consider deleting these extra spaces. "
+    "[whitespace/end_of_line] [4]</failure></testcase>"
+    "<testcase name=\"b.h\"><failure>1: Blank line [whitespace/blank_line] [2]</failure>"
+    "</testcase></testsuite>\nTotal errors found: 3\n",
+], ids=["emacs", "eclipse", "vs7", "junit"])
+def test_from_report(report: str):
+    testsuite = CPPLTestsuite.from_report(report)
+    assert [tc.fpath for tc in testsuite.testcases] == [Path("src/a.cpp"), Path("b.h")]
+    assert testsuite.testcases[0].failures == [
+        CPPLFailure(lineno=0, code="legal/copyright",
+                    message="No copyright message found.  You should have a line: "
+                            "\"Copyright [year] <Copyright Owner>\""),
+        CPPLFailure(lineno=3, code="whitespace/end_of_line",
+                    message="Line ends in whitespace.  Consider deleting these extra spaces."),
+    ]
+    assert testsuite.testcases[1].failures == [
+        CPPLFailure(lineno=1, message="Blank line", code="whitespace/blank_line")]
@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+from pathlib import Path
+from cpplint_fix.engine import LintBackend
+from cpplint_fix.pipeline import Stage, StageLimits, run_pipeline
+from cpplint_fix import wrapper
+from cpplint_fix.wrapper import aiter_cpplint, fix_files, fix_files_async, run_cpplint
+
+
+def test_run_pipeline_backpressure() -> None:
+    """Each stage runs up to its limit at once, and a blocked stage holds back the source."""
+    running = {"first": 0, "last": 0}
+    peak = {"first": 0, "last": 0}
+    produced: list[int] = []
+    done: list[int] = []
+
+    async def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    async def main() -> None:
+        gate = asyncio.Event()
+
+        def stage(name: str, wait: bool):
+            async def run(item: int) -> bool:
+                running[name] += 1
+                peak[name] = max(peak[name], running[name])
+                await (gate.wait() if wait else asyncio.sleep(0))
+                running[name] -= 1
+                return True
+            return run
+
+        stages = [Stage("first", stage("first", False), 3), Stage("last", stage("last", True), 2)]
+        task = asyncio.ensure_future(run_pipeline(source(), stages, queue_size=2, on_done=done.append))
+        for _ in range(100):
+            await asyncio.sleep(0)
+        # 2 in the last stage, 2 queued for it, 3 in the first stage waiting to queue
+        # theirs, 2 queued for it, and 1 the source waits to queue
+        assert len(produced) == 10
+        gate.set()
+        await task
+
+    asyncio.run(main())
+    assert peak["first"] <= 3 and peak["last"] == 2
+    assert sorted(done) == list(range(20))
+
+
+def test_run_pipeline_done_early() -> None:
+    """Items a stage is done with skip the following stages."""
+    done: list[int] = []
+    seen: list[int] = []
+
+    async def odd(item: int) -> bool:
+        return item % 2 == 1
+
+    async def record(item: int) -> bool:
+        seen.append(item)
+        return True
+
+    asyncio.run(run_pipeline(range(6), [Stage("odd", odd, 2), Stage("record", record, 1)],
+                             queue_size=1, on_done=done.append))
+    assert sorted(seen) == [1, 3, 5]
+    assert sorted(done) == list(range(6))
+
+
+def test_run_pipeline_error() -> None:
+    """A failing stage cancels the pipeline and closes its source."""
+    closed = []
+
+    async def source():
+        try:
+            for i in range(100):
+                yield i
+        finally:
+            closed.append(True)
+
+    async def run(item: int) -> bool:
+        if item == 3:
+            raise ValueError("boom")
+        return True
+
+    with pytest.raises(ValueError, match="boom"):
+        asyncio.run(run_pipeline(source(), [Stage("fail", run, 2)], queue_size=1,
+                                 on_done=lambda item: None))
+    assert closed == [True]
+    with pytest.raises(ValueError):
+        StageLimits(write=0)
+
+
+def test_aiter_cpplint(examples_path: Path, tmp_path: Path) -> None:
+    """The asynchronous cpplint runner finds the same failures as the synchronous one."""
+    async def lint() -> list:
+        return [tc async for tc in aiter_cpplint(examples_path / "whitespace", workers=3,
+                                                 max_pending=1)]
+
+    expected = run_cpplint(examples_path / "whitespace")
+    testcases = sorted(asyncio.run(lint()), key=lambda tc: str(tc.fpath))
+    assert testcases == sorted(expected.testcases, key=lambda tc: str(tc.fpath))
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_async(tmp_path: Path, backend: LintBackend) -> None:
+    """With a single file per stage and queue, files still all go through, in order."""
+    for i in range(6):
+        (tmp_path / f"f{i}.cpp").write_text(f"// Copyright 2025 Someone\nint a{i};  \n")
+    limits = StageLimits(lint=1, load=1, fix=1, write=1, queue_size=1)
+
+    async def main():
+        return await fix_files_async(tmp_path, None, backend=backend, jobs=1, limits=limits)
+
+    summary = asyncio.run(main())
+    assert [r.fpath.name for r in summary.results] == [f"f{i}.cpp" for i in range(6)]
+    assert summary.files_written == 6
+    for i in range(6):
+        assert (tmp_path / f"f{i}.cpp").read_text() == f"// Copyright 2025 Someone\nint a{i};\n"
+
+
+def test_fix_files_hands_over_source(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """With a single in-process worker, files linted are fixed and written without being
+    loaded again or joined into one buffer."""
+    (tmp_path / "a.cpp").write_text("// Copyright 2025 Someone\nint a;  \n")
+
+    def no_load(*args) -> None:
+        raise AssertionError("The linted source should be handed over")
+
+    def no_join(*args) -> None:
+        raise AssertionError("The fixed source should be streamed out")
+
+    monkeypatch.setattr(wrapper, "_load_stage", no_load)
+    monkeypatch.setattr(wrapper.SourceFile, "to_bytes", no_join)
+    summary = fix_files(tmp_path, None, jobs=1)
+    assert summary.files_written == 1
+    assert (tmp_path / "a.cpp").read_text() == "// Copyright 2025 Someone\nint a;\n"
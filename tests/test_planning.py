@@ -0,0 +1,190 @@
+import shutil
+from dataclasses import replace
+import pytest
+from pathlib import Path
+from cpplint_fix.config import CPPLFixConfig
+from cpplint_fix.engine import LintBackend
+import os
+from cpplint_fix.parser import CPPLFailure, CPPLTestcase, CPPLTestsuite
+from cpplint_fix.planning import FixPlan, file_digest, lint_filter
+from cpplint_fix.source import SourceFile
+from cpplint_fix.wrapper import fix_files, make_plan, plan_report
+
+
+def _copy_examples(examples_path: Path, dest: Path) -> None:
+    for example in examples_path.glob("whitespace/*/input/main.cpp"):
+        copy = dest / example.parent.parent.name / "main.cpp"
+        copy.parent.mkdir(parents=True)
+        shutil.copy(example, copy)
+
+
+def test_fix_plan_from_testcases(tmp_path: Path) -> None:
+    (tmp_path / "a.cpp").write_text("int a; \n")
+    testcases = [
+        CPPLTestcase(fpath=Path("a.cpp"), failures=[
+            CPPLFailure(lineno=1, message="Line ends in whitespace.", code="whitespace/end_of_line"),
+            CPPLFailure(lineno=1, message="No copyright", code="legal/copyright"),
+        ]),
+        CPPLTestcase(fpath=Path("b.cpp"), failures=[
+            CPPLFailure(lineno=2, message="Blank line", code="whitespace/blank_line"),
+        ]),
+    ]
+    config = CPPLFixConfig(exclude_rules=["whitespace/blank_line"])
+    plan = FixPlan.from_testcases(testcases, config, root=tmp_path)
+
+    # Files with nothing fixable are left out of the plan, so they are never loaded
+    assert [f.fpath for f in plan.files] == [Path("a.cpp")]
+    assert [f.code for f in plan.files[0].failures] == ["whitespace/end_of_line"]
+    assert plan.files[0].sha256 == file_digest(tmp_path / "a.cpp")
+    assert plan.skipped == {"legal/copyright": 1, "whitespace/blank_line": 1}
+    assert FixPlan.from_json(plan.to_json()) == plan
+    assert "Planned 1 edits in 1 files" in str(plan)
+
+    with pytest.raises(ValueError):
+        FixPlan.from_json('{"version": 0, "files": []}')
+
+
+@pytest.mark.parametrize("path, digest", [
+    ("{tmp}/a.cpp", True),
+    ("../a.cpp", True),
+    ("src/../../a.cpp", True),
+    ("a.cpp", False),
+])
+def test_invalid_plan(tmp_path: Path, path: str, digest: bool) -> None:
+    """Plans with files outside the root or without a digest are rejected before
+    anything is read or written."""
+    src = tmp_path / "src"
+    src.mkdir()
+    (tmp_path / "a.cpp").write_text("int a; \n")
+    (src / "a.cpp").write_text("int a; \n")
+    plan = FixPlan.from_testcases([CPPLTestcase(fpath=Path("a.cpp"), failures=[
+        CPPLFailure(lineno=1, message="Line ends in whitespace.", code="whitespace/end_of_line"),
+    ])], CPPLFixConfig(), root=src)
+    plan.files[0] = replace(plan.files[0], fpath=Path(path.format(tmp=tmp_path)),
+                            sha256=plan.files[0].sha256 if digest else None)
+
+    with pytest.raises(ValueError):
+        FixPlan.from_json(plan.to_json())
+    with pytest.raises(ValueError):
+        fix_files(src, None, jobs=1, plan=plan)
+    assert (tmp_path / "a.cpp").read_text() == "int a; \n"
+    assert (src / "a.cpp").read_text() == "int a; \n"
+
+
+def test_lint_filter() -> None:
+    config = CPPLFixConfig(exclude_rules=["whitespace/indent", "whitespace/comments", "legal/copyright"])
+    assert lint_filter(config) == \
+        "-,+whitespace/blank_line,+whitespace/end_of_line,+whitespace/ending_newline"
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_make_and_execute_plan(examples_path: Path, tmp_path: Path, backend: LintBackend) -> None:
+    """A saved plan applied later gives the same result as a direct run, except for
+    files that changed in between."""
+    triaged, fixed, direct = tmp_path / "triaged", tmp_path / "fixed", tmp_path / "direct"
+    _copy_examples(examples_path, triaged)
+    shutil.copytree(triaged, direct)
+    plan = make_plan(triaged, backend=backend, jobs=1)
+    plan.save(tmp_path / "plan.json")
+    assert [f.fpath.parent.name for f in plan.files] == [
+        "blank_line", "comments", "end_of_line", "ending_newline", "indent"]
+    assert [p.read_text() for p in sorted(triaged.glob("*/main.cpp"))] == \
+        [p.read_text() for p in sorted(direct.glob("*/main.cpp"))], "Planning writes no file"
+    shutil.copytree(triaged, fixed)
+    changed = fixed / "comments/main.cpp"
+    changed.write_text(changed.read_text() + "\n")
+
+    summary = fix_files(fixed, None, jobs=1, plan=FixPlan.load(tmp_path / "plan.json"))
+    fix_files(direct, None, jobs=1, backend=backend)
+    assert summary.files_written == 4
+    assert changed.read_text() == (triaged / "comments/main.cpp").read_text() + "\n"
+    for fpath in direct.glob("*/main.cpp"):
+        if fpath.parent.name != "comments":
+            assert (fixed / fpath.relative_to(direct)).read_text() == fpath.read_text()
+
+
+def test_plan_missing_file(tmp_path: Path) -> None:
+    """Planned files deleted since the plan was made are skipped, and the others fixed."""
+    for name in ("a.cpp", "b.cpp"):
+        (tmp_path / name).write_text("int a; \n")
+    failure = CPPLFailure(lineno=1, message="Line ends in whitespace.",
+                          code="whitespace/end_of_line")
+    plan = FixPlan.from_testcases([CPPLTestcase(fpath=Path(name), failures=[failure])
+                                   for name in ("a.cpp", "b.cpp")], CPPLFixConfig(), root=tmp_path)
+    (tmp_path / "a.cpp").unlink()
+
+    summary = fix_files(tmp_path, None, jobs=1, plan=plan)
+    assert summary.files_written == 1
+    assert (tmp_path / "b.cpp").read_text() == "int a;\n"
+    assert any("Skipping" in message for _, message in summary.results[0].logs)
+
+
+def test_plan_lines_out_of_range(tmp_path: Path) -> None:
+    """Failures on lines the file does not have fail, and the other edits are applied."""
+    (tmp_path / "a.cpp").write_text("int a; \n")
+    failures = [
+        CPPLFailure(lineno=lineno, message=message, code=code)
+        for lineno in (0, 1, 99)
+        for message, code in [("Line ends in whitespace.", "whitespace/end_of_line"),
+                              ("Weird number of spaces at line-start.", "whitespace/indent")]
+    ]
+    plan = FixPlan.from_testcases([CPPLTestcase(fpath=Path("a.cpp"), failures=failures)],
+                                  CPPLFixConfig(), root=tmp_path)
+
+    summary = fix_files(tmp_path, None, jobs=1, plan=plan)
+    assert (tmp_path / "a.cpp").read_text() == "int a;\n"
+    assert summary.edits_applied == 2 and summary.edits_failed == 4
+
+
+def test_duplicate_failures_counted_once(tmp_path: Path) -> None:
+    """Failures whose edits are merged into one are counted as a single applied edit."""
+    (tmp_path / "a.cpp").write_text("void f() {\n\n}\n")
+    failures = [
+        CPPLFailure(lineno=2, message=f"Redundant blank line at the {where} of a code block "
+                    "should be deleted.", code="whitespace/blank_line")
+        for where in ("start", "end")
+    ]
+    plan = FixPlan.from_testcases([CPPLTestcase(fpath=Path("a.cpp"), failures=failures)],
+                                  CPPLFixConfig(), root=tmp_path)
+
+    summary = fix_files(tmp_path, None, jobs=1, plan=plan, profile=True)
+    assert (tmp_path / "a.cpp").read_text() == "void f() {\n}\n"
+    assert summary.edits_applied == 1 and summary.edits_failed == 0
+    assert summary.profile is not None
+    assert summary.profile.edits() == {"whitespace/blank_line": (1, 0)}
+
+
+def test_unfixable_files_not_loaded(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Files whose failures all lack an edit are not loaded, even when cpplint reports them."""
+    (tmp_path / "cast.cpp").write_text("// Copyright 2025 Test\nint* x = (int*)0;\n")
+
+    def no_load(path: Path) -> SourceFile:
+        raise AssertionError(f"{path} should not be loaded")
+
+    monkeypatch.setattr(SourceFile, "from_file", no_load)
+    summary = fix_files(tmp_path, None, backend=LintBackend.SUBPROCESS, jobs=1, full_lint=True)
+    assert summary.failures == 1 and summary.edits_applied == 0
+
+
+def test_plan_report(tmp_path: Path) -> None:
+    """A saved report is planned like fresh lint results, except for files that
+    changed after it or that are not under the input directory."""
+    src = tmp_path / "src"
+    src.mkdir()
+    for name in ("a.cpp", "b.cpp", "c.cpp"):
+        (src / name).write_text("int a; \n")
+    report = "".join(f"{name}:1:  Line ends in whitespace.  [whitespace/end_of_line] [4]\n"
+                     for name in ("./a.cpp", "b.cpp", "c.cpp", str(src / "a.cpp"),
+                                  "../other.cpp", "missing.cpp"))
+    report_time = (src / "a.cpp").stat().st_mtime
+    os.utime(src / "c.cpp", (report_time + 10, report_time + 10))
+    config = CPPLFixConfig(exclude_files=[r".*b\.cpp"])
+
+    plan = plan_report(src, CPPLTestsuite.from_report(report), config, report_time=report_time)
+    assert [(f.fpath, len(f.failures)) for f in plan.files] == [(Path("a.cpp"), 1)]
+    assert plan.files[0].sha256 == file_digest(src / "a.cpp")
+
+    summary = fix_files(src, None, jobs=1, config=config, plan=plan)
+    assert summary.edits_applied == 1
+    assert (src / "a.cpp").read_text() == "int a;\n"
+    assert (src / "c.cpp").read_text() == "int a; \n"
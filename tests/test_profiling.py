@@ -0,0 +1,55 @@
+import json
+import shutil
+import pytest
+from pathlib import Path
+from cpplint_fix.engine import LintBackend
+from cpplint_fix.profiling import FileProfile, PhaseTime, RunProfile, timed
+from cpplint_fix.wrapper import fix_files
+
+
+def test_timed() -> None:
+    """Phases accumulate over calls, and nothing is recorded without a profile."""
+    profile = FileProfile()
+    for _ in range(2):
+        with timed(profile, "load"):
+            pass
+    assert profile.phases["load"].calls == 2
+    with timed(None, "load"):
+        pass
+
+
+def test_run_profile_totals() -> None:
+    profile = RunProfile(lines={Path("a.cpp"): 30, Path("b.cpp"): 10})
+    profile.phases["fix"] = PhaseTime(wall=2.0, cpu=1.0, calls=1)
+    a, b = FileProfile(), FileProfile()
+    a.phases["edits"] = PhaseTime(wall=0.5, cpu=0.5, calls=1)
+    b.phases["edits"] = PhaseTime(wall=0.25, cpu=0.25, calls=2)
+    a.applied["whitespace/comments"] += 2
+    b.failed["whitespace/indent"] += 1
+    profile.files = {Path("a.cpp"): a, Path("b.cpp"): b}
+
+    assert profile.lines_per_second == 20.0
+    assert profile.file_phases()["edits"] == PhaseTime(wall=0.75, cpu=0.75, calls=3)
+    assert profile.edits() == {"whitespace/comments": (2, 0), "whitespace/indent": (0, 1)}
+    assert "whitespace/indent" in str(profile)
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_profile(examples_path: Path, tmp_path: Path, backend: LintBackend) -> None:
+    """A profiled run records each file's phases and the edits per error code."""
+    for example in examples_path.glob("whitespace/*/input/main.cpp"):
+        dest = tmp_path / example.parent.parent.name / "main.cpp"
+        dest.parent.mkdir(parents=True)
+        shutil.copy(example, dest)
+
+    summary = fix_files(tmp_path, None, backend=backend, jobs=1, profile=True)
+    profile = summary.profile
+    assert profile is not None
+    assert set(profile.files) == {r.fpath for r in summary.results}
+    assert sum(applied for applied, _ in profile.edits().values()) == summary.edits_applied
+    assert {"discovery", "fix", "report"} <= set(profile.phases)
+    assert {"edits", "write"} <= set(profile.file_phases())
+    assert profile.total_lines > 0
+    json.dumps(profile.to_dict())
+
+    assert fix_files(tmp_path, None, jobs=1).profile is None
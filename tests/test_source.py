@@ -152,6 +152,7 @@ namespace my_space {
     source_file = SourceFile.from_file(test_file_path)
     assert source_file.path == test_file_path
     assert len(source_file.lines) == 11
+    source_file.analyze_nesting()
     
     for i in range(1, len(source_file.lines) + 1):  
         source_line = source_file[i]
@@ -169,3 +170,125 @@ namespace my_space {
             assert source_line.nesting_types[2] == NestingType.BLOCK
     
     # Namespace extent should start from
+
+def test_source_file_shared_snapshots(tmp_path: Path):
+    source_content = """namespace outer {
+class A {
+ public:
+    void f() {
+        int x = 0;
+        int y = 1;
+    }
+    int z;
+};
+}
+"""
+    test_file_path = tmp_path / "test_snapshots.cpp"
+    test_file_path.write_text(source_content)
+    source_file = SourceFile.from_file(test_file_path)
+    source_file.analyze_nesting()
+
+    # Lines in the same block share the same snapshot object
+    assert source_file[5].block_info is source_file[6].block_info
+    assert source_file[3].block_info is source_file[8].block_info
+    assert source_file[5].block_info is not source_file[3].block_info
+    # Nested snapshots link back to the enclosing ones
+    function_block = source_file[5].block_info
+    assert function_block is not None
+    assert function_block.parent is source_file[3].block_info
+    assert [b.nesting_type for b in function_block.blocks()] == [
+        NestingType.NAMESPACE, NestingType.CLASS, NestingType.BLOCK
+    ]
+    assert source_file[11].block_info is None
+    assert source_file[11].nesting_level == 0
+
+def test_source_file_lazy_nesting(tmp_path: Path):
+    test_file_path = tmp_path / "test_lazy.cpp"
+    test_file_path.write_text("namespace a {\nint x;\n}\nnamespace b {\nint y;\n}\n")
+    source_file = SourceFile.from_file(test_file_path)
+
+    # Nothing is analyzed until requested, then only up to the requested line
+    assert all(line.block_info is None for line in source_file)
+    source_file.analyze_nesting(2)
+    assert source_file[2].nesting_types == [NestingType.NAMESPACE]
+    assert source_file[5].block_info is None
+    source_file.analyze_nesting()
+    assert source_file[5].nesting_types == [NestingType.NAMESPACE]
+    assert source_file[5].block_info is not source_file[2].block_info
+
+def test_source_file_serialization(tmp_path: Path):
+    source_file = SourceFile(path=tmp_path / "test.cpp", lines=[
+        SourceLine(number=i, line=f"line {i}") for i in range(1, 5)
+    ])
+    source_file.insert_before(1, "first")
+    source_file.insert_after(2, "after 2")
+    source_file.edit_line(3, "edited 3")
+    source_file.delete_line(4)
+
+    expected = ["first", "line 1", "line 2", "after 2", "edited 3"]
+    assert list(source_file.iter_lines()) == expected
+    assert expected == sum([line.edited_lines for line in source_file], [])
+    assert source_file.to_bytes() == "\n".join(expected).encode("utf-8")
+
+    source_file.to_file(source_file.path)
+    assert source_file.path.read_bytes() == source_file.to_bytes()
+
+    empty = SourceFile(path=tmp_path / "empty.cpp", lines=[])
+    assert empty.to_bytes() == b""
+
+def test_source_file_overlay(tmp_path: Path):
+    test_file_path = tmp_path / "test_overlay.cpp"
+    test_file_path.write_text("namespace a {\nint x; \nint y;\n}\n")
+    source_file = SourceFile.from_file(test_file_path)
+
+    # Only edited lines are stored; the others are views created on access
+    source_file.edit_line(2, "int x;")
+    assert source_file[2] is source_file[2]
+    assert source_file[3] is not source_file[3]
+    assert source_file[3].line == "int y;"
+    assert source_file[2].edits == ["int x;"]
+
+    # Edited lines still see block info computed after the edit
+    source_file.analyze_nesting()
+    assert source_file[2].nesting_types == [NestingType.NAMESPACE]
+    assert source_file[3].nesting_types == [NestingType.NAMESPACE]
+    assert source_file[5].nesting_level == 0
+    assert source_file.to_bytes() == b"namespace a {\nint x;\nint y;\n}\n"
+
+def test_source_file_edited_ranges():
+    source_file = SourceFile.from_lines(Path("ranges.cpp"), [f"int x{i};" for i in range(1, 9)])
+    source_file.delete_line(2)
+    source_file.insert_before(4, "// a")
+    source_file.insert_after(4, "// b")
+    source_file.delete_line(6)
+    source_file.delete_line(7)
+    # 1, 3, // a, 4, // b, 5, 8
+    assert source_file.edited_ranges([(1, 1), (2, 3), (4, 4), (5, 5), (6, 7), (8, 8)]) == [
+        (1, 1), (2, 2), (3, 5), (6, 6), (7, 7)]
+    assert source_file.edited_ranges([(1, 8)]) == [(1, 7)]
+
+@pytest.mark.parametrize("mmap_threshold", [None, 0])
+def test_source_file_bytes(tmp_path: Path, mmap_threshold: int | None):
+    """Line endings and invalid UTF-8 are kept, and only edited lines change."""
+    test_file_path = tmp_path / "test_bytes.cpp"
+    content = b"int a;  \r\nconst char* s = \"\xff\";\r\nint b;\nint c;\r\nint d;\r\n"
+    test_file_path.write_bytes(content)
+    source_file = SourceFile.from_file(test_file_path, mmap_threshold=mmap_threshold)
+
+    assert len(source_file) == 6
+    assert source_file[1].line == "int a;  "
+    assert source_file[2].line == "const char* s = \"\udcff\";"
+    assert source_file.to_bytes() == content
+
+    source_file.edit_line(1, "int a;")
+    source_file.insert_after(3, "// after b")
+    source_file.insert_before(6, "// end")
+    source_file.delete_line(5)
+    source_file.edit_line(2, source_file[2].line + " ")
+    assert source_file.to_bytes() == (b"int a;\r\nconst char* s = \"\xff\"; \r\nint b;\n// after b\n"
+                                      b"int c;\r\n// end\r\n")
+
+    # Writing over a mapped file reads its content first
+    source_file.to_file(test_file_path)
+    assert test_file_path.read_bytes() == source_file.to_bytes()
+    assert source_file.to_text() == str(source_file.to_bytes(), "utf-8", "surrogateescape")
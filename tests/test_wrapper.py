@@ -1,5 +1,12 @@
+import io
+import logging
+import shutil
+import pytest
 from pathlib import Path
-from cpplint_fix.wrapper import run_cpplint
+from cpplint_fix.cache import LintCache
+from cpplint_fix.engine import LintBackend
+from cpplint_fix.config import CPPLFixConfig
+from cpplint_fix.wrapper import run_cpplint, fix_files, check_files
 
 
 def test_run_cpplint(examples_path: Path) -> None:
@@ -16,3 +23,163 @@ def test_run_cpplint(examples_path: Path) -> None:
     assert failure.lineno == 5, "Failure line number should be 5"
     assert failure.message == "Could not find a newline character at the end of the file.", "Failure message does not match"
     assert failure.code == "whitespace/ending_newline", "Failure code does not match"
+
+
+def test_run_cpplint_sharded(examples_path: Path, tmp_path: Path) -> None:
+    """Several cpplint workers produce the same merged results as a single run."""
+    for example in examples_path.glob("whitespace/*/input/main.cpp"):
+        dest = tmp_path / example.parent.parent.name / "main.cpp"
+        dest.parent.mkdir(parents=True)
+        shutil.copy(example, dest)
+    (tmp_path / "clean.h").write_text("")
+
+    single = run_cpplint(tmp_path)
+    sharded = run_cpplint(tmp_path, workers=3)
+    assert len(single.testcases) == 6
+    assert [tc.fpath for tc in sharded.testcases] == [tc.fpath for tc in single.testcases]
+    assert [tc.failures for tc in sharded.testcases] == [tc.failures for tc in single.testcases]
+
+
+def test_fix_files_jobs(examples_path: Path, tmp_path: Path) -> None:
+    """Fixing in parallel gives the same results, in the same order, as a single job."""
+    examples = sorted(examples_path.glob("whitespace/*/input/main.cpp"))
+    trees = []
+    for jobs in (1, 3):
+        root = tmp_path / f"jobs_{jobs}"
+        for example in examples:
+            dest = root / example.parent.parent.name / "main.cpp"
+            dest.parent.mkdir(parents=True)
+            shutil.copy(example, dest)
+        summary = fix_files(root, None, jobs=jobs)
+        trees.append((root, summary))
+
+    (root_1, summary_1), (root_3, summary_3) = trees
+    assert summary_1.files == len(examples)
+    assert [r.fpath.relative_to(root_1) for r in summary_1.results] == \
+        [r.fpath.relative_to(root_3) for r in summary_3.results]
+    assert [r.logs for r in summary_1.results] == \
+        [[(level, msg.replace(str(root_3), str(root_1))) for level, msg in r.logs]
+         for r in summary_3.results]
+    assert summary_1.edits_applied == summary_3.edits_applied > 0
+    for example in examples:
+        rel_path = Path(example.parent.parent.name) / "main.cpp"
+        assert (root_1 / rel_path).read_text() == (root_3 / rel_path).read_text()
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_until_clean(tmp_path: Path, backend: LintBackend) -> None:
+    """Deleting a blank line exposes the next one, which another round deletes."""
+    source = tmp_path / "main.cpp"
+    source.write_text("// Copyright 2025 Someone\nint main() {\n\n\n  return 0;\n}\n")
+
+    summary = fix_files(tmp_path, None, backend=backend, jobs=1, until_clean=True)
+    assert summary.edits_applied == 2
+    assert summary.files_written == 1
+    assert source.read_text() == "// Copyright 2025 Someone\nint main() {\n  return 0;\n}\n"
+    assert run_cpplint(tmp_path).testcases == []
+
+    # Rounds are capped
+    source.write_text("// Copyright 2025 Someone\nint main() {\n\n\n\n  return 0;\n}\n")
+    summary = fix_files(tmp_path, None, backend=backend, jobs=1, until_clean=True, max_rounds=2)
+    assert summary.edits_applied == 2
+    assert source.read_text() == "// Copyright 2025 Someone\nint main() {\n\n  return 0;\n}\n"
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_keeps_bytes(tmp_path: Path, backend: LintBackend) -> None:
+    """CRLF line endings and invalid UTF-8 survive a fix, across rounds too."""
+    source = tmp_path / "main.cpp"
+    source.write_bytes(b"// Copyright 2025 Someone\r\nint main() {  \r\n\r\n\r\n"
+                       b"  return \"\xe9\"[0];\r\n}\r\n")
+
+    summary = fix_files(tmp_path, None, backend=backend, jobs=1, until_clean=True)
+    assert summary.edits_applied == 3
+    assert source.read_bytes() == (b"// Copyright 2025 Someone\r\nint main() {\r\n"
+                                   b"  return \"\xe9\"[0];\r\n}\r\n")
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_lint_filter(tmp_path: Path, backend: LintBackend) -> None:
+    """cpplint only reports the fixable failures, unless a full lint is asked for."""
+    source = tmp_path / "main.cpp"
+    text = "int* x = (int*)0;  \n"
+    source.write_text(text)
+    cache = LintCache(tmp_path / ".cache")
+
+    summary = fix_files(tmp_path, None, backend=backend, jobs=1, dry_run=True, cache=cache)
+    assert summary.failures == 1
+    assert not any(level == logging.WARNING for r in summary.results for level, _ in r.logs)
+    # Results of either kind are cached apart
+    for cache_misses in (1, 0):
+        summary = fix_files(tmp_path, None, backend=backend, jobs=1, dry_run=True, cache=cache,
+                            full_lint=True)
+        assert summary.cache_misses == cache_misses
+        warnings = [msg for r in summary.results for level, msg in r.logs if level == logging.WARNING]
+        assert "No edits found for error code: readability/casting" in warnings
+        assert "No edits found for error code: legal/copyright" in warnings
+    config = CPPLFixConfig(exclude_rules=["whitespace/end_of_line"])
+    assert fix_files(tmp_path, None, config=config, backend=backend, jobs=1).failures == 0
+
+    # Filters from CPPLINT.cfg still apply on top
+    (tmp_path / "CPPLINT.cfg").write_text("filter=-whitespace/end_of_line\n")
+    assert fix_files(tmp_path, None, backend=backend, jobs=1).failures == 0
+    assert source.read_text() == text
+
+
+def _copy_examples(examples_path: Path, dest: Path) -> dict[Path, str]:
+    """Copy the input of every example under dest; returns the original contents."""
+    originals = {}
+    for example in examples_path.glob("whitespace/*/input/main.cpp"):
+        copy = dest / example.parent.parent.name / "main.cpp"
+        copy.parent.mkdir(parents=True)
+        shutil.copy(example, copy)
+        originals[copy] = copy.read_text()
+    return originals
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_check_files(examples_path: Path, tmp_path: Path, backend: LintBackend) -> None:
+    """check_files reports the first file in order with fixable failures, writing nothing."""
+    originals = _copy_examples(examples_path, tmp_path)
+    testcase = check_files(tmp_path, backend=backend, jobs=1)
+    assert testcase is not None
+    assert testcase.fpath == Path("blank_line/main.cpp")
+    assert {f.code for f in testcase.failures} == {"whitespace/blank_line"}
+    assert all(fpath.read_text() == text for fpath, text in originals.items())
+
+    config = CPPLFixConfig(exclude_rules=[f"whitespace/{d}" for d in
+                                          ("blank_line", "comments", "end_of_line", "ending_newline", "indent")])
+    assert check_files(tmp_path, config=config, backend=backend, jobs=2) is None
+
+
+def test_fix_files_diff(examples_path: Path, tmp_path: Path) -> None:
+    """In diff mode, the fixes are printed as unified diffs and no file is written."""
+    originals = _copy_examples(examples_path, tmp_path)
+    stream = io.StringIO()
+    summary = fix_files(tmp_path, None, jobs=1, diff=stream)
+
+    assert all(fpath.read_text() == text for fpath, text in originals.items())
+    assert stream.getvalue() == "".join(r.diff or "" for r in summary.results)
+    end_of_line = next(r.diff for r in summary.results if r.fpath.parent.name == "end_of_line")
+    assert end_of_line is not None
+    assert "--- a/end_of_line/main.cpp\n+++ b/end_of_line/main.cpp\n" in end_of_line
+    assert "-    int x = 42;    \n+    int x = 42;\n" in end_of_line
+    ending_newline = next(r.diff for r in summary.results if r.fpath.parent.name == "ending_newline")
+    assert ending_newline is not None and "\\ No newline at end of file" in ending_newline
+
+
+@pytest.mark.parametrize("backend", list(LintBackend))
+def test_fix_files_diff_order(tmp_path: Path, backend: LintBackend) -> None:
+    """Diffs are written in file order, whatever the number of jobs."""
+    for name, size in (("a.cpp", 1), ("b.h", 5), ("c.cc", 50)):
+        (tmp_path / name).write_text("// Copyright 2025 Someone\n" + "int a;  \n" * size)
+    (tmp_path / "b0.cpp").write_text("// Copyright 2025 Someone\nint b;\n")
+
+    diffs = []
+    for jobs in (1, 3):
+        stream = io.StringIO()
+        fix_files(tmp_path, None, backend=backend, jobs=jobs, diff=stream)
+        diffs.append(stream.getvalue())
+    assert diffs[0] == diffs[1]
+    assert [line for line in diffs[0].splitlines() if line.startswith("+++")] == [
+        "+++ b/a.cpp", "+++ b/b.h", "+++ b/c.cc"]
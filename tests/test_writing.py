@@ -0,0 +1,152 @@
+import os
+import stat
+import pytest
+from pathlib import Path
+from cpplint_fix.cache import LintCache
+from cpplint_fix.source import SourceFile
+from cpplint_fix.wrapper import fix_files
+from cpplint_fix.writing import (LinkMode, SyncMode, place_file, sync_paths, write_atomic,
+                                 write_if_changed)
+
+
+@pytest.mark.parametrize("fsync", [False, True])
+def test_write_atomic(tmp_path: Path, fsync: bool) -> None:
+    target = tmp_path / "a.cpp"
+    target.write_bytes(b"old\n")
+    target.chmod(0o751)
+    link = tmp_path / "link.cpp"
+    link.symlink_to(target.name)
+
+    write_atomic(link, [b"new", b"\n"], fsync=fsync)
+    # The symlink is written through, the permissions are kept, and no temporary is left
+    assert link.is_symlink()
+    assert target.read_bytes() == b"new\n"
+    assert stat.S_IMODE(target.stat().st_mode) == 0o751
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.cpp", "link.cpp"]
+
+    # A failed write leaves the file as it was
+    with pytest.raises(TypeError):
+        write_atomic(target, [b"partial", "not bytes"])  # type: ignore[list-item]
+    assert target.read_bytes() == b"new\n"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.cpp", "link.cpp"]
+
+
+def test_write_if_changed(tmp_path: Path) -> None:
+    target = tmp_path / "a.cpp"
+    target.write_bytes(b"int a;\n")
+    os.utime(target, (1000, 1000))
+
+    assert not write_if_changed(target, b"int a;\n")
+    assert target.stat().st_mtime == 1000
+    assert write_if_changed(target, b"int b;\n")
+    assert target.read_bytes() == b"int b;\n"
+    assert write_if_changed(tmp_path / "new.cpp", b"int c;\n")
+
+
+
+def test_write_if_changed_chunks(tmp_path: Path) -> None:
+    """Chunked content is compared against the file piece by piece, then streamed out."""
+    target = tmp_path / "a.cpp"
+    target.write_bytes(b"int a;\nint b;\n")
+    os.utime(target, (1000, 1000))
+
+    assert not write_if_changed(target, lambda: iter([b"int a;", b"\n", b"int b;\n"]))
+    assert target.stat().st_mtime == 1000
+    assert write_if_changed(target, lambda: iter([b"int a;", b"\n"]))
+    assert target.read_bytes() == b"int a;\n"
+    assert write_if_changed(target, lambda: iter([b"int a;", b"\n", b"int c;\n"]))
+    assert target.read_bytes() == b"int a;\nint c;\n"
+    assert write_if_changed(tmp_path / "new.cpp", lambda: iter([b"int d;\n"]))
+    assert (tmp_path / "new.cpp").read_bytes() == b"int d;\n"
+
+def test_apply_edits_unchanged(tmp_path: Path) -> None:
+    """Edits that cancel out leave the file alone."""
+    target = tmp_path / "a.cpp"
+    target.write_text("int a;\nint b;\n")
+    os.utime(target, (1000, 1000))
+    source_file = SourceFile.from_file(target)
+    source_file.edit_line(1, "int c;")
+    source_file.edit_line(1, "int a;")
+    assert not source_file.apply_edits()
+    assert target.stat().st_mtime == 1000
+
+
+@pytest.mark.parametrize("sync", list(SyncMode))
+def test_fix_files_sync(tmp_path: Path, sync: SyncMode) -> None:
+    source = tmp_path / "main.cpp"
+    source.write_text("// Copyright 2025 Someone\nint a;  \n")
+    source.chmod(0o640)
+    summary = fix_files(tmp_path, None, jobs=1, sync=sync)
+    assert summary.files_written == 1
+    assert source.read_text() == "// Copyright 2025 Someone\nint a;\n"
+    assert stat.S_IMODE(source.stat().st_mode) == 0o640
+
+
+def test_sync_paths(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Only the given files and their directories are flushed, each directory once."""
+    paths = [tmp_path / "a.cpp", tmp_path / "b.cpp", tmp_path / "sub/c.cpp"]
+    for path in paths:
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("int a;\n")
+    synced: list[int] = []
+    fsync = os.fsync
+
+    def record(fd: int) -> None:
+        synced.append(os.fstat(fd).st_ino)
+        fsync(fd)
+
+    def no_sync() -> None:
+        raise AssertionError("os.sync flushes every filesystem")
+
+    monkeypatch.setattr(os, "fsync", record)
+    monkeypatch.setattr(os, "sync", no_sync, raising=False)
+    sync_paths(paths)
+    assert sorted(synced) == sorted(p.stat().st_ino for p in [*paths, tmp_path, tmp_path / "sub"])
+
+
+@pytest.mark.parametrize("link", list(LinkMode))
+def test_fix_files_output_tree(tmp_path: Path, link: LinkMode) -> None:
+    """The output mirrors the input, with fixed files written and the others placed."""
+    root, output = tmp_path / "src", tmp_path / "out"
+    for name in ("a/main.cpp", "b/main.cpp"):
+        (root / name).parent.mkdir(parents=True)
+    (root / "a/main.cpp").write_text("// Copyright 2025 Someone\nint a;  \n")
+    (root / "b/main.cpp").write_text("// Copyright 2025 Someone\nint b;\n")
+    (root / "b/CMakeLists.txt").write_text("add_library(b main.cpp)\n")
+
+    # The lint cache is not part of the output, even inside the input
+    cache = LintCache(root / ".cpplint-fix-cache")
+    summary = fix_files(root, output, jobs=1, link=link, cache=cache)
+    assert summary.files_written == 1
+    assert any(cache.path.rglob("*.json"))
+    assert sorted(p.relative_to(output).as_posix() for p in output.rglob("*") if p.is_file()) == \
+        ["a/main.cpp", "b/CMakeLists.txt", "b/main.cpp"]
+    assert (output / "a/main.cpp").read_text() == "// Copyright 2025 Someone\nint a;\n"
+    assert (root / "a/main.cpp").read_text() == "// Copyright 2025 Someone\nint a;  \n"
+    for name in ("b/main.cpp", "b/CMakeLists.txt"):
+        assert (output / name).read_bytes() == (root / name).read_bytes()
+        assert os.path.samefile(output / name, root / name) == (link == LinkMode.HARDLINK)
+
+    # A second run leaves the output tree alone
+    os.utime(output / "a/main.cpp", (1000, 1000))
+    summary = fix_files(root, output, jobs=1, link=link)
+    assert summary.files_written == 0
+    assert (output / "a/main.cpp").stat().st_mtime == 1000
+
+
+def test_place_file_link_fallback(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """A hard link that fell back to a copy is not copied again while unchanged."""
+    source, dest = tmp_path / "a.cpp", tmp_path / "out.cpp"
+    source.write_text("int a;\n")
+
+    def no_link(src: str, dst: str) -> None:
+        raise OSError("Invalid cross-device link")
+
+    monkeypatch.setattr(os, "link", no_link)
+    assert place_file(source, dest)
+    assert not os.path.samefile(source, dest)
+    assert not place_file(source, dest)
+    source.write_text("int b;\n")
+    os.utime(source, (1000, 1000))
+    assert place_file(source, dest)
+    assert dest.read_text() == "int b;\n"